@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.security import require_admin_token
+from app.utils.cache import create_cache
+from app.utils.profiling import SamplingProfiler, format_collapsed
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+# Hasil cProfile per request (header X-Profile: cprofile), diambil lewat X-Profile-Id.
+# Dengan backend sqlite, hasil bisa diambil dari worker mana pun
+request_profiles = create_cache(
+    "request_profiles",
+    max_entries=settings.PROFILE_REQUEST_RESULTS_MAX,
+    ttl_seconds=settings.PROFILE_REQUEST_RESULTS_TTL_SECONDS
+)
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(None, gt=0),
+    include_idle: bool = False
+):
+    """
+    Profil sampling worker ini selama beberapa detik tanpa restart.
+
+    Args:
+        seconds: Lama sampling, dibatasi PROFILE_MAX_SECONDS.
+        interval_ms: Jarak antar sampel (default PROFILE_SAMPLE_INTERVAL_MS).
+        include_idle: Sertakan thread yang sedang menunggu (select, queue.get).
+
+    Returns:
+        Collapsed stack (text/plain) untuk flamegraph.pl atau speedscope.
+    """
+    seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+    interval = (interval_ms or settings.PROFILE_SAMPLE_INTERVAL_MS) / 1000
+    profiler = SamplingProfiler(interval=interval, include_idle=include_idle)
+
+    logger.info("Sampling profile started for %.1fs at %.1fms interval", seconds, interval * 1000)
+    try:
+        stacks = await asyncio.get_event_loop().run_in_executor(None, profiler.run, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={"X-Profile-Samples": str(profiler.samples)}
+    )
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    """Ambil ringkasan cProfile sebuah request berdasarkan header X-Profile-Id."""
+    result = request_profiles.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profil request tidak ditemukan atau sudah kedaluwarsa")
+    return PlainTextResponse(result)
@@ -1,28 +1,57 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from app.services.db_services import execute_query
-from app.services.llm_services import analyze_data_with_llm
+from app.services.db_services import fetch_preview_coalesced
+from app.services.llm_services import analyze_data_with_llm, analysis_cache
+from app.utils.cancellation import cancel_on_disconnect
+from app.utils.metrics import stage_timer
 
 router = APIRouter()
 
 class AnalyzeRequest(BaseModel):
     query: str
+    # Nama field dipertahankan untuk kompatibilitas klien; isinya adalah id_datasource
     database_name: str
 
 @router.post("/analyze")
-async def analyze_data(request: AnalyzeRequest):
+async def analyze_data(request: AnalyzeRequest, http_request: Request):
     """
     Mengeksekusi query SQL, mengambil data, dan menganalisisnya dengan LLM.
     
     Args:
-        request (AnalyzeRequest): Request body yang berisi query SQL dan nama database.
+        request (AnalyzeRequest): Request body yang berisi query SQL dan id datasource
+            (pada field database_name).
     
     Returns:
         dict: Teks analisis dari LLM.
+    
+    Raises:
+        HTTPException: 400 jika database_name bukan id datasource berupa angka.
     """
     try:
-        data = execute_query(request.query, request.database_name)
-        analysis = analyze_data_with_llm(data)
+        id_datasource = int(request.database_name)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"database_name harus berupa id datasource (angka), diterima: {request.database_name!r}"
+        )
+
+    try:
+        async def _analyze():
+            # Eksekusi query sudah dicatat sebagai tahap db_query oleh fetch_preview_coalesced
+            data = await fetch_preview_coalesced(request.query, id_datasource)
+            with stage_timer("analysis"):
+                return await analyze_data_with_llm(data)
+
+        analysis = await cancel_on_disconnect(http_request, _analyze())
         return {"analysis": analysis}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def analysis_cache_stats():
+    """
+    Metrik cache analisis (ukuran, hit, miss, eviction, hit rate).
+    """
+    return analysis_cache.stats()
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from app.core.security import require_admin_token
+from app.services.db_services import invalidate_datasource, datasource_cache, datasource_pool_stats
+from app.services.nl2sql_service import context_cache, invalidate_context
+from app.services.context_store import context_store
+
+router = APIRouter()
+
+@router.post("/{id_datasource}/invalidate", dependencies=[Depends(require_admin_token)])
+def invalidate_datasource_cache(id_datasource: int):
+    """
+    Dipanggil oleh toolsBI (dengan header X-Admin-Token) setelah datasource diubah atau
+    dihapus: metadata dan konteks skema yang di-cache (termasuk snapshot disk) dibuang dan
+    pool koneksi datasource ditutup, juga di worker lain pada host yang sama.
+
+    Endpoint sinkron agar engine.dispose() dan tulis SQLite berjalan di threadpool
+    FastAPI, bukan di event loop. Tidak lewat executor datasource supaya invalidasi
+    tidak mengantre di belakang query yang lambat.
+    """
+    invalidate_datasource(id_datasource)
+    invalidate_context(id_datasource)
+    return {"status": "success", "id_datasource": id_datasource}
+
+@router.get("/cache/stats")
+async def datasource_cache_stats():
+    """
+    Metrik cache metadata datasource, cache konteks, snapshot disk dan pemakaian pool per datasource.
+    """
+    return {
+        "cache": datasource_cache.stats(),
+        "context_cache": context_cache.stats(),
+        "context_snapshots": context_store.stats() if context_store is not None else None,
+        "pools": datasource_pool_stats()
+    }
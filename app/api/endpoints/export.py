@@ -0,0 +1,88 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from typing import Optional, Iterator
+from app.services.db_services import stream_query
+import logging
+import json
+import csv
+import io
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class ExportRequest(BaseModel):
+    query: str = Field(..., description="Query SQL yang akan diekspor")
+    id_datasource: int = Field(..., description="ID unik datasource", example=123)
+    batch_size: Optional[int] = Field(None, description="Jumlah baris per batch cursor (opsional)", gt=0)
+
+def _open_stream(request: ExportRequest) -> Iterator[tuple[list[str], list]]:
+    """
+    Buka stream hasil query dan ambil batch pertama lebih dulu, sehingga error koneksi
+    atau query masih bisa dikembalikan sebagai HTTP 500 sebelum respons dimulai.
+    """
+    batches = stream_query(request.query, request.id_datasource, batch_size=request.batch_size)
+    first = next(batches)
+
+    def _chain():
+        try:
+            yield first
+            yield from batches
+        finally:
+            batches.close()
+
+    return _chain()
+
+@router.post("/ndjson")
+def export_ndjson(request: ExportRequest) -> StreamingResponse:
+    """
+    Ekspor hasil query sebagai NDJSON (satu objek JSON per baris) secara streaming.
+    """
+    try:
+        batches = _open_stream(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to start NDJSON export: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error exporting query: {str(e)}")
+
+    def generate():
+        for columns, rows in batches:
+            if rows:
+                yield "".join(
+                    json.dumps(jsonable_encoder(dict(zip(columns, row)))) + "\n" for row in rows
+                )
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/csv")
+def export_csv(request: ExportRequest) -> StreamingResponse:
+    """
+    Ekspor hasil query sebagai CSV secara streaming.
+    """
+    try:
+        batches = _open_stream(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to start CSV export: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error exporting query: {str(e)}")
+
+    def generate():
+        header_written = False
+        for columns, rows in batches:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            yield buffer.getvalue()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=export.csv"}
+    )
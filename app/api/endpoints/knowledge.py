@@ -1,20 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from app.services.embedding_service import get_embedding_model
+from app.core.logging_config import truncate
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-try:
-    model = SentenceTransformer('paraphrase-mpnet-base-v2')  # Dimensi 768
-    logger.info("Successfully loaded paraphrase-mpnet-base-v2 model")
-except Exception as e:
-    logger.error(f"Failed to load SentenceTransformer model: {e}")
-    raise
-
 class EmbeddingRequest(BaseModel):
     content: str
 
@@ -24,9 +17,8 @@ class EmbeddingResponse(BaseModel):
 @router.post("/embed", response_model=EmbeddingResponse)
 async def generate_embedding(request: EmbeddingRequest):
     try:
-        logger.info(f"Received request to generate embedding for content: {request.content[:100]}")
-        embedding = model.encode(request.content).tolist()
-        logger.info(f"Generated embedding with length: {len(embedding)}")
+        embedding = get_embedding_model().encode(request.content).tolist()
+        logger.debug("Generated embedding", extra={"content": truncate(request.content), "dimension": len(embedding)})
         if len(embedding) != 768:
             logger.error(f"Invalid embedding length: {len(embedding)}")
             raise HTTPException(status_code=500, detail="Generated embedding has incorrect length")
@@ -0,0 +1,98 @@
+from typing import List
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import metrics, MetricFamily
+from app.services.llm_services import analysis_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.db_services import datasource_cache, datasource_pool_stats, query_flight
+from app.services.nl2sql_service import context_flight, sql_flight, context_cache
+from app.core.tracing import trace_exporter
+from app.services.context_store import context_store
+from app.services.context_prefetcher import context_prefetcher
+
+router = APIRouter()
+
+def _cache_metrics() -> List[MetricFamily]:
+    stats = [analysis_cache.stats(), datasource_cache.stats(), context_cache.stats()]
+    return [
+        ("cache_hits_total", "counter", "Cache hit", [({"cache": s["name"]}, s["hits"]) for s in stats]),
+        ("cache_misses_total", "counter", "Cache miss", [({"cache": s["name"]}, s["misses"]) for s in stats]),
+        ("cache_evictions_total", "counter", "Entri cache yang dibuang karena batas ukuran", [({"cache": s["name"]}, s["evictions"]) for s in stats]),
+        ("cache_entries", "gauge", "Jumlah entri cache", [({"cache": s["name"]}, s["size"]) for s in stats]),
+        ("cache_hit_ratio", "gauge", "Rasio hit cache sejak start", [({"cache": s["name"]}, s["hit_rate"]) for s in stats]),
+    ]
+
+def _datasource_metrics() -> List[MetricFamily]:
+    pools = datasource_pool_stats()
+    def samples(field: str):
+        return [({"datasource": id_datasource}, s[field]) for id_datasource, s in pools.items()]
+    return [
+        ("datasource_queries_limit", "gauge", "Batas query bersamaan per datasource", samples("limit")),
+        ("datasource_queries_active", "gauge", "Query datasource yang sedang berjalan", samples("active")),
+        ("datasource_queries_waiting", "gauge", "Query yang menunggu slot datasource", samples("waiting")),
+        ("datasource_queries_rejected_total", "counter", "Query yang ditolak karena datasource sibuk", samples("rejected")),
+        ("datasource_pool_checked_out", "gauge", "Koneksi pool datasource yang sedang dipakai", samples("pool_checked_out")),
+    ]
+
+def _scheduler_metrics() -> List[MetricFamily]:
+    stats = llm_scheduler.stats()
+    return [
+        ("llm_scheduler_active", "gauge", "Slot LLM yang sedang dipakai", [({}, stats["active"])]),
+        ("llm_scheduler_max_concurrency", "gauge", "Batas slot LLM global", [({}, stats["max_concurrency"])]),
+        ("llm_scheduler_queue_depth", "gauge", "Panjang antrean LLM per prioritas",
+         [({"priority": priority}, depth) for priority, depth in stats["queue_depth_by_priority"].items()]),
+        ("llm_scheduler_granted_total", "counter", "Slot LLM yang diberikan", [({}, stats["granted"])]),
+        ("llm_scheduler_timeouts_total", "counter", "Request yang gagal mendapat slot LLM", [({}, stats["timeouts"])]),
+        ("llm_scheduler_tracked_tenants", "gauge", "Tenant dengan state fair queuing di memori", [({}, stats["tracked_tenants"])]),
+    ]
+
+def _singleflight_metrics() -> List[MetricFamily]:
+    stats = [flight.stats() for flight in (context_flight, sql_flight, query_flight)]
+    return [
+        ("singleflight_leaders_total", "counter", "Pekerjaan yang benar-benar dijalankan", [({"flight": s["name"]}, s["leaders"]) for s in stats]),
+        ("singleflight_followers_total", "counter", "Pemanggil yang menumpang pekerjaan identik", [({"flight": s["name"]}, s["followers"]) for s in stats]),
+        ("singleflight_inflight", "gauge", "Pekerjaan yang sedang berjalan", [({"flight": s["name"]}, s["inflight"]) for s in stats]),
+    ]
+
+def _trace_metrics() -> List[MetricFamily]:
+    stats = trace_exporter.stats()
+    return [
+        ("trace_spans_queued", "gauge", "Span yang menunggu dikirim ke LangSmith", [({}, stats["queued"])]),
+        ("trace_spans_exported_total", "counter", "Span yang berhasil dikirim", [({}, stats["exported"])]),
+        ("trace_spans_dropped_total", "counter", "Span yang dibuang karena antrean penuh", [({}, stats["dropped"])]),
+        ("trace_spans_failed_total", "counter", "Span yang gagal dikirim", [({}, stats["failed"])]),
+    ]
+
+def _context_snapshot_metrics() -> List[MetricFamily]:
+    if context_store is None:
+        return []
+    stats = context_store.stats()
+    return [
+        ("context_snapshot_reads_total", "counter", "Pembacaan snapshot konteks dari disk", [({}, stats["reads"])]),
+        ("context_snapshot_hits_total", "counter", "Pembacaan snapshot yang menemukan konteks", [({}, stats["hits"])]),
+        ("context_snapshot_writes_total", "counter", "Snapshot konteks yang ditulis", [({}, stats["writes"])]),
+        ("context_snapshot_errors_total", "counter", "Operasi snapshot yang gagal", [({}, stats["errors"])]),
+    ]
+
+def _prefetch_metrics() -> List[MetricFamily]:
+    stats = context_prefetcher.stats()
+    return [
+        ("context_prefetch_tracked", "gauge", "Konteks datasource aktif yang dijaga tetap hangat", [({}, stats["tracked"])]),
+        ("context_prefetch_refreshed_total", "counter", "Konteks yang disegarkan prefetcher", [({}, stats["refreshed"])]),
+        ("context_prefetch_failed_total", "counter", "Prefetch konteks yang gagal", [({}, stats["failed"])]),
+        ("context_prefetch_last_cycle_seconds", "gauge", "Durasi siklus prefetch terakhir", [({}, stats["last_cycle_seconds"])]),
+    ]
+
+for _collector in (
+    _cache_metrics, _datasource_metrics, _scheduler_metrics, _singleflight_metrics,
+    _trace_metrics, _context_snapshot_metrics, _prefetch_metrics
+):
+    metrics.register_collector(_collector)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Metrik format teks Prometheus: durasi per tahap, latensi HTTP dan LLM, token,
+    cache, pool datasource, antrean LLM dan single-flight.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,24 +1,44 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.schemas import NL2SQLRequest, NL2SQLResponse
-from app.services.nl2sql_service import NL2SQLService
-from app.services.db_services import execute_query
-from app.services.llm_services import analyze_data_with_llm
-from app.core.langsmith import langsmith_client
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from app.schemas import NL2SQLRequest, NL2SQLResponse, NL2SQLBatchRequest, NL2SQLBatchItem, NL2SQLBatchResponse
+from app.services.nl2sql_service import get_nl2sql_service
+from app.services.conversation_service import ConversationSession
+from app.services.db_services import fetch_preview_coalesced
+from app.services.query_result import QueryResult
+from app.services.chart_service import recommend_chart_type, classify_chart
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_services import analyze_data_with_llm, stream_analysis_with_llm
+from app.services.embedding_service import get_embedding_model
+from app.core.tracing import trace_exporter
+from app.utils.cancellation import cancel_on_disconnect, stream_until_disconnect
+from app.utils.deadline import Deadline
+from app.utils.embedding_utils import to_pgvector_literal
+from app.core.config import settings
+from app.core.logging_config import truncate
 from app.db.database import get_db_connection
-from sentence_transformers import SentenceTransformer
-from typing import Optional
+from typing import Optional, List
+import contextvars
 import logging
+import asyncio
 import json
 from sqlalchemy import text
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-nl2sql_service = NL2SQLService()
-model = SentenceTransformer('paraphrase-mpnet-base-v2')  # Dimensi 768
 
 async def retrieve_knowledge(prompt: str, id_datasource: int, user_id: Optional[int] = None, limit: int = 5):
+    """
+    Versi async dari pencarian knowledge: embedding dan query pgvector dijalankan di
+    thread pool agar tidak memblokir event loop dan bisa dibatasi waktunya.
+    """
+    # copy_context agar log di thread pool tetap membawa request_id
+    return await asyncio.get_event_loop().run_in_executor(
+        None, contextvars.copy_context().run, _retrieve_knowledge_sync, prompt, id_datasource, user_id, limit
+    )
+
+def _retrieve_knowledge_sync(prompt: str, id_datasource: int, user_id: Optional[int] = None, limit: int = 5):
     """
     Retrieve knowledge relevan dari tabel knowledge_base menggunakan vector similarity.
     
@@ -32,15 +52,13 @@ async def retrieve_knowledge(prompt: str, id_datasource: int, user_id: Optional[
         List[Dict]: Daftar term dan content yang relevan.
     """
     try:
-        logger.info(f"Retrieving knowledge for prompt: {prompt[:50]}... with id_datasource: {id_datasource}, user_id: {user_id}, limit: {limit}")
+        logger.debug("Retrieving knowledge", extra={"prompt": truncate(prompt), "id_datasource": id_datasource, "user_id": user_id, "limit": limit})
         
         # Generate embedding
-        embedding = model.encode(prompt).tolist()
-        logger.info(f"Generated embedding with dimension: {len(embedding)}")
+        embedding = get_embedding_model().encode(prompt).tolist()
         
         # Koneksi ke database toolsBI (bukan ke datasource eksternal)
         conn = get_db_connection()
-        logger.info("Connected to toolsBI database successfully")
         
         # Cek apakah tabel knowledge_base ada
         table_check = conn.execute(text("SELECT to_regclass('public.knowledge_base')")).scalar()
@@ -51,8 +69,7 @@ async def retrieve_knowledge(prompt: str, id_datasource: int, user_id: Optional[
         
         # Query untuk mendapatkan knowledge yang relevan
         # Format embedding sebagai string '[0.1,0.2,...]' untuk pgvector
-        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-        logger.info(f"Executing knowledge retrieval query for id_datasource: {id_datasource}, user_id: {user_id}")
+        embedding_str = to_pgvector_literal(embedding)
         
         # Build query dengan kondisi dinamis
         where_conditions = ["id_datasource = :id_datasource"]
@@ -77,155 +94,480 @@ async def retrieve_knowledge(prompt: str, id_datasource: int, user_id: Optional[
             LIMIT :limit;
         """)
         
-        logger.info(f"Final query: {query}")
-        logger.info(f"Query parameters: {query_params}")
-        
         results = conn.execute(query, query_params).fetchall()
         conn.close()
         
         knowledge_list = [{"term": row.term, "content": row.content, "user_id": row.id_user} for row in results]
-        logger.info(f"Retrieved {len(knowledge_list)} knowledge entries from user_id: {user_id if user_id else 'all users'}")
-        
-        # Log detail hasil untuk debugging
-        for i, knowledge in enumerate(knowledge_list):
-            logger.info(f"Knowledge {i+1}: term='{knowledge['term']}', user_id={knowledge['user_id']}")
+        logger.info("Knowledge retrieved", extra={"id_datasource": id_datasource, "user_id": user_id, "count": len(knowledge_list)})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Knowledge terms", extra={"terms": [knowledge["term"] for knowledge in knowledge_list]})
         
         return knowledge_list
         
     except Exception as e:
-        logger.error(f"Error retrieving knowledge: {str(e)}")
-        logger.error(f"Error type: {type(e).__name__}")
+        logger.error("Error retrieving knowledge (%s): %s", type(e).__name__, e)
         return []
 
-@router.post("/convert", response_model=NL2SQLResponse)
-async def convert_nl_to_sql(request: NL2SQLRequest) -> NL2SQLResponse:
-    run = None
+async def retrieve_knowledge_batch(prompts: List[str], id_datasource: int, user_id: Optional[int] = None, limit: int = 5) -> List[List[dict]]:
+    """
+    Retrieve knowledge untuk banyak prompt sekaligus: embedding dihitung dalam satu
+    batch encode dan semua pencarian memakai satu koneksi database.
+    
+    Returns:
+        List[List[Dict]]: Knowledge per prompt, urutannya sama dengan prompts.
+    """
+    return await asyncio.get_event_loop().run_in_executor(
+        None, contextvars.copy_context().run, _retrieve_knowledge_batch_sync, prompts, id_datasource, user_id, limit
+    )
+
+def _retrieve_knowledge_batch_sync(prompts: List[str], id_datasource: int, user_id: Optional[int] = None, limit: int = 5) -> List[List[dict]]:
     try:
+        embeddings = get_embedding_model().encode(prompts)
+        conn = get_db_connection()
         try:
-            run = langsmith_client.create_run(
-                name="nl2sql_conversion",
-                inputs={"prompt": request.prompt, "id_datasource": request.id_datasource, "table_names": request.table_names},
-                run_type="chain"
-            )
-            if run is None:
-                logger.warning("Gagal membuat LangSmith run, melanjutkan tanpa tracing.")
-                run = None
-        except Exception as e:
-            logger.warning(f"Gagal menghubungkan ke LangSmith: {str(e)}, melanjutkan tanpa tracing.")
-            run = None
+            if conn.execute(text("SELECT to_regclass('public.knowledge_base')")).scalar() is None:
+                logger.error("Tabel knowledge_base tidak ditemukan di database!")
+                return [[] for _ in prompts]
+
+            where_conditions = ["id_datasource = :id_datasource"]
+            base_params = {"id_datasource": id_datasource, "limit": limit}
+            if user_id is not None:
+                where_conditions.append("id_user = :user_id")
+                base_params["user_id"] = user_id
+            query = text(f"""
+                SELECT term, content, id_user
+                FROM knowledge_base 
+                WHERE {" AND ".join(where_conditions)}
+                ORDER BY embedding <-> :embedding_vector
+                LIMIT :limit;
+            """)
+
+            knowledge_per_prompt = []
+            for embedding in embeddings:
+                results = conn.execute(query, {**base_params, "embedding_vector": to_pgvector_literal(embedding)}).fetchall()
+                knowledge_per_prompt.append([{"term": row.term, "content": row.content, "user_id": row.id_user} for row in results])
+        finally:
+            conn.close()
+
+        logger.info("Knowledge retrieved in batch", extra={"id_datasource": id_datasource, "prompts": len(prompts)})
+        return knowledge_per_prompt
+
+    except Exception as e:
+        logger.error("Error retrieving knowledge batch: %s", e)
+        return [[] for _ in prompts]
+
+def enrich_prompt(prompt: str, knowledge: List[dict]) -> str:
+    """Gabungkan prompt pengguna dengan konteks bisnis dari knowledge base."""
+    return prompt + "\n\nKonteks Bisnis:\n" + "\n".join(
+        [f"- {k['term']}: {k['content']}" for k in knowledge]
+    )
+
+async def execute_and_analyze(
+    sql_query: str,
+    id_datasource: int,
+    prompt: str,
+    user_id: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> tuple[Optional[str], dict]:
+    """
+    Eksekusi query yang dihasilkan lalu buat analisis dan rekomendasi diagram.
+    Hanya preview terbatas (QUERY_PREVIEW_ROWS baris) yang diambil untuk analisis;
+    hasil lengkap tersedia melalui endpoint /export.
+
+    Setiap tahap dibatasi budget deadline: eksekusi atau analysis yang kehabisan waktu
+    dilewati (analysis None), rekomendasi diagram jatuh ke klasifikasi berbasis aturan.
+    
+    Returns:
+        tuple[Optional[str], dict]: (teks analisis, rekomendasi diagram)
+    """
+    deadline = deadline or Deadline.from_header(None)
+    data = QueryResult.empty()
+    analysis = None
+    try:
+        data = await deadline.run("execute", fetch_preview_coalesced(sql_query, id_datasource), fallback=None)
+        if data is None:
+            data = QueryResult.empty()
+        elif data:
+            analysis = await deadline.run("analysis", analyze_data_with_llm(data, user_id), fallback=None)
+        else:
+            analysis = "Tidak ada data yang tersedia untuk dianalisis."
+    except Exception as e:
+        logger.error("Error executing query: %s", e, extra={"sql": truncate(sql_query)})
+        analysis = f"Error: Query gagal dieksekusi. Periksa query: {sql_query}. Error: {str(e)}"
+
+    recommendation = await deadline.run("chart", recommend_chart_type(sql_query, data, prompt, user_id), fallback=None)
+    if recommendation is None:
+        recommendation, _ = classify_chart(data)
+    return analysis, recommendation
 
+@router.post("/convert", response_model=NL2SQLResponse)
+async def convert_nl_to_sql(
+    request: NL2SQLRequest,
+    http_request: Request,
+    x_request_deadline: Optional[str] = Header(None)
+) -> NL2SQLResponse:
+    """
+    Konversi prompt menjadi SQL, eksekusi, analisis dan rekomendasi diagram.
+    Seluruh pipeline dibatalkan jika klien memutus koneksi sebelum selesai.
+
+    Header X-Request-Deadline (detik) membatasi total waktu request; tahap opsional
+    yang tidak muat dalam sisa waktu dilewati dan dilaporkan di skipped_stages.
+    """
+    deadline = Deadline.from_header(x_request_deadline)
+    return await cancel_on_disconnect(http_request, _convert_nl_to_sql(request, deadline))
+
+async def _convert_nl_to_sql(request: NL2SQLRequest, deadline: Deadline) -> NL2SQLResponse:
+    # Span diekspor di latar belakang; NOOP_SPAN jika tracing nonaktif
+    span = trace_exporter.start_span(
+        "nl2sql_conversion",
+        inputs={"prompt": request.prompt, "id_datasource": request.id_datasource, "table_names": request.table_names}
+    )
+    try:
         # Retrieve knowledge relevan untuk memperkaya prompt
-        knowledge = await retrieve_knowledge(
+        knowledge = await deadline.run("knowledge", retrieve_knowledge(
             prompt=request.prompt, 
             id_datasource=request.id_datasource,
             user_id=request.user_id,
             limit=5
-        )
-        enriched_prompt = request.prompt + "\n\nKonteks Bisnis:\n" + "\n".join(
-            [f"- {k['term']}: {k['content']}" for k in knowledge]
-        )
-        logger.info(f"Enriched Prompt: {enriched_prompt}")
-        logger.info(f"Retrieved {len(knowledge)} knowledge entries for user_id: {request.user_id}")
+        ), fallback=[])
+        enriched_prompt = enrich_prompt(request.prompt, knowledge)
+        logger.debug("Enriched prompt", extra={"prompt": truncate(enriched_prompt)})
 
-        # Generate SQL query
-        sql_query, confidence_score = await nl2sql_service.generate_sql(
+        # Generate SQL query (tahap wajib: 504 jika melewati budget)
+        sql_query, confidence_score = await deadline.run("generate", get_nl2sql_service().generate_sql(
             prompt=enriched_prompt,
             id_datasource=request.id_datasource,
             table_names=request.table_names,
-            session_id=request.session_id
-        )
-        
-        if run is not None:
-            run.update(
-                outputs={"sql_query": sql_query, "confidence_score": confidence_score}
-            )
+            session_id=request.session_id,
+            user_id=request.user_id
+        ))
 
-        try:
-            data = execute_query(sql_query, request.id_datasource)
-            analysis = analyze_data_with_llm(data) if data else "Tidak ada data yang tersedia untuk dianalisis."
-        except Exception as e:
-            logger.error(f"Error executing query {sql_query}: {str(e)}")
-            analysis = f"Error: Query gagal dieksekusi. Periksa query: {sql_query}. Error: {str(e)}"
-
-        recommendation = await recommend_chart_type(sql_query, data, enriched_prompt)
+        analysis, recommendation = await execute_and_analyze(
+            sql_query, request.id_datasource, enriched_prompt, request.user_id, deadline
+        )
+        if deadline.skipped_stages:
+            logger.info("Request deadline skipped stages", extra={"skipped_stages": deadline.skipped_stages})
 
-        return NL2SQLResponse(
+        response = NL2SQLResponse(
             sql_query=sql_query,
             confidence_score=confidence_score,
             explanation=f"Query dibuat dengan confidence score {confidence_score:.2f}",
             analysis=analysis,
-            chart_recommendation=recommendation
+            chart_recommendation=recommendation,
+            skipped_stages=deadline.skipped_stages
         )
+        span.end(outputs={
+            "sql_query": sql_query,
+            "confidence_score": confidence_score,
+            "skipped_stages": deadline.skipped_stages
+        })
+        return response
         
+    except HTTPException as e:
+        span.end(error=str(e.detail))
+        raise
+    except asyncio.CancelledError:
+        span.end(error="Request dibatalkan klien")
+        raise
     except Exception as e:
-        logger.error(f"Error generating SQL query or analysis: {str(e)}")
-        if run is not None:
-            run.update(error=str(e))
+        logger.error("Error generating SQL query or analysis: %s", e)
+        span.end(error=str(e))
         raise HTTPException(status_code=500, detail=f"Error generating SQL query or analysis: {str(e)}")
 
+@router.post("/convert/batch", response_model=NL2SQLBatchResponse)
+async def convert_batch(
+    request: NL2SQLBatchRequest,
+    http_request: Request,
+    x_request_deadline: Optional[str] = Header(None)
+) -> NL2SQLBatchResponse:
+    """
+    Konversi banyak prompt untuk satu datasource sekaligus (misal semua widget dashboard).
 
-async def recommend_chart_type(sql_query: str, data: list, prompt: str) -> dict:
+    Konteks skema/sampel dibangun sekali dan knowledge diambil dalam satu batch, lalu
+    SQL untuk semua prompt dihasilkan secara konkuren (dibatasi LLM scheduler) dan
+    dieksekusi dengan paralelisme terbatas (NL2SQL_BATCH_MAX_PARALLEL_EXECUTIONS).
+    Kegagalan satu prompt tidak menggagalkan prompt lain.
     """
-    Rekomendasikan tipe diagram berdasarkan prompt dan struktur data.
-    Menggunakan LLM untuk analisis.
+    if len(request.prompts) > settings.NL2SQL_BATCH_MAX_PROMPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksimal {settings.NL2SQL_BATCH_MAX_PROMPTS} prompt per batch, diterima {len(request.prompts)}."
+        )
+    deadline = Deadline.from_header(x_request_deadline)
+    return await cancel_on_disconnect(http_request, _convert_batch(request, deadline))
+
+async def _convert_batch(request: NL2SQLBatchRequest, deadline: Deadline) -> NL2SQLBatchResponse:
+    try:
+        context = await deadline.run("context", get_nl2sql_service().get_context(request.id_datasource, request.table_names))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building context for batch on datasource %s: %s", request.id_datasource, e)
+        raise HTTPException(status_code=500, detail=f"Error building datasource context: {str(e)}")
+
+    knowledge_per_prompt = await deadline.run(
+        "knowledge",
+        retrieve_knowledge_batch(request.prompts, request.id_datasource, request.user_id, limit=5),
+        fallback=None
+    )
+    skipped_knowledge = knowledge_per_prompt is None
+    if skipped_knowledge:
+        knowledge_per_prompt = [[] for _ in request.prompts]
+
+    execution_slots = asyncio.Semaphore(settings.NL2SQL_BATCH_MAX_PARALLEL_EXECUTIONS)
+
+    async def _convert_one(prompt: str, knowledge: List[dict]) -> NL2SQLBatchItem:
+        # Setiap prompt mendapat deadline sendiri dengan sisa waktu batch agar skipped_stages terpisah
+        item_deadline = Deadline(deadline.remaining())
+        if skipped_knowledge:
+            item_deadline.skipped_stages.append("knowledge")
+        try:
+            enriched_prompt = enrich_prompt(prompt, knowledge)
+            sql_query, confidence_score = await item_deadline.run(
+                "generate",
+                get_nl2sql_service().generate_sql_from_context(enriched_prompt, context, user_id=request.user_id)
+            )
+            async with execution_slots:
+                analysis, recommendation = await execute_and_analyze(
+                    sql_query, request.id_datasource, enriched_prompt, request.user_id, item_deadline
+                )
+            return NL2SQLBatchItem(
+                prompt=prompt,
+                status="success",
+                result=NL2SQLResponse(
+                    sql_query=sql_query,
+                    confidence_score=confidence_score,
+                    explanation=f"Query dibuat dengan confidence score {confidence_score:.2f}",
+                    analysis=analysis,
+                    chart_recommendation=recommendation,
+                    skipped_stages=item_deadline.skipped_stages
+                )
+            )
+        except HTTPException as e:
+            return NL2SQLBatchItem(prompt=prompt, status="error", detail=str(e.detail))
+        except Exception as e:
+            logger.error("Error converting batch prompt '%s': %s", prompt[:50], e)
+            return NL2SQLBatchItem(prompt=prompt, status="error", detail=f"Error generating SQL query or analysis: {str(e)}")
+
+    results = await asyncio.gather(*(
+        _convert_one(prompt, knowledge) for prompt, knowledge in zip(request.prompts, knowledge_per_prompt)
+    ))
+    return NL2SQLBatchResponse(results=list(results))
+
+
+def _sse_event(event: str, data) -> str:
+    """Format satu event Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.post("/convert/stream")
+async def convert_nl_to_sql_stream(
+    request: NL2SQLRequest,
+    http_request: Request,
+    x_request_deadline: Optional[str] = Header(None)
+) -> StreamingResponse:
     """
-    from langchain_google_genai import GoogleGenerativeAI
-    from langchain.prompts import PromptTemplate
-    from app.core.config import settings
+    Varian streaming dari /convert menggunakan Server-Sent Events.
+    
+    Urutan event: `sql` (segera setelah SQL dihasilkan), `data` (baris hasil query),
+    `analysis` (potongan token analisis dari Gemini), `chart` (rekomendasi diagram)
+    lalu `done` (berisi skipped_stages). Kegagalan pada tahap mana pun dikirim sebagai
+    event `error` dengan field `stage` (generation, execution atau analysis). Seperti /convert, pipeline dibatalkan jika klien memutus koneksi dan
+    dibatasi header X-Request-Deadline.
+    """
+    deadline = Deadline.from_header(x_request_deadline)
+    return StreamingResponse(
+        stream_until_disconnect(http_request, _convert_stream_events(request, deadline)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    llm = GoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        google_api_key=settings.GOOGLE_API_KEY,
-        temperature=0.1
+async def _convert_stream_events(request: NL2SQLRequest, deadline: Deadline):
+    span = trace_exporter.start_span(
+        "nl2sql_conversion_stream",
+        inputs={"prompt": request.prompt, "id_datasource": request.id_datasource, "table_names": request.table_names}
     )
+    try:
+        knowledge = await deadline.run("knowledge", retrieve_knowledge(
+            prompt=request.prompt,
+            id_datasource=request.id_datasource,
+            user_id=request.user_id,
+            limit=5
+        ), fallback=[])
+        enriched_prompt = enrich_prompt(request.prompt, knowledge)
+
+        sql_query, confidence_score = await deadline.run("generate", get_nl2sql_service().generate_sql(
+            prompt=enriched_prompt,
+            id_datasource=request.id_datasource,
+            table_names=request.table_names,
+            session_id=request.session_id,
+            user_id=request.user_id
+        ))
+        yield _sse_event("sql", {
+            "sql_query": sql_query,
+            "confidence_score": confidence_score,
+            "explanation": f"Query dibuat dengan confidence score {confidence_score:.2f}"
+        })
+
+        data = QueryResult.empty()
+        executed = False
+        try:
+            result = await deadline.run("execute", fetch_preview_coalesced(sql_query, request.id_datasource), fallback=None)
+            if result is not None:
+                data, executed = result, True
+        except Exception as e:
+            logger.error("Error executing query: %s", e, extra={"sql": truncate(sql_query)})
+            yield _sse_event("error", {
+                "stage": "execution",
+                "detail": f"Error: Query gagal dieksekusi. Periksa query: {sql_query}. Error: {str(e)}"
+            })
 
-    # Analisis struktur data
-    if not data:
-        return {"recommended_type": "table", "reason": "Tidak ada data untuk divisualisasikan."}
+        if executed:
+            yield _sse_event("data", data.to_columnar())
+            # Kegagalan analisis (LLM error, scheduler penuh) tidak berarti query-nya salah
+            try:
+                if data:
+                    async for chunk in deadline.iterate("analysis", stream_analysis_with_llm(data, request.user_id)):
+                        yield _sse_event("analysis", {"delta": chunk})
+                else:
+                    yield _sse_event("analysis", {"delta": "Tidak ada data yang tersedia untuk dianalisis."})
+            except HTTPException as e:
+                yield _sse_event("error", {"stage": "analysis", "detail": e.detail})
+            except Exception as e:
+                logger.error("Error streaming analysis: %s", e)
+                yield _sse_event("error", {"stage": "analysis", "detail": f"Error generating analysis: {str(e)}"})
+
+        recommendation = await deadline.run("chart", recommend_chart_type(sql_query, data, enriched_prompt, request.user_id), fallback=None)
+        if recommendation is None:
+            recommendation, _ = classify_chart(data)
+        yield _sse_event("chart", recommendation)
+        yield _sse_event("done", {"skipped_stages": deadline.skipped_stages})
+        span.end(outputs={
+            "sql_query": sql_query,
+            "confidence_score": confidence_score,
+            "skipped_stages": deadline.skipped_stages
+        })
+
+    except asyncio.CancelledError:
+        span.end(error="Request dibatalkan klien")
+        raise
+    except HTTPException as e:
+        span.end(error=str(e.detail))
+        yield _sse_event("error", {"stage": "generation", "detail": e.detail})
+    except Exception as e:
+        logger.error("Error generating SQL query or analysis: %s", e)
+        span.end(error=str(e))
+        yield _sse_event("error", {"stage": "generation", "detail": f"Error generating SQL query or analysis: {str(e)}"})
+
+@router.get("/scheduler/stats")
+async def llm_scheduler_stats():
+    """
+    Metrik antrean LLM (slot aktif, kedalaman antrean per prioritas, rata-rata tunggu).
+    """
+    return llm_scheduler.stats()
+
+@router.websocket("/ws")
+async def conversation_websocket(
+    websocket: WebSocket,
+    id_datasource: int,
+    session_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    table_names: Optional[str] = None
+):
+    """
+    Mode percakapan via WebSocket.
     
-    columns = list(data[0].keys()) if data else []
-    num_columns = len(columns)
-    has_numeric = any(isinstance(row.get(columns[1], 0), (int, float)) for row in data[:5]) if num_columns >= 2 else False
-    has_time = any("date" in col.lower() or "month" in col.lower() or "year" in col.lower() for col in columns)
-    is_single_category = num_columns == 1
-
-    # Prompt untuk LLM
-    prompt_template = PromptTemplate(
-        input_variables=["prompt", "sql_query", "data_structure", "num_columns", "has_numeric", "has_time", "is_single_category"],
-        template="""Berdasarkan prompt pengguna: "{prompt}"
-SQL query: {sql_query}
-Struktur data: {num_columns} kolom, dengan kolom: {data_structure}
-Apakah ada kolom numerik: {has_numeric}
-Apakah ada kolom waktu (date/month/year): {has_time}
-Apakah satu kolom kategorikal: {is_single_category}
-
-Rekomendasikan tipe diagram yang paling cocok (bar, line, pie, table) dan berikan alasan singkat dalam bahasa Indonesia. Format output: {{"recommended_type": "bar", "reason": "Alasan singkat"}}"""
+    Konteks datasource dan riwayat terakhir dibangun sekali saat koneksi dibuka dan
+    disimpan di memori selama koneksi hidup. Setiap pesan klien berbentuk
+    {"prompt": "..."} dan dibalas dengan payload yang sama seperti /convert. Pesan yang
+    tidak valid dibalas {"status": "error"} tanpa menutup sesi.
+    table_names dikirim sebagai query parameter dipisah koma (opsional).
+    """
+    await websocket.accept()
+    session = ConversationSession(
+        get_nl2sql_service(),
+        id_datasource=id_datasource,
+        table_names=[t.strip() for t in table_names.split(",") if t.strip()] if table_names else None,
+        session_id=session_id,
+        user_id=user_id
     )
+    async def _answer(prompt: str) -> dict:
+        deadline = Deadline.from_header(None)
+        knowledge = await deadline.run("knowledge", retrieve_knowledge(
+            prompt=prompt,
+            id_datasource=id_datasource,
+            user_id=user_id,
+            limit=5
+        ), fallback=[])
+        enriched_prompt = enrich_prompt(prompt, knowledge)
+        sql_query, confidence_score = await deadline.run("generate", session.generate_sql(enriched_prompt))
+        analysis, recommendation = await execute_and_analyze(sql_query, id_datasource, enriched_prompt, user_id, deadline)
+
+        response = NL2SQLResponse(
+            sql_query=sql_query,
+            confidence_score=confidence_score,
+            explanation=f"Query dibuat dengan confidence score {confidence_score:.2f}",
+            analysis=analysis,
+            chart_recommendation=recommendation,
+            skipped_stages=deadline.skipped_stages
+        )
+        return {"status": "success", "session_id": session.session_id, **response.model_dump()}
+
+    # Pesan klien dibaca di task terpisah agar putusnya koneksi langsung terdeteksi
+    # dan giliran yang sedang diproses (LLM maupun query datasource) bisa dibatalkan.
+    incoming: asyncio.Queue = asyncio.Queue()
 
-    chain = prompt_template | llm
-    result = chain.invoke({
-        "prompt": prompt,
-        "sql_query": sql_query,
-        "data_structure": ", ".join(columns),
-        "num_columns": num_columns,
-        "has_numeric": has_numeric,
-        "has_time": has_time,
-        "is_single_category": is_single_category
-    })
-
-    # Parse hasil LLM (asumsikan format JSON sederhana)
+    async def _reader():
+        # Frame mentah dibaca di sini; hanya disconnect yang mengakhiri sesi, frame yang
+        # bukan JSON valid ditolak per pesan di loop utama
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            await incoming.put(frame.get("text"))
+
+    reader = asyncio.ensure_future(_reader())
+    current = None
     try:
-        recommendation = json.loads(result.strip())
-        return recommendation
-    except:
-        # Fallback berdasarkan aturan sederhana
-        if is_single_category:
-            return {"recommended_type": "pie", "reason": "Data kategorikal tunggal, cocok untuk distribusi pie chart."}
-        elif has_time and has_numeric:
-            return {"recommended_type": "line", "reason": "Data memiliki kolom waktu dan numerik, cocok untuk tren line chart."}
-        elif num_columns >= 2 and has_numeric:
-            return {"recommended_type": "bar", "reason": "Data agregasi dengan kolom kategorikal dan numerik, cocok untuk bar chart."}
-        else:
-            return {"recommended_type": "table", "reason": "Data kompleks, tampilkan sebagai tabel."}
-        
-        
\ No newline at end of file
+        await session.open()
+        await websocket.send_json({"status": "ready", "session_id": session.session_id})
+
+        while True:
+            next_message = asyncio.ensure_future(incoming.get())
+            await asyncio.wait({next_message, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_message.done():
+                next_message.cancel()
+                reader.result()
+            try:
+                message = json.loads(next_message.result() or "")
+            except ValueError:
+                await websocket.send_json({"status": "error", "detail": "Pesan harus berupa JSON, misal {\"prompt\": \"...\"}"})
+                continue
+
+            prompt = message.get("prompt") if isinstance(message, dict) else None
+            if not isinstance(prompt, str) or not prompt.strip():
+                await websocket.send_json({"status": "error", "detail": "Field 'prompt' wajib diisi"})
+                continue
+
+            current = asyncio.ensure_future(_answer(prompt))
+            await asyncio.wait({current, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if not current.done():
+                current.cancel()
+                logger.info("Cancelled in-flight turn for session %s", session.session_id)
+                reader.result()
+
+            try:
+                await websocket.send_json(current.result())
+            except Exception as e:
+                logger.error("Error in conversation session %s: %s", session.session_id, e)
+                await websocket.send_json({"status": "error", "detail": f"Error generating SQL query or analysis: {str(e)}"})
+
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected for session %s", session.session_id)
+    except Exception as e:
+        logger.error("Conversation session %s failed: %s", session.session_id, e)
+        await websocket.close(code=1011)
+    finally:
+        reader.cancel()
+        if current is not None and not current.done():
+            current.cancel()
+        await session.close()
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from .endpoints import nl2sql, analyze, chat, knowledge
+from .endpoints import nl2sql, analyze, chat, knowledge, export, datasource, admin
 
 api_router = APIRouter()
 
 api_router.include_router(nl2sql.router, prefix="/nl2sql", tags=["NL2SQL"])
 api_router.include_router(analyze.router, prefix="/analyze", tags=["Analyze"])
 api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
-api_router.include_router(knowledge.router, prefix="/knowledge", tags=["Knowledge"])
\ No newline at end of file
+api_router.include_router(knowledge.router, prefix="/knowledge", tags=["Knowledge"])
+api_router.include_router(export.router, prefix="/export", tags=["Export"])
+api_router.include_router(datasource.router, prefix="/datasource", tags=["Datasource"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 
 class Settings(BaseSettings):
     # App Settings
@@ -31,6 +31,127 @@ class Settings(BaseSettings):
     LANGCHAIN_PROJECT: Optional[str] = None
     LANGSMITH_ENDPOINT: Optional[str] = None
 
+    # LLM Scheduler Settings (rate 0 = tanpa batas)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_PER_USER_CONCURRENCY: int = 4
+    LLM_RATE_PER_SECOND: float = 0
+    LLM_PER_USER_RATE_PER_SECOND: float = 0
+    # Request tanpa user_id berbagi satu tenant "anonymous" dengan batas sendiri
+    LLM_ANONYMOUS_CONCURRENCY: int = 4
+    LLM_ANONYMOUS_RATE_PER_SECOND: float = 0
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30
+
+    # WebSocket Conversation Settings
+    WS_HISTORY_LIMIT: int = 20
+
+    # Datasource Execution Settings
+    DATASOURCE_MAX_CONCURRENT_QUERIES: int = 4
+    DATASOURCE_QUEUE_TIMEOUT_SECONDS: float = 10
+    DATASOURCE_STATEMENT_TIMEOUT_MS: int = 30000
+    DATASOURCE_LOCK_TIMEOUT_MS: int = 5000
+
+    # Datasource Metadata Cache Settings
+    DATASOURCE_CACHE_TTL_SECONDS: int = 60
+    DATASOURCE_NEGATIVE_CACHE_TTL_SECONDS: int = 10
+    DATASOURCE_CACHE_MAX_ENTRIES: int = 1024
+    # Invalidasi datasource diteruskan ke semua worker di host yang sama lewat versi
+    # datasource di CACHE_SQLITE_PATH yang diperiksa sebelum engine/cache lokal dipakai
+    DATASOURCE_SHARED_INVALIDATION: bool = True
+    DATASOURCE_VERSION_TTL_SECONDS: int = 604800
+
+    # Query Cost Guard Settings (EXPLAIN sebelum eksekusi)
+    QUERY_GUARD_ENABLED: bool = True
+    QUERY_GUARD_MAX_COST: float = 10000000
+    QUERY_GUARD_MAX_ROWS: int = 1000000
+    QUERY_GUARD_ROW_LIMIT: int = 1000
+    # Batas estimasi baris untuk ekspor streaming (tanpa LIMIT); memori tetap sebesar satu batch
+    QUERY_GUARD_EXPORT_MAX_ROWS: int = 50000000
+    # Override per datasource, misal {"12": {"max_cost": 500000, "row_limit": 200, "export_max_rows": 1000000}}
+    QUERY_GUARD_DATASOURCE_LIMITS: Dict[int, Dict[str, float]] = {}
+
+    # Query Streaming Settings
+    QUERY_STREAM_BATCH_SIZE: int = 1000
+    QUERY_PREVIEW_ROWS: int = 500
+
+    # Analysis Settings
+    ANALYSIS_SAMPLE_ROWS: int = 10
+    PROFILE_TOP_K: int = 5
+    ANALYSIS_CACHE_TTL_SECONDS: int = 900
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 1024
+
+    # Chart Recommendation Settings
+    CHART_RULE_CONFIDENCE_THRESHOLD: float = 0.75
+
+    # Batch NL2SQL Settings (dashboard multi-widget)
+    NL2SQL_BATCH_MAX_PROMPTS: int = 20
+    NL2SQL_BATCH_MAX_PARALLEL_EXECUTIONS: int = 4
+
+    # Request Deadline Settings (header X-Request-Deadline dalam detik)
+    REQUEST_DEADLINE_SECONDS: float = 60
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120
+    REQUEST_STAGE_BUDGETS: Dict[str, float] = {
+        "knowledge": 2,
+        "generate": 25,
+        "execute": 15,
+        "analysis": 15,
+        "chart": 8
+    }
+
+    # Admin & Profiling Settings (endpoint admin nonaktif jika ADMIN_API_TOKEN kosong)
+    ADMIN_API_TOKEN: Optional[str] = None
+    PROFILE_MAX_SECONDS: float = 60
+    PROFILE_SAMPLE_INTERVAL_MS: float = 10
+    PROFILE_REQUEST_RESULTS_MAX: int = 32
+    PROFILE_REQUEST_RESULTS_TTL_SECONDS: int = 600
+
+    # Tracing Settings (LangSmith, dikirim per batch di latar belakang)
+    TRACE_QUEUE_MAX_SPANS: int = 1000
+    TRACE_BATCH_SIZE: int = 50
+    TRACE_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Logging Settings (sampling hanya untuk INFO/DEBUG; WARNING ke atas selalu ditulis)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_FIELD_MAX_CHARS: int = 200
+    LOG_MESSAGE_MAX_CHARS: int = 1000
+    LOG_SAMPLE_RATE_DEFAULT: float = 1.0
+    LOG_SAMPLE_RATES: Dict[str, float] = {
+        "/api/v1/nl2sql/convert": 0.1,
+        "/api/v1/analyze": 0.1,
+    }
+    DB_ECHO: bool = False
+
+    # Cache Backend Settings: "memory" (per worker) atau "sqlite" (dibagi semua worker
+    # di host yang sama lewat CACHE_SQLITE_PATH); CACHE_BACKENDS menimpa backend per cache.
+    # Metadata datasource berisi kredensial sehingga default-nya tidak ditulis ke disk.
+    CACHE_BACKEND: str = "memory"
+    CACHE_BACKENDS: Dict[str, str] = {"datasource": "memory"}
+    CACHE_SQLITE_PATH: str = "data/cache.sqlite3"
+
+    # Context Cache Settings: konteks skema/sampel disimpan di memori dan di snapshot SQLite
+    # lokal agar tetap hangat setelah restart; snapshot yang lebih tua dari
+    # CONTEXT_REVALIDATE_SECONDS tetap dipakai sambil divalidasi ulang di latar belakang
+    CONTEXT_CACHE_MAX_ENTRIES: int = 256
+    CONTEXT_REVALIDATE_SECONDS: float = 300
+    CONTEXT_SNAPSHOT_MAX_AGE_SECONDS: float = 86400
+    CONTEXT_SNAPSHOT_ENABLED: bool = True
+    CONTEXT_SNAPSHOT_PATH: str = "data/context_snapshots.sqlite3"
+    # Sampel data berisi baris asli milik pelanggan; secara default tidak ditulis ke disk
+    # dan diambil ulang dari datasource saat snapshot dimuat
+    CONTEXT_SNAPSHOT_INCLUDE_SAMPLES: bool = False
+
+    # Prefetch Settings: konteks datasource yang aktif dalam PREFETCH_ACTIVE_WINDOW_SECONDS
+    # disegarkan setiap PREFETCH_INTERVAL_SECONDS (harus < CONTEXT_REVALIDATE_SECONDS)
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_INTERVAL_SECONDS: float = 120
+    PREFETCH_ACTIVE_WINDOW_SECONDS: float = 3600
+    PREFETCH_MAX_CONCURRENCY: int = 2
+    PREFETCH_MAX_CONTEXTS: int = 200
+
+    # Startup Settings: "eager" menyiapkan model & koneksi di lifespan sebelum menerima
+    # request, "lazy" menundanya sampai request pertama yang membutuhkan
+    STARTUP_MODE: str = "eager"
+
     class Config:
         env_file = ".env"
 
@@ -1,16 +1,20 @@
 from langsmith import Client
 from dotenv import load_dotenv
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 api_key = os.getenv("LANGCHAIN_API_KEY")
 if api_key:
-    print(f"API Key loaded: {api_key[:5]}...")  # Debug print
-    # Gunakan endpoint default tanpa LANGSMITH_ENDPOINT
-    langsmith_client = Client(api_key=api_key)
+    logger.info("LangSmith tracing enabled")
+    # Endpoint default, atau LANGSMITH_ENDPOINT jika diset (misal stub lokal).
+    # Batching dilakukan sendiri oleh app.core.tracing.trace_exporter.
+    langsmith_client = Client(api_key=api_key, auto_batch_tracing=False)
 else:
-    print("LANGCHAIN_API_KEY tidak ditemukan - LangSmith tracing disabled")
+    logger.info("LANGCHAIN_API_KEY tidak ditemukan - LangSmith tracing disabled")
     langsmith_client = None
 
 __all__ = ["langsmith_client"]
\ No newline at end of file
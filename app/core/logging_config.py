@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from app.core.config import settings
+import logging
+import random
+import json
+
+# Korelasi log per request; diisi middleware dan ikut ke task asyncio turunan
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+_log_sampled: ContextVar[bool] = ContextVar("log_sampled", default=True)
+
+_STANDARD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+def truncate(value: Any, max_chars: Optional[int] = None) -> Any:
+    """Potong string panjang (prompt, SQL, embedding) agar satu baris log tetap kecil."""
+    max_chars = max_chars or settings.LOG_FIELD_MAX_CHARS
+    if isinstance(value, str) and len(value) > max_chars:
+        return f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+    return value
+
+def sample_rate_for(path: str) -> float:
+    """Rate sampling log INFO/DEBUG untuk path: prefix terpanjang di LOG_SAMPLE_RATES."""
+    rate = settings.LOG_SAMPLE_RATE_DEFAULT
+    matched = ""
+    for prefix, prefix_rate in settings.LOG_SAMPLE_RATES.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, rate = prefix, prefix_rate
+    return rate
+
+def start_request_logging(request_id: str, path: str):
+    """Set request id dan putuskan sekali per request apakah log INFO/DEBUG-nya ditulis."""
+    request_id_var.set(request_id)
+    rate = sample_rate_for(path)
+    _log_sampled.set(rate >= 1.0 or random.random() < rate)
+
+class SampledLogger(logging.Logger):
+    """
+    Logger yang menolak INFO/DEBUG dari request yang tidak terpilih sampling sudah di
+    isEnabledFor, sebelum LogRecord dibuat dan sebelum melewati handler mana pun.
+    WARNING ke atas selalu ditulis.
+    """
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level < logging.WARNING and not _log_sampled.get():
+            return False
+        return super().isEnabledFor(level)
+
+class RequestContextFilter(logging.Filter):
+    """Tambahkan request_id ke setiap record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formatter JSON satu baris per record. Field tambahan dari extra={...} ikut ditulis
+    dan string panjang dipotong sesuai LOG_FIELD_MAX_CHARS. Pesan baru diformat di sini,
+    jadi argumen logger.info("... %s", x) tidak diproses untuk log yang tidak ditulis.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": truncate(record.getMessage(), settings.LOG_MESSAGE_MAX_CHARS),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key not in entry:
+                entry[key] = truncate(value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging():
+    """
+    Pasang handler root sekali saat startup (format json atau text sesuai LOG_FORMAT).
+    Dipanggil sebelum modul app lain diimport agar logger modul memakai SampledLogger.
+    """
+    logging.setLoggerClass(SampledLogger)
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestContextFilter())
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(StructuredFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
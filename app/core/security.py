@@ -0,0 +1,20 @@
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.core.config import settings
+import hmac
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Cocokkan token dengan ADMIN_API_TOKEN; selalu False jika token admin tidak dikonfigurasi."""
+    if not settings.ADMIN_API_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, settings.ADMIN_API_TOKEN)
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency untuk endpoint admin (header X-Admin-Token).
+
+    Raises:
+        HTTPException: 403 jika token tidak cocok atau ADMIN_API_TOKEN belum diset.
+    """
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token tidak valid")
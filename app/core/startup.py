@@ -0,0 +1,35 @@
+from app.core.config import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def preload_models():
+    """
+    Muat bobot model di proses master sebelum fork (gunicorn --preload).
+
+    Hanya memuat data yang aman diwariskan lewat fork: tidak membuka koneksi database,
+    socket atau client LLM. Worker hasil fork berbagi bobot model copy-on-write.
+    """
+    from app.services.embedding_service import get_embedding_model
+
+    started = time.perf_counter()
+    get_embedding_model()
+    logger.info("Preloaded models in master process in %.2fs", time.perf_counter() - started)
+
+def warm_up():
+    """
+    Siapkan resource per worker (model, koneksi chat database, NL2SQLService, snapshot
+    konteks dari disk) sebelum
+    worker menerima request. Dipanggil dari lifespan jika STARTUP_MODE=eager.
+    """
+    from app.services.embedding_service import get_embedding_model
+    from app.services.nl2sql_service import get_nl2sql_service, preload_context_snapshots
+    from app.db.chat_database import get_chat_database
+
+    started = time.perf_counter()
+    get_embedding_model()
+    get_chat_database()
+    get_nl2sql_service()
+    contexts = preload_context_snapshots()
+    logger.info("Worker warm-up finished in %.2fs (mode=%s, contexts=%s)", time.perf_counter() - started, settings.STARTUP_MODE, contexts)
@@ -0,0 +1,166 @@
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.langsmith import langsmith_client
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class TraceSpan:
+    """Satu run LangSmith yang sedang berjalan; dikirim ke exporter saat end() dipanggil."""
+
+    __slots__ = ("_exporter", "_run")
+
+    def __init__(self, exporter: "TraceExporter", run: Dict[str, Any]):
+        self._exporter = exporter
+        self._run = run
+
+    def end(self, outputs: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Tutup span dengan output atau error dan antrekan untuk dikirim."""
+        self._run["end_time"] = datetime.now(timezone.utc)
+        if outputs is not None:
+            self._run["outputs"] = outputs
+        if error is not None:
+            self._run["error"] = error
+        self._exporter._enqueue(self._run)
+
+class _NoopSpan:
+    """Span pengganti saat tracing nonaktif; semua operasinya tidak melakukan apa-apa."""
+
+    __slots__ = ()
+
+    def end(self, outputs: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class TraceExporter:
+    """
+    Exporter trace LangSmith yang tidak memblokir request.
+
+    Span yang selesai masuk ke antrean in-memory berukuran tetap (span baru dibuang
+    jika antrean penuh) dan dikirim per batch lewat batch_ingest_runs oleh task latar
+    belakang di thread pool. Satu run dikirim sekali dalam keadaan lengkap, bukan
+    create lalu update. Tanpa client LangSmith, start_span mengembalikan NOOP_SPAN.
+    """
+
+    def __init__(self, client: Any, max_queue: int, batch_size: int, flush_interval: float):
+        self.client = client
+        self.enabled = client is not None
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start_span(self, name: str, inputs: Dict[str, Any], run_type: str = "chain"):
+        """
+        Mulai run baru (root trace).
+
+        Returns:
+            TraceSpan, atau NOOP_SPAN jika tracing nonaktif.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        run_id = uuid.uuid4()
+        start_time = datetime.now(timezone.utc)
+        return TraceSpan(self, {
+            "id": run_id,
+            "trace_id": run_id,
+            "dotted_order": f"{start_time:%Y%m%dT%H%M%S%fZ}{run_id}",
+            "name": name,
+            "run_type": run_type,
+            "inputs": inputs,
+            "start_time": start_time,
+            "session_name": settings.LANGCHAIN_PROJECT or "default",
+        })
+
+    def _enqueue(self, run: Dict[str, Any]):
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning("Trace queue full (%s), dropped %s spans so far", self.max_queue, self.dropped)
+            return
+        self._queue.append(run)
+        self._ensure_worker()
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Dipanggil di luar event loop: span tetap di antrean sampai worker berjalan
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    async def flush(self):
+        """Kirim semua span yang sedang mengantre, batch demi batch."""
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            batch = self._take_batch()
+            try:
+                await loop.run_in_executor(None, lambda: self.client.batch_ingest_runs(create=batch))
+                self.exported += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning("Failed to export %s trace spans: %s", len(batch), e)
+
+    async def close(self, timeout: float = 5.0):
+        """Hentikan worker setelah sisa antrean terkirim (dipanggil saat shutdown)."""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            self._wakeup.set()
+            pending = self._task
+        elif self.enabled and self._queue:
+            pending = self.flush()
+        else:
+            return
+        try:
+            await asyncio.wait_for(pending, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Trace flush on shutdown timed out, %s spans discarded", len(self._queue))
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._queue),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+# Global instance
+trace_exporter = TraceExporter(
+    langsmith_client,
+    max_queue=settings.TRACE_QUEUE_MAX_SPANS,
+    batch_size=settings.TRACE_BATCH_SIZE,
+    flush_interval=settings.TRACE_FLUSH_INTERVAL_SECONDS
+)
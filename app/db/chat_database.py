@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from langchain_postgres import PostgresChatMessageHistory
 from typing import Optional
+import threading
 import logging
 from app.core.config import settings
 
@@ -85,9 +86,24 @@ class ChatDatabaseManager:
             self.psycopg_connection.close()
         self.engine.dispose()
 
-# Global instance
-chat_db_manager = ChatDatabaseManager()
+# Global instance, dibuat saat pertama dipakai agar import tidak membuka koneksi
+# (dan proses master tidak mewariskan socket ke worker hasil fork)
+_chat_db_manager: Optional[ChatDatabaseManager] = None
+_chat_db_lock = threading.Lock()
 
-def get_chat_database():
+def get_chat_database() -> ChatDatabaseManager:
     """Dependency for getting chat database manager"""
-    return chat_db_manager
+    global _chat_db_manager
+    if _chat_db_manager is None:
+        with _chat_db_lock:
+            if _chat_db_manager is None:
+                _chat_db_manager = ChatDatabaseManager()
+    return _chat_db_manager
+
+def close_chat_database():
+    """Tutup koneksi chat database jika sudah pernah dibuka (dipanggil saat shutdown)."""
+    global _chat_db_manager
+    with _chat_db_lock:
+        if _chat_db_manager is not None:
+            _chat_db_manager.close_connection()
+            _chat_db_manager = None
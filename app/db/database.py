@@ -5,8 +5,6 @@ from sqlalchemy.engine import Engine
 from app.core.config import settings
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Koneksi ke database toolsBI untuk mengakses tabel datasource
@@ -18,13 +16,13 @@ SQLALCHEMY_DATABASE_URL = (
 # Membuat engine untuk database toolsBI
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=settings.DEBUG,
+    echo=settings.DB_ECHO,
     pool_pre_ping=True,
 )
 
 @event.listens_for(Engine, "connect")
 def connect(dbapi_connection, connection_record):
-    logger.info("Database connection established")
+    logger.debug("Database connection established")
 
 # Membuat session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -48,7 +46,6 @@ def get_db_connection():
     """
     try:
         connection = engine.connect()
-        logger.info("Database connection created successfully")
         return connection
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}")
@@ -2,11 +2,12 @@ from typing import List, Dict
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from fastapi import HTTPException
-from app.services.db_services import get_datasource_info
+from app.services.db_services import get_datasource_engine, datasource_connection
 
 def get_db_connection(id_datasource: int = None):
     """
     Membuat koneksi database menggunakan SQLAlchemy berdasarkan id_datasource.
+    Koneksi diambil dari pool engine datasource (read-only, dengan statement timeout).
     
     Args:
         id_datasource (int): ID unik datasource. Jika None, gunakan default datasource.
@@ -15,13 +16,7 @@ def get_db_connection(id_datasource: int = None):
         sqlalchemy.engine.Connection: Objek koneksi database.
     """
     try:
-        datasource_info = get_datasource_info(id_datasource or 12)  # Default ke id_datasource 12
-        db_url = (
-            f"postgresql://{datasource_info['user']}:{datasource_info['password']}@"
-            f"{datasource_info['host']}:{datasource_info['port']}/{datasource_info['db_name']}"
-        )
-        engine = create_engine(db_url)
-        return engine.connect()
+        return get_datasource_engine(id_datasource or 12).connect()  # Default ke id_datasource 12
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error connecting to database: {str(e)}")
 
@@ -37,7 +32,6 @@ def get_table_schema(id_datasource: int, schema_name: str = 'public') -> List[Di
         List[Dict]: List dari informasi tabel (table_name, columns, relationships).
     """
     try:
-        conn = get_db_connection(id_datasource)
         # Query untuk mendapatkan informasi kolom
         column_query = text("""
             SELECT 
@@ -77,8 +71,9 @@ def get_table_schema(id_datasource: int, schema_name: str = 'public') -> List[Di
         """)
 
         # Eksekusi queries
-        columns = conn.execute(column_query, {"schema_name": schema_name}).fetchall()
-        foreign_keys = conn.execute(fk_query).fetchall()
+        with datasource_connection(id_datasource) as conn:
+            columns = conn.execute(column_query, {"schema_name": schema_name}).fetchall()
+            foreign_keys = conn.execute(fk_query).fetchall()
 
         # Organize data by table
         schema_info = {}
@@ -113,7 +108,6 @@ def get_table_schema(id_datasource: int, schema_name: str = 'public') -> List[Di
                     "foreign_column": fk.foreign_column_name
                 })
 
-        conn.close()
         return list(schema_info.values())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching table schema: {str(e)}")
@@ -132,11 +126,53 @@ def get_table_sample_data(table_name: str, id_datasource: int, schema_name: str
         List[Dict]: List dari baris data.
     """
     try:
-        conn = get_db_connection(id_datasource)
         query = text(f'SELECT * FROM "{schema_name}"."{table_name}" LIMIT :limit')
-        result = conn.execute(query, {"limit": limit}).fetchall()
-        conn.close()
+        with datasource_connection(id_datasource) as conn:
+            result = conn.execute(query, {"limit": limit}).fetchall()
         return [dict(row._mapping) for row in result]
     except Exception as e:
         print(f"Error getting sample data: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+def get_schema_fingerprint(id_datasource: int, schema_name: str = 'public') -> str:
+    """
+    Hash struktur skema (kolom, tipe, nullability dan foreign key) yang dihitung di sisi
+    database dengan satu query ringan, untuk memvalidasi ulang snapshot konteks tanpa
+    introspeksi dan sampling penuh.
+    
+    Args:
+        id_datasource (int): ID unik datasource.
+        schema_name (str): Nama schema database (default: 'public').
+    
+    Returns:
+        str: Hash md5 struktur skema.
+    """
+    try:
+        query = text("""
+            SELECT md5(
+                coalesce((
+                    SELECT string_agg(
+                        c.table_name || '.' || c.column_name || ':' || c.data_type || ':' || c.is_nullable,
+                        ',' ORDER BY c.table_name, c.ordinal_position
+                    )
+                    FROM information_schema.tables t
+                    JOIN information_schema.columns c ON t.table_name = c.table_name
+                    WHERE t.table_schema = :schema_name AND t.table_type = 'BASE TABLE'
+                ), '')
+                || '|' ||
+                coalesce((
+                    SELECT string_agg(
+                        tc.table_name || '.' || kcu.column_name || '->' || ccu.table_name || '.' || ccu.column_name,
+                        ',' ORDER BY tc.table_name, kcu.column_name, ccu.table_name, ccu.column_name
+                    )
+                    FROM information_schema.table_constraints tc
+                    JOIN information_schema.key_column_usage kcu ON tc.constraint_name = kcu.constraint_name
+                    JOIN information_schema.constraint_column_usage ccu ON ccu.constraint_name = tc.constraint_name
+                    WHERE tc.constraint_type = 'FOREIGN KEY'
+                ), '')
+            )
+        """)
+        with datasource_connection(id_datasource) as conn:
+            return conn.execute(query, {"schema_name": schema_name}).scalar()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching schema fingerprint: {str(e)}")
@@ -1,17 +1,60 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.logging_config import configure_logging, start_request_logging
+
+# Pasang logging sebelum modul lain di-import agar log startup ikut terformat
+configure_logging()
+
 from app.api import api_router
-from app.core.langsmith import langsmith_client
+from app.api.endpoints import metrics as metrics_endpoint
+from app.api.endpoints.admin import request_profiles
+from app.core.security import is_admin_token
+from app.utils.metrics import metrics, start_request_timings, format_server_timing
+from app.utils.profiling import start_request_profile, stop_request_profile
+from app.core.tracing import trace_exporter
+from app.core.startup import warm_up
+from app.services.context_prefetcher import context_prefetcher
+from app.db.chat_database import close_chat_database
+from app.services.db_services import shutdown_datasource_executors
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import asyncio
 import os
+import time
+import uuid
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Import app.main tidak memuat model atau membuka koneksi. Pada STARTUP_MODE=eager
+    resource disiapkan di sini sebelum worker menerima request; pada mode lazy
+    resource dibuat saat pertama dipakai.
+    """
+    samples_task = None
+    if settings.STARTUP_MODE == "eager":
+        await asyncio.get_event_loop().run_in_executor(None, warm_up)
+        from app.services.nl2sql_service import fill_preloaded_samples
+        # Snapshot tanpa sampel data dilengkapi di latar belakang, worker sudah menerima request
+        samples_task = asyncio.get_running_loop().create_task(fill_preloaded_samples())
+    if settings.PREFETCH_ENABLED:
+        context_prefetcher.start()
+    yield
+    # Hentikan prefetch, kirim sisa trace, tutup koneksi dan executor datasource sebelum worker berhenti
+    if samples_task is not None:
+        samples_task.cancel()
+    await context_prefetcher.stop()
+    await trace_exporter.close()
+    close_chat_database()
+    shutdown_datasource_executors()
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="API Service for Natural Language to SQL conversion using Google Gemini",
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,7 +65,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+HTTP_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Latensi request HTTP sampai header respons dikirim",
+    ["method", "handler", "status"]
+)
+
+@app.middleware("http")
+async def stage_timing_middleware(request: Request, call_next):
+    """
+    Kumpulkan durasi tiap tahap request, tambahkan header Server-Timing dan
+    catat latensi per handler ke histogram.
+    """
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    HTTP_DURATION.observe(
+        elapsed,
+        method=request.method,
+        handler=getattr(route, "name", "unmatched"),
+        status=response.status_code
+    )
+    response.headers["Server-Timing"] = format_server_timing(timings, elapsed)
+    return response
+
+@app.middleware("http")
+async def request_profile_middleware(request: Request, call_next):
+    """
+    Profil satu request dengan cProfile jika diminta lewat header X-Profile: cprofile
+    dan X-Admin-Token yang valid. Hasilnya diambil dari
+    /api/v1/admin/profile/requests/{X-Profile-Id}.
+    """
+    if request.headers.get("x-profile") != "cprofile" or not is_admin_token(request.headers.get("x-admin-token")):
+        return await call_next(request)
+
+    profile = start_request_profile()
+    if profile is None:
+        response = await call_next(request)
+        response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    try:
+        response = await call_next(request)
+    finally:
+        # Profil mencakup semua yang berjalan di thread event loop selama request ini
+        result = stop_request_profile(profile)
+    profile_id = uuid.uuid4().hex
+    request_profiles.set(profile_id, result)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    """
+    Beri setiap request id korelasi (X-Request-ID dari klien atau uuid baru) untuk
+    semua log-nya, dan tentukan sampling log INFO/DEBUG berdasarkan path.
+    """
+    request_id = request.headers.get("x-request-id", "")[:64] or uuid.uuid4().hex
+    start_request_logging(request_id, request.url.path)
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(metrics_endpoint.router)
 
 @app.get("/")
 async def root():
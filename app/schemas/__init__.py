@@ -1,6 +1,9 @@
-from .nl2sql import NL2SQLRequest, NL2SQLResponse
+from .nl2sql import NL2SQLRequest, NL2SQLResponse, NL2SQLBatchRequest, NL2SQLBatchItem, NL2SQLBatchResponse
 
 __all__ = [
     "NL2SQLRequest",
-    "NL2SQLResponse"
+    "NL2SQLResponse",
+    "NL2SQLBatchRequest",
+    "NL2SQLBatchItem",
+    "NL2SQLBatchResponse"
 ]
\ No newline at end of file
@@ -14,6 +14,7 @@ class NL2SQLResponse(BaseModel):
     explanation: Optional[str] = Field(None, description="Penjelasan tentang query yang dihasilkan", example="Query ini akan menghitung total penjualan untuk setiap kategori di tahun 2023")
     analysis: Optional[str] = Field(None, description="Analisis tekstual dari data query", example="Berdasarkan data, kategori 'Electronics' memiliki penjualan tertinggi di tahun 2023.")
     chart_recommendation: Optional[Dict[str, str]] = Field(None, description="Rekomendasi tipe diagram dari AI", example={"recommended_type": "bar", "reason": "Agregasi per kategori"})
+    skipped_stages: List[str] = Field(default_factory=list, description="Tahap pipeline yang dilewati karena batas waktu request habis", example=["analysis"])
 
     class Config:
         json_schema_extra = {
@@ -22,6 +23,22 @@ class NL2SQLResponse(BaseModel):
                 "confidence_score": 0.95,
                 "explanation": "Query ini akan menghitung total penjualan untuk setiap kategori di tahun 2023",
                 "analysis": "Berdasarkan data, kategori 'Electronics' memiliki penjualan tertinggi di tahun 2023.",
-                "chart_recommendation": {"recommended_type": "bar", "reason": "Data agregasi dengan kategori, cocok untuk bar chart"}
+                "chart_recommendation": {"recommended_type": "bar", "reason": "Data agregasi dengan kategori, cocok untuk bar chart"},
+                "skipped_stages": []
             }
-        }
\ No newline at end of file
+        }
+
+class NL2SQLBatchRequest(BaseModel):
+    prompts: List[str] = Field(..., description="Daftar prompt (satu per widget dashboard)", min_length=1, example=["total penjualan per kategori", "tren penjualan bulanan 2023"])
+    id_datasource: int = Field(..., description="ID unik untuk datasource yang akan diquery", example=123)
+    table_names: Optional[List[str]] = Field(None, description="List nama tabel yang relevan (opsional)")
+    user_id: Optional[int] = Field(None, description="ID user untuk filter knowledge base (opsional)", example=1)
+
+class NL2SQLBatchItem(BaseModel):
+    prompt: str = Field(..., description="Prompt asal")
+    status: str = Field(..., description="success atau error", example="success")
+    result: Optional[NL2SQLResponse] = Field(None, description="Hasil konversi jika berhasil")
+    detail: Optional[str] = Field(None, description="Pesan error jika gagal")
+
+class NL2SQLBatchResponse(BaseModel):
+    results: List[NL2SQLBatchItem] = Field(..., description="Hasil per prompt, urutannya sama dengan request")
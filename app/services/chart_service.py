@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional
+from langchain_google_genai import GoogleGenerativeAI
+from langchain.prompts import PromptTemplate
+from app.core.config import settings
+from app.services.query_result import QueryResult, NUMERIC, TEMPORAL
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_CHART
+from app.services.llm_metrics import chart_usage_callback
+import numpy as np
+import logging
+import json
+import re
+
+logger = logging.getLogger(__name__)
+
+# Nama kolom yang menandakan dimensi waktu walaupun bertipe numerik/teks (misal kolom tahun INT)
+TIME_NAME_HINTS = ("date", "month", "year", "week", "quarter", "period", "tanggal", "bulan", "tahun", "minggu", "kuartal", "periode")
+
+# Batas jumlah kategori agar diagram tetap terbaca
+PIE_MAX_CATEGORIES = 6
+BAR_MAX_CATEGORIES = 30
+
+CHART_PROMPT = PromptTemplate(
+    input_variables=["prompt", "sql_query", "data_structure", "num_columns", "has_numeric", "has_time", "is_single_category"],
+    template="""Berdasarkan prompt pengguna: "{prompt}"
+SQL query: {sql_query}
+Struktur data: {num_columns} kolom, dengan kolom: {data_structure}
+Apakah ada kolom numerik: {has_numeric}
+Apakah ada kolom waktu (date/month/year): {has_time}
+Apakah satu kolom kategorikal: {is_single_category}
+
+Rekomendasikan tipe diagram yang paling cocok (bar, line, pie, table) dan berikan alasan singkat dalam bahasa Indonesia. Format output: {{"recommended_type": "bar", "reason": "Alasan singkat"}}"""
+)
+
+_llm: Optional[GoogleGenerativeAI] = None
+
+def _get_llm() -> GoogleGenerativeAI:
+    """Client Gemini yang dipakai bersama oleh semua rekomendasi diagram."""
+    global _llm
+    if _llm is None:
+        _llm = GoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            google_api_key=settings.GOOGLE_API_KEY,
+            temperature=0.1,
+            callbacks=[chart_usage_callback]
+        )
+    return _llm
+
+def infer_column_roles(data: QueryResult) -> List[Dict[str, Any]]:
+    """
+    Tentukan peran setiap kolom dari tipe data baris yang ada di data. Untuk preview
+    yang terpotong (data.truncated), distinct hanya dihitung dari baris preview sehingga
+    merupakan batas bawah kardinalitas hasil query lengkap.
+
+    Returns:
+        List[Dict[str, Any]]: name, role (temporal/measure/dimension) dan distinct (kardinalitas).
+    """
+    roles = []
+    for position, (name, kind) in enumerate(zip(data.columns, data.kinds)):
+        values = data.arrays[position][data.valid(position)]
+        lowered = name.lower()
+        name_hint = any(hint in lowered for hint in TIME_NAME_HINTS)
+        # Kolom float dengan nama berbau waktu (misal avg_monthly_sales) tetap dianggap ukuran
+        if kind == TEMPORAL or (name_hint and (kind != NUMERIC or values.dtype.kind == "i")):
+            role = "temporal"
+        elif kind == NUMERIC:
+            role = "measure"
+        else:
+            role = "dimension"
+        distinct = int(np.unique(values.astype(str)).size) if values.size else 0
+        roles.append({"name": name, "role": role, "distinct": distinct, "position": position})
+    return roles
+
+def classify_chart(data: QueryResult) -> tuple[Dict[str, str], float]:
+    """
+    Klasifikasi tipe diagram berbasis aturan.
+
+    Returns:
+        tuple[Dict[str, str], float]: (rekomendasi, tingkat keyakinan 0-1)
+    """
+    if not data:
+        return {"recommended_type": "table", "reason": "Tidak ada data untuk divisualisasikan."}, 1.0
+
+    roles = infer_column_roles(data)
+    temporals = [r for r in roles if r["role"] == "temporal"]
+    measures = [r for r in roles if r["role"] == "measure"]
+    dimensions = [r for r in roles if r["role"] == "dimension"]
+
+    if len(roles) > 4:
+        return {"recommended_type": "table", "reason": "Data memiliki banyak kolom, tampilkan sebagai tabel."}, 0.8
+
+    if not measures:
+        if len(roles) == 1 and dimensions:
+            return {"recommended_type": "pie", "reason": "Data kategorikal tunggal, cocok untuk distribusi pie chart."}, 0.5
+        return {"recommended_type": "table", "reason": "Tidak ada kolom numerik untuk divisualisasikan, tampilkan sebagai tabel."}, 0.8
+
+    if len(data) == 1 and not dimensions:
+        return {"recommended_type": "table", "reason": "Hasil berupa nilai tunggal, tampilkan sebagai tabel/angka ringkas."}, 0.9
+
+    if len(temporals) == 1 and temporals[0]["distinct"] >= 2 and len(dimensions) <= 1:
+        return {"recommended_type": "line", "reason": "Data memiliki kolom waktu dan numerik, cocok untuk tren line chart."}, 0.95 if not dimensions else 0.8
+
+    if len(dimensions) == 1 and not temporals:
+        distinct = dimensions[0]["distinct"]
+        if len(measures) == 1:
+            measure = data.arrays[measures[0]["position"]][data.valid(measures[0]["position"])]
+            if distinct <= PIE_MAX_CATEGORIES and measure.size and bool(np.all(measure >= 0)):
+                return {"recommended_type": "pie", "reason": "Sedikit kategori dengan satu nilai numerik, cocok untuk proporsi pie chart."}, 0.8
+            if distinct <= BAR_MAX_CATEGORIES:
+                return {"recommended_type": "bar", "reason": "Data agregasi dengan kolom kategorikal dan numerik, cocok untuk bar chart."}, 0.9
+            return {"recommended_type": "table", "reason": "Terlalu banyak kategori untuk diagram, tampilkan sebagai tabel."}, 0.75
+        if distinct <= BAR_MAX_CATEGORIES:
+            return {"recommended_type": "bar", "reason": "Beberapa nilai numerik per kategori, cocok untuk grouped bar chart."}, 0.8
+
+    return {"recommended_type": "bar", "reason": "Data agregasi dengan kolom kategorikal dan numerik, cocok untuk bar chart."}, 0.4
+
+def _parse_llm_recommendation(raw: str) -> Optional[Dict[str, str]]:
+    """Ambil objek JSON rekomendasi dari output LLM (termasuk yang dibungkus Markdown)."""
+    match = re.search(r"\{.*\}", raw, re.DOTALL)
+    if not match:
+        return None
+    try:
+        recommendation = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(recommendation, dict) or "recommended_type" not in recommendation:
+        return None
+    return {"recommended_type": str(recommendation["recommended_type"]), "reason": str(recommendation.get("reason", ""))}
+
+async def recommend_chart_type(sql_query: str, data: QueryResult, prompt: str, user_id: Optional[int] = None) -> dict:
+    """
+    Rekomendasikan tipe diagram berdasarkan prompt dan struktur data.
+
+    Klasifikasi berbasis aturan dipakai langsung jika keyakinannya mencapai
+    CHART_RULE_CONFIDENCE_THRESHOLD; LLM hanya dipanggil untuk kasus yang ambigu,
+    dengan hasil aturan sebagai fallback.
+    """
+    recommendation, confidence = classify_chart(data)
+    if confidence >= settings.CHART_RULE_CONFIDENCE_THRESHOLD:
+        return recommendation
+
+    columns = data.columns
+    roles = infer_column_roles(data)
+    try:
+        chain = CHART_PROMPT | _get_llm()
+        async with llm_scheduler.slot(user_id, PRIORITY_CHART):
+            result = await chain.ainvoke({
+                "prompt": prompt,
+                "sql_query": sql_query,
+                "data_structure": ", ".join(columns),
+                "num_columns": len(columns),
+                "has_numeric": any(r["role"] == "measure" for r in roles),
+                "has_time": any(r["role"] == "temporal" for r in roles),
+                "is_single_category": len(columns) == 1
+            })
+        return _parse_llm_recommendation(result) or recommendation
+    except Exception as e:
+        logger.warning("Chart recommendation LLM call failed, using rule-based result: %s", e)
+        return recommendation
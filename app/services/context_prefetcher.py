@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from app.core.config import settings
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class ContextPrefetcher:
+    """
+    Scheduler latar belakang yang menjaga konteks datasource aktif tetap hangat.
+
+    Setiap pemanggilan get_context mencatat (id_datasource, table_names) sebagai aktif.
+    Setiap PREFETCH_INTERVAL_SECONDS, konteks yang dipakai dalam
+    PREFETCH_ACTIVE_WINDOW_SECONDS terakhir divalidasi ulang (atau dibangun ulang jika
+    skemanya berubah) sebelum entri cache-nya kedaluwarsa, dan pool koneksi datasource
+    dihangatkan. Paralelisme dibatasi PREFETCH_MAX_CONCURRENCY dan setiap query tetap
+    melewati bulkhead datasource, sehingga prefetch tidak membebani database pelanggan.
+    """
+
+    def __init__(self, interval: float, active_window: float, max_concurrency: int, max_tracked: int):
+        self.interval = interval
+        self.active_window = active_window
+        self.max_concurrency = max_concurrency
+        self.max_tracked = max_tracked
+        self._active: "OrderedDict[Tuple, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_seconds = 0.0
+
+    def touch(self, id_datasource: int, table_names: Optional[List[str]] = None):
+        """Tandai konteks sebagai aktif (dipanggil dari jalur request, O(1))."""
+        key = (id_datasource, tuple(sorted(table_names)) if table_names else None)
+        self._active[key] = time.monotonic()
+        self._active.move_to_end(key)
+        while len(self._active) > self.max_tracked:
+            self._active.popitem(last=False)
+
+    def active_keys(self) -> List[Tuple]:
+        """Konteks yang dipakai dalam active_window terakhir; yang lebih lama dilupakan."""
+        cutoff = time.monotonic() - self.active_window
+        for key in [key for key, last_seen in self._active.items() if last_seen < cutoff]:
+            del self._active[key]
+        return list(self._active)
+
+    def start(self):
+        """Mulai loop prefetch di event loop saat ini (dipanggil dari lifespan)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Jitter awal agar worker-worker dalam satu host tidak prefetch bersamaan
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            started = time.monotonic()
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Context prefetch cycle failed: %s", e)
+            self.last_cycle_seconds = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.interval - self.last_cycle_seconds))
+
+    async def run_once(self):
+        """Satu siklus prefetch untuk semua konteks aktif."""
+        from app.services.nl2sql_service import get_nl2sql_service
+        from app.services.db_services import run_on_datasource, warm_datasource_pool
+
+        keys = self.active_keys()
+        if not keys:
+            return
+        service = get_nl2sql_service()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def refresh(id_datasource: int, table_names: Optional[List[str]]):
+            async with semaphore:
+                try:
+                    # Konteks yang baru divalidasi worker lain cukup dimuat dari snapshot
+                    if await service.refresh_context(id_datasource, table_names, skip_if_validated_within=self.interval / 2):
+                        self.refreshed += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning("Failed to prefetch context for datasource %s: %s", id_datasource, e)
+
+        async def warm(id_datasource: int):
+            async with semaphore:
+                try:
+                    await run_on_datasource(id_datasource, warm_datasource_pool, id_datasource)
+                except Exception as e:
+                    logger.warning("Failed to warm connection pool for datasource %s: %s", id_datasource, e)
+
+        datasources = {key[0] for key in keys}
+        await asyncio.gather(
+            *(refresh(id_datasource, list(tables) if tables else None) for id_datasource, tables in keys),
+            *(warm(id_datasource) for id_datasource in datasources)
+        )
+        self.cycles += 1
+        logger.info("Context prefetch cycle finished", extra={"contexts": len(keys), "datasources": len(datasources)})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "tracked": len(self._active),
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_cycle_seconds": self.last_cycle_seconds,
+        }
+
+# Global instance
+context_prefetcher = ContextPrefetcher(
+    interval=settings.PREFETCH_INTERVAL_SECONDS,
+    active_window=settings.PREFETCH_ACTIVE_WINDOW_SECONDS,
+    max_concurrency=settings.PREFETCH_MAX_CONCURRENCY,
+    max_tracked=settings.PREFETCH_MAX_CONTEXTS
+)
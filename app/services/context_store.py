@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.utils.cache import create_private_file
+import threading
+import sqlite3
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Naikkan jika struktur dict konteks berubah; snapshot dengan versi lain diabaikan
+CONTEXT_SNAPSHOT_FORMAT = 2
+
+class ContextSnapshotStore:
+    """
+    Snapshot konteks datasource (skema terformat) di file SQLite lokal, sehingga worker
+    yang baru restart bisa langsung memakai konteks tanpa introspeksi ulang ke database
+    pelanggan. Sampel data hanya ikut disimpan jika include_samples aktif; tanpa itu
+    context yang dimuat tidak punya key "sample_data". File dibuat dengan mode 0600.
+
+    Setiap snapshot membawa versi format, fingerprint skema saat dibangun, waktu build
+    dan waktu validasi terakhir. Kegagalan disk tidak pernah menggagalkan request:
+    operasi yang gagal dicatat dan dianggap miss.
+    """
+
+    def __init__(self, path: str, include_samples: bool = False):
+        self.path = path
+        self.include_samples = include_samples
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    create_private_file(self.path)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS context_snapshots (
+                            cache_key TEXT PRIMARY KEY,
+                            id_datasource INTEGER NOT NULL,
+                            format_version INTEGER NOT NULL,
+                            fingerprint TEXT NOT NULL,
+                            built_at REAL NOT NULL,
+                            validated_at REAL NOT NULL,
+                            context TEXT NOT NULL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_context_snapshots_datasource ON context_snapshots (id_datasource)")
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def _row_to_snapshot(self, row) -> Dict[str, Any]:
+        return {
+            "cache_key": row[0],
+            "id_datasource": row[1],
+            "fingerprint": row[2],
+            "built_at": row[3],
+            "validated_at": row[4],
+            "context": json.loads(row[5]),
+        }
+
+    def load(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Ambil snapshot untuk cache_key.
+
+        Returns:
+            Dict dengan context, fingerprint, built_at dan validated_at; None jika tidak ada.
+        """
+        self.reads += 1
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT cache_key, id_datasource, fingerprint, built_at, validated_at, context "
+                    "FROM context_snapshots WHERE cache_key = ? AND format_version = ?",
+                    (cache_key, CONTEXT_SNAPSHOT_FORMAT)
+                ).fetchone()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.errors += 1
+            logger.warning("Failed to read context snapshot %s: %s", cache_key, e)
+            return None
+        if row is None:
+            return None
+        self.hits += 1
+        return self._row_to_snapshot(row)
+
+    def load_recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Snapshot yang paling baru divalidasi, untuk mengisi cache memori saat startup."""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT cache_key, id_datasource, fingerprint, built_at, validated_at, context "
+                    "FROM context_snapshots WHERE format_version = ? ORDER BY validated_at DESC LIMIT ?",
+                    (CONTEXT_SNAPSHOT_FORMAT, limit)
+                ).fetchall()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.errors += 1
+            logger.warning("Failed to load context snapshots: %s", e)
+            return []
+        return [self._row_to_snapshot(row) for row in rows]
+
+    def save(self, cache_key: str, id_datasource: int, fingerprint: str, context: Dict[str, Any], built_at: Optional[float] = None):
+        """Simpan (atau ganti) snapshot konteks yang baru dibangun."""
+        now = time.time()
+        if not self.include_samples:
+            context = {k: v for k, v in context.items() if k != "sample_data"}
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO context_snapshots "
+                    "(cache_key, id_datasource, format_version, fingerprint, built_at, validated_at, context) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, id_datasource, CONTEXT_SNAPSHOT_FORMAT, fingerprint, built_at or now, now, json.dumps(context, default=str))
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self.writes += 1
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning("Failed to write context snapshot %s: %s", cache_key, e)
+
+    def mark_validated(self, cache_key: str):
+        """Catat bahwa fingerprint snapshot masih cocok dengan skema datasource."""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("UPDATE context_snapshots SET validated_at = ? WHERE cache_key = ?", (time.time(), cache_key))
+                conn.commit()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning("Failed to update context snapshot %s: %s", cache_key, e)
+
+    def delete_datasource(self, id_datasource: int):
+        """Hapus semua snapshot milik datasource (misal setelah datasource diubah)."""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM context_snapshots WHERE id_datasource = ?", (id_datasource,))
+                conn.commit()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning("Failed to delete context snapshots for datasource %s: %s", id_datasource, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "reads": self.reads,
+            "hits": self.hits,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
+
+def _create_store() -> Optional[ContextSnapshotStore]:
+    if not settings.CONTEXT_SNAPSHOT_ENABLED:
+        return None
+    directory = os.path.dirname(settings.CONTEXT_SNAPSHOT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return ContextSnapshotStore(settings.CONTEXT_SNAPSHOT_PATH, include_samples=settings.CONTEXT_SNAPSHOT_INCLUDE_SAMPLES)
+
+# Global instance (None jika snapshot dinonaktifkan)
+context_store = _create_store()
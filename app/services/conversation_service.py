@@ -0,0 +1,91 @@
+from typing import Optional, List, Dict, Any, Set
+from collections import deque
+from app.core.config import settings
+from app.db.chat_database import get_chat_database
+from app.services.nl2sql_service import NL2SQLService
+from app.utils.session_utils import validate_or_generate_session_id
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+class ConversationSession:
+    """
+    Sesi percakapan NL2SQL yang hidup selama satu koneksi WebSocket.
+
+    Konteks datasource (skema terpangkas dan sampel data) dibangun sekali saat sesi
+    dibuka, riwayat pesan terakhir disimpan di memori, dan setiap giliran baru
+    ditulis ke tabel chat_history secara asinkron.
+    """
+
+    def __init__(
+        self,
+        nl2sql_service: NL2SQLService,
+        id_datasource: int,
+        table_names: Optional[List[str]] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        history_limit: Optional[int] = None
+    ):
+        self.nl2sql_service = nl2sql_service
+        self.id_datasource = id_datasource
+        self.table_names = table_names
+        self.session_id = validate_or_generate_session_id(session_id)
+        self.user_id = user_id
+        self.history = deque(maxlen=history_limit or settings.WS_HISTORY_LIMIT)
+        self.context: Optional[Dict[str, Any]] = None
+        self._chat_history = None
+        self._pending_writes: Set[asyncio.Task] = set()
+
+    async def open(self):
+        """Bangun konteks datasource dan muat riwayat terakhir satu kali."""
+        loop = asyncio.get_event_loop()
+        self.context = await self.nl2sql_service.get_context(self.id_datasource, self.table_names)
+        try:
+            self._chat_history = await loop.run_in_executor(
+                None,
+                get_chat_database().get_chat_history,
+                self.session_id
+            )
+            messages = await loop.run_in_executor(None, lambda: self._chat_history.messages)
+            self.history.extend(messages[-self.history.maxlen:])
+        except Exception as e:
+            logger.warning("Failed to load chat history for session %s: %s", self.session_id, e)
+            self._chat_history = None
+        logger.info("Conversation session %s opened for datasource %s", self.session_id, self.id_datasource)
+
+    async def generate_sql(self, prompt: str) -> tuple[str, float]:
+        """Hasilkan SQL untuk satu giliran memakai konteks dan riwayat di memori."""
+        if self.context is None:
+            await self.open()
+
+        sql_query, confidence_score, turn = await self.nl2sql_service.generate_turn_from_context(
+            prompt, self.context, list(self.history), self.user_id
+        )
+
+        self.history.extend(turn)
+        self._persist_turn(turn)
+        return sql_query, confidence_score
+
+    def _persist_turn(self, messages: list):
+        """Tulis giliran baru ke chat_history di thread pool tanpa menahan respons."""
+        if self._chat_history is None:
+            return
+
+        async def _write():
+            try:
+                await asyncio.get_event_loop().run_in_executor(
+                    None, self._chat_history.add_messages, messages
+                )
+            except Exception as e:
+                logger.error("Failed to persist chat turn for session %s: %s", self.session_id, e)
+
+        task = asyncio.ensure_future(_write())
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def close(self):
+        """Tunggu penulisan riwayat yang masih berjalan sebelum sesi ditutup."""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        logger.info("Conversation session %s closed", self.session_id)
@@ -1,12 +1,89 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, Connection
 from fastapi import HTTPException
 from app.db.database import get_db_connection
 from app.core.config import settings
+from app.services.query_result import QueryResult
+from app.services.query_guard import guard_query, get_query_limits
+from app.utils.singleflight import SingleFlight
+from app.utils.cache import create_cache, create_shared_cache
+from app.utils.metrics import stage_timer
+import contextvars
+import threading
+import hashlib
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Single-flight untuk eksekusi query identik (per datasource dan fingerprint SQL)
+query_flight = SingleFlight("execute_query")
+
+# Cache metadata datasource; id yang tidak ditemukan juga di-cache (negative caching)
+datasource_cache = create_cache(
+    "datasource",
+    max_entries=settings.DATASOURCE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DATASOURCE_CACHE_TTL_SECONDS
+)
+# Penanda string (bukan object()) agar tetap sama setelah melewati backend cache bersama
+_DATASOURCE_NOT_FOUND = "__datasource_not_found__"
+
+# Versi datasource bersama antar worker: diganti setiap invalidasi, dibandingkan dengan
+# versi yang terakhir dilihat worker ini sebelum engine dan cache lokal dipakai ulang
+datasource_versions = create_shared_cache(
+    "datasource_version",
+    max_entries=settings.DATASOURCE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DATASOURCE_VERSION_TTL_SECONDS
+) if settings.DATASOURCE_SHARED_INVALIDATION else None
+_seen_versions: Dict[int, Optional[str]] = {}
+_invalidation_listeners: List[Callable[[int], None]] = []
+
+def on_datasource_invalidated(listener: Callable[[int], None]):
+    """
+    Daftarkan fungsi yang membuang state lokal worker (misal cache konteks) ketika
+    datasource diinvalidasi, baik oleh worker ini maupun worker lain.
+    """
+    _invalidation_listeners.append(listener)
+
+def _invalidate_local(id_datasource: int):
+    datasource_cache.invalidate(id_datasource)
+    dispose_datasource_engine(id_datasource)
+    for listener in _invalidation_listeners:
+        listener(id_datasource)
+
+def sync_datasource_version(id_datasource: int):
+    """
+    Buang state lokal datasource jika worker lain sudah menginvalidasinya, yaitu jika
+    versi bersama berbeda dari versi yang terakhir dilihat worker ini.
+    """
+    if datasource_versions is None:
+        return
+    version = datasource_versions.get(id_datasource)
+    with _registry_lock:
+        if id_datasource not in _seen_versions:
+            _seen_versions[id_datasource] = version
+            return
+        changed = _seen_versions[id_datasource] != version
+        _seen_versions[id_datasource] = version
+    if changed:
+        logger.info("Datasource %s invalidated by another worker", id_datasource)
+        _invalidate_local(id_datasource)
 
 def get_datasource_info(id_datasource: int) -> dict:
     """
     Mengambil detail koneksi datasource dari tabel datasource di database toolsBI.
     
+    Hasil di-cache selama DATASOURCE_CACHE_TTL_SECONDS; id yang tidak ditemukan di-cache
+    selama DATASOURCE_NEGATIVE_CACHE_TTL_SECONDS. Panggil invalidate_datasource setelah
+    datasource diubah.
+    
     Args:
         id_datasource (int): ID unik datasource.
     
@@ -16,6 +93,22 @@ def get_datasource_info(id_datasource: int) -> dict:
     Raises:
         HTTPException: Jika datasource tidak ditemukan.
     """
+    sync_datasource_version(id_datasource)
+    cached = datasource_cache.get(id_datasource)
+    if cached == _DATASOURCE_NOT_FOUND:
+        raise HTTPException(status_code=404, detail=f"Datasource {id_datasource} not found")
+    if cached is not None:
+        return dict(cached)
+
+    info = _fetch_datasource_info(id_datasource)
+    if info is None:
+        datasource_cache.set(id_datasource, _DATASOURCE_NOT_FOUND, ttl_seconds=settings.DATASOURCE_NEGATIVE_CACHE_TTL_SECONDS)
+        raise HTTPException(status_code=404, detail=f"Datasource {id_datasource} not found")
+    datasource_cache.set(id_datasource, info)
+    return dict(info)
+
+def _fetch_datasource_info(id_datasource: int) -> Optional[dict]:
+    """Query tabel datasources; None jika id tidak ditemukan."""
     try:
         with get_db_connection() as conn:
             query = text("""
@@ -25,7 +118,7 @@ def get_datasource_info(id_datasource: int) -> dict:
             """)
             result = conn.execute(query, {"id_datasource": id_datasource}).fetchone()
             if not result:
-                raise HTTPException(status_code=404, detail=f"Datasource {id_datasource} not found")
+                return None
             return {
                 "host": result.host,
                 "port": result.port,
@@ -36,32 +129,366 @@ def get_datasource_info(id_datasource: int) -> dict:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching datasource info: {str(e)}")
 
-def execute_query(query: str, id_datasource: int) -> list[dict]:
+class _Bulkhead:
+    """Batas jumlah query bersamaan pada satu datasource, dengan antrean bertimeout."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def acquire(self, timeout: float) -> bool:
+        with self._lock:
+            self.waiting += 1
+        acquired = self._semaphore.acquire(timeout=timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.active += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+    def reject(self):
+        """Catat penolakan yang terjadi sebelum bulkhead sempat dicoba (antrean executor)."""
+        with self._lock:
+            self.rejected += 1
+
+class QueryHandle:
+    """
+    Handle untuk membatalkan query datasource yang sedang berjalan di thread lain.
+    
+    Thread eksekusi memasang koneksi DBAPI-nya ke handle; cancel() mengirim permintaan
+    pembatalan lewat driver (setara pg_cancel_backend untuk backend tersebut), sehingga
+    query di database pelanggan benar-benar berhenti, bukan hanya ditinggalkan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dbapi_connection = None
+        self.cancelled = False
+
+    def attach(self, conn: Connection):
+        with self._lock:
+            self._dbapi_connection = conn.connection.dbapi_connection
+            cancelled = self.cancelled
+        if cancelled:
+            self._send_cancel()
+
+    def detach(self):
+        with self._lock:
+            self._dbapi_connection = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+        self._send_cancel()
+
+    def _send_cancel(self):
+        with self._lock:
+            dbapi_connection = self._dbapi_connection
+        if dbapi_connection is None:
+            return
+        try:
+            dbapi_connection.cancel()
+            logger.info("Cancel request sent for running datasource query")
+        except Exception as e:
+            logger.warning("Failed to cancel datasource query: %s", e)
+
+_engines: Dict[int, Engine] = {}
+_bulkheads: Dict[int, _Bulkhead] = {}
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_registry_lock = threading.Lock()
+
+def _create_datasource_engine(id_datasource: int) -> Engine:
+    """
+    Membuat engine SQLAlchemy untuk datasource berdasarkan id_datasource.
+    
+    Setiap koneksi memakai statement_timeout, lock_timeout dan transaksi read-only
+    sehingga SQL hasil generasi tidak bisa berjalan tanpa batas atau mengubah data.
+    """
+    datasource_info = get_datasource_info(id_datasource)
+    db_url = (
+        f"postgresql://{datasource_info['user']}:{datasource_info['password']}@"
+        f"{datasource_info['host']}:{datasource_info['port']}/{datasource_info['db_name']}"
+    )
+    options = (
+        f"-c statement_timeout={settings.DATASOURCE_STATEMENT_TIMEOUT_MS} "
+        f"-c lock_timeout={settings.DATASOURCE_LOCK_TIMEOUT_MS} "
+        f"-c default_transaction_read_only=on"
+    )
+    return create_engine(
+        db_url,
+        pool_size=settings.DATASOURCE_MAX_CONCURRENT_QUERIES,
+        max_overflow=0,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        connect_args={"options": options}
+    )
+
+def get_datasource_engine(id_datasource: int) -> Engine:
+    """
+    Engine ber-pool untuk datasource; dibuat sekali lalu dipakai ulang selama
+    datasource tidak diinvalidasi (oleh worker mana pun).
+    """
+    sync_datasource_version(id_datasource)
+    engine = _engines.get(id_datasource)
+    if engine is not None:
+        return engine
+    with _registry_lock:
+        engine = _engines.get(id_datasource)
+        if engine is None:
+            engine = _engines[id_datasource] = _create_datasource_engine(id_datasource)
+        return engine
+
+def dispose_datasource_engine(id_datasource: int):
+    """Tutup pool koneksi datasource, misal setelah kredensialnya berubah."""
+    with _registry_lock:
+        engine = _engines.pop(id_datasource, None)
+    if engine is not None:
+        engine.dispose()
+
+def invalidate_datasource(id_datasource: int):
+    """
+    Buang metadata datasource dari cache dan tutup pool koneksinya, sehingga
+    perubahan host/kredensial langsung dipakai pada request berikutnya.
+    
+    Versi datasource bersama ikut diganti sehingga worker lain di host yang sama
+    membuang engine dan cache lokalnya sebelum dipakai lagi.
+    """
+    if datasource_versions is not None:
+        version = uuid.uuid4().hex
+        datasource_versions.set(id_datasource, version)
+        with _registry_lock:
+            _seen_versions[id_datasource] = version
+    _invalidate_local(id_datasource)
+    logger.info("Datasource %s invalidated", id_datasource)
+
+def _get_bulkhead(id_datasource: int) -> _Bulkhead:
+    bulkhead = _bulkheads.get(id_datasource)
+    if bulkhead is None:
+        with _registry_lock:
+            bulkhead = _bulkheads.setdefault(id_datasource, _Bulkhead(settings.DATASOURCE_MAX_CONCURRENT_QUERIES))
+    return bulkhead
+
+def _get_executor(id_datasource: int) -> ThreadPoolExecutor:
+    executor = _executors.get(id_datasource)
+    if executor is None:
+        with _registry_lock:
+            executor = _executors.get(id_datasource)
+            if executor is None:
+                executor = _executors[id_datasource] = ThreadPoolExecutor(
+                    max_workers=settings.DATASOURCE_MAX_CONCURRENT_QUERIES,
+                    thread_name_prefix=f"datasource-{id_datasource}"
+                )
+    return executor
+
+async def run_on_datasource(id_datasource: int, fn: Callable[..., T], *args) -> T:
     """
-    Mengeksekusi query SQL di database berdasarkan id_datasource.
+    Jalankan pekerjaan blocking yang memakai koneksi datasource dari kode async.
+    
+    Pekerjaan dijalankan di executor milik datasource (sebanyak
+    DATASOURCE_MAX_CONCURRENT_QUERIES thread), bukan executor default, sehingga
+    datasource yang lambat atau penuh hanya mengantrekan pekerjaannya sendiri dan
+    tidak menghabiskan thread yang dipakai bagian lain aplikasi. Pekerjaan yang
+    sudah mengantre lebih lama dari DATASOURCE_QUEUE_TIMEOUT_SECONDS ditolak.
+    
+    Raises:
+        HTTPException: 503 jika pekerjaan terlalu lama mengantre.
+    """
+    submitted_at = time.monotonic()
+
+    def _run():
+        if time.monotonic() - submitted_at > settings.DATASOURCE_QUEUE_TIMEOUT_SECONDS:
+            _get_bulkhead(id_datasource).reject()
+            raise HTTPException(
+                status_code=503,
+                detail=f"Datasource {id_datasource} sedang sibuk, silakan coba lagi."
+            )
+        return fn(*args)
+
+    # copy_context agar log di thread datasource tetap membawa request_id
+    return await asyncio.get_event_loop().run_in_executor(
+        _get_executor(id_datasource), contextvars.copy_context().run, _run
+    )
+
+def shutdown_datasource_executors():
+    """Hentikan executor datasource tanpa menunggu pekerjaan yang masih mengantre."""
+    with _registry_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@contextmanager
+def datasource_connection(id_datasource: int) -> Iterator[Connection]:
+    """
+    Koneksi ke datasource melalui bulkhead per datasource.
+    
+    Raises:
+        HTTPException: 503 jika slot datasource tidak tersedia dalam DATASOURCE_QUEUE_TIMEOUT_SECONDS.
+    """
+    bulkhead = _get_bulkhead(id_datasource)
+    if not bulkhead.acquire(timeout=settings.DATASOURCE_QUEUE_TIMEOUT_SECONDS):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Datasource {id_datasource} sedang sibuk, silakan coba lagi."
+        )
+    try:
+        with get_datasource_engine(id_datasource).connect() as conn:
+            yield conn
+    finally:
+        bulkhead.release()
+
+def warm_datasource_pool(id_datasource: int):
+    """
+    Pastikan engine datasource sudah dibuat dan pool-nya punya koneksi hidup,
+    sehingga request berikutnya tidak membayar biaya koneksi baru.
+    """
+    with datasource_connection(id_datasource) as conn:
+        conn.execute(text("SELECT 1"))
+
+def datasource_pool_stats() -> Dict[int, Dict[str, Any]]:
+    """Pemakaian bulkhead per datasource: query aktif, antrean dan jumlah penolakan."""
+    return {
+        id_datasource: {
+            "limit": bulkhead.limit,
+            "active": bulkhead.active,
+            "pool_checked_out": _engines[id_datasource].pool.checkedout() if id_datasource in _engines else 0,
+            "waiting": bulkhead.waiting,
+            "rejected": bulkhead.rejected
+        }
+        for id_datasource, bulkhead in list(_bulkheads.items())
+    }
+
+def stream_query(
+    query: str,
+    id_datasource: int,
+    batch_size: Optional[int] = None,
+    inject_limit: bool = False,
+    handle: Optional[QueryHandle] = None,
+    row_limit: Optional[int] = None
+) -> Iterator[tuple[list[str], list[tuple]]]:
+    """
+    Mengeksekusi query SQL dengan server-side cursor dan mengembalikan hasil per batch.
+    
+    Memori yang dipakai hanya sebesar satu batch, tidak bergantung pada ukuran hasil.
+    Koneksi ditutup ketika generator habis atau ditutup lebih awal. Query diperiksa
+    lebih dulu oleh cost guard (EXPLAIN) pada koneksi yang sama.
     
     Args:
         query (str): Query SQL yang akan dieksekusi.
         id_datasource (int): ID unik datasource.
+        batch_size (Optional[int]): Jumlah baris per batch (default: QUERY_STREAM_BATCH_SIZE).
+        inject_limit (bool): Tambahkan LIMIT untuk hasil non-agregat (default: False).
+        handle (Optional[QueryHandle]): Handle untuk membatalkan query dari thread lain.
+        row_limit (Optional[int]): LIMIT yang ditambahkan cost guard (default: row_limit datasource).
     
-    Returns:
-        list[dict]: List dari baris data dalam bentuk dictionary.
+    Yields:
+        tuple[list[str], list[tuple]]: (nama kolom, baris pada batch ini). Hasil kosong
+        menghasilkan satu batch kosong agar nama kolom tetap tersedia.
     
     Raises:
         HTTPException: Jika gagal mengeksekusi query.
     """
+    batch_size = batch_size or settings.QUERY_STREAM_BATCH_SIZE
     try:
-        # Ambil detail koneksi dari tabel datasource
-        datasource_info = get_datasource_info(id_datasource)
-        db_url = (
-            f"postgresql://{datasource_info['user']}:{datasource_info['password']}@"
-            f"{datasource_info['host']}:{datasource_info['port']}/{datasource_info['db_name']}"
-        )
-        engine = create_engine(db_url)
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            columns = result.keys()
-            data = [dict(zip(columns, row)) for row in result.fetchall()]
-        return data
+        with datasource_connection(id_datasource) as conn:
+            if handle is not None:
+                handle.attach(conn)
+            try:
+                query = guard_query(conn, query, id_datasource, inject_limit=inject_limit, row_limit=row_limit)
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(text(query))
+                columns = list(result.keys())
+
+                emitted = False
+                for partition in result.partitions(batch_size):
+                    emitted = True
+                    yield columns, partition
+                if not emitted:
+                    yield columns, []
+            finally:
+                if handle is not None:
+                    handle.detach()
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error executing query: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error executing query: {str(e)}")
+
+def fetch_preview(
+    query: str,
+    id_datasource: int,
+    limit: Optional[int] = None,
+    handle: Optional[QueryHandle] = None
+) -> QueryResult:
+    """
+    Mengambil maksimal `limit` baris pertama hasil query menggunakan server-side cursor.
+    
+    Satu baris tambahan diambil untuk mengetahui apakah hasil terpotong; LIMIT yang
+    disuntikkan cost guard ikut disesuaikan sehingga QueryResult.truncated akurat
+    termasuk ketika hasil tepat berjumlah `limit` baris.
+    
+    Args:
+        query (str): Query SQL yang akan dieksekusi.
+        id_datasource (int): ID unik datasource.
+        limit (Optional[int]): Jumlah baris maksimal (default: QUERY_PREVIEW_ROWS, tidak
+            melebihi row_limit cost guard datasource).
+        handle (Optional[QueryHandle]): Handle untuk membatalkan query dari thread lain.
+    
+    Returns:
+        QueryResult: Preview hasil query dalam representasi kolumnar.
+    
+    Raises:
+        HTTPException: Jika gagal mengeksekusi query.
+    """
+    limit = limit or settings.QUERY_PREVIEW_ROWS
+    if settings.QUERY_GUARD_ENABLED:
+        limit = min(limit, int(get_query_limits(id_datasource)["row_limit"]))
+    fetch_limit = limit + 1
+    batch_size = min(fetch_limit, settings.QUERY_STREAM_BATCH_SIZE)
+    columns, data = [], []
+    batches = stream_query(
+        query, id_datasource, batch_size=batch_size, inject_limit=True, handle=handle, row_limit=fetch_limit
+    )
+    try:
+        for columns, rows in batches:
+            data.extend(rows[:fetch_limit - len(data)])
+            if len(data) >= fetch_limit:
+                break
+    finally:
+        batches.close()
+    truncated = len(data) > limit
+    return QueryResult.from_rows(columns, data[:limit], truncated=truncated)
+
+def sql_fingerprint(query: str) -> str:
+    """Fingerprint SQL: hash dari query dengan whitespace dinormalisasi."""
+    return hashlib.sha1(' '.join(query.split()).encode()).hexdigest()
+
+async def fetch_preview_coalesced(query: str, id_datasource: int, limit: Optional[int] = None) -> QueryResult:
+    """
+    Versi async dari fetch_preview yang berjalan di executor datasource. Query identik yang sedang
+    dieksekusi pada datasource yang sama digabungkan sehingga hanya dijalankan sekali.
+    Jika semua pemanggil dibatalkan (misal klien terputus), query di datasource ikut
+    dibatalkan lewat QueryHandle.
+    """
+    limit = limit or settings.QUERY_PREVIEW_ROWS
+    key = (id_datasource, sql_fingerprint(query), limit)
+
+    async def _run():
+        handle = QueryHandle()
+        try:
+            with stage_timer("db_query"):
+                return await run_on_datasource(id_datasource, fetch_preview, query, id_datasource, limit, handle)
+        except asyncio.CancelledError:
+            await asyncio.get_event_loop().run_in_executor(None, handle.cancel)
+            raise
+
+    return await query_flight.do(key, _run)
@@ -0,0 +1,31 @@
+from typing import Any, Optional
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "paraphrase-mpnet-base-v2"  # Dimensi 768
+
+_model: Optional[Any] = None
+_model_lock = threading.Lock()
+
+def get_embedding_model():
+    """
+    Model SentenceTransformer yang dipakai bersama oleh knowledge retrieval dan /knowledge/embed.
+
+    Import sentence_transformers (torch) dan pemuatan bobot model ditunda sampai pemakaian
+    pertama, atau dilakukan di proses master lewat preload_models() sebelum fork agar bobotnya
+    dibagi copy-on-write oleh semua worker.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                try:
+                    _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                except Exception as e:
+                    logger.error(f"Failed to load SentenceTransformer model: {e}")
+                    raise
+                logger.info(f"Successfully loaded {EMBEDDING_MODEL_NAME} model")
+    return _model
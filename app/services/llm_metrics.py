@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from app.utils.metrics import metrics
+import threading
+import time
+
+LLM_REQUESTS = metrics.counter("llm_requests_total", "Jumlah panggilan LLM", ["purpose", "outcome"])
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Token LLM menurut usage metadata Gemini", ["purpose", "kind"])
+LLM_DURATION = metrics.histogram("llm_request_duration_seconds", "Durasi panggilan LLM (tanpa waktu antre scheduler)", ["purpose"])
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    Callback LangChain yang mencatat jumlah panggilan, durasi dan token Gemini per tujuan
+    (sql, analysis, chart). Dipasang di konstruktor LLM sehingga berlaku untuk semua chain.
+    Token diambil dari usage_metadata hasil generasi; panggilan streaming tidak membawa
+    usage metadata sehingga hanya dihitung jumlah dan durasinya.
+    """
+
+    def __init__(self, purpose: str):
+        self.purpose = purpose
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id: UUID, outcome: str):
+        with self._lock:
+            started: Optional[float] = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_DURATION.observe(time.perf_counter() - started, purpose=self.purpose)
+        LLM_REQUESTS.inc(purpose=self.purpose, outcome=outcome)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, "success")
+        for generations in response.generations:
+            for generation in generations:
+                usage = (generation.generation_info or {}).get("usage_metadata") or {}
+                if usage.get("input_tokens"):
+                    LLM_TOKENS.inc(usage["input_tokens"], purpose=self.purpose, kind="input")
+                if usage.get("output_tokens"):
+                    LLM_TOKENS.inc(usage["output_tokens"], purpose=self.purpose, kind="output")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, "error")
+
+# Satu handler per tujuan panggilan
+sql_usage_callback = LLMUsageCallback("sql")
+analysis_usage_callback = LLMUsageCallback("analysis")
+chart_usage_callback = LLMUsageCallback("chart")
@@ -0,0 +1,277 @@
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from app.core.config import settings
+from app.utils.metrics import metrics, record_stage
+import itertools
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Kelas prioritas: angka lebih kecil dilayani lebih dulu
+PRIORITY_INTERACTIVE = 0   # Generasi SQL yang ditunggu pengguna
+PRIORITY_CHART = 1         # Rekomendasi diagram
+PRIORITY_BACKGROUND = 2    # Analisis data
+
+ANONYMOUS = "anonymous"
+
+# Interval minimum antar pembersihan state tenant yang sudah idle
+IDLE_SWEEP_INTERVAL_SECONDS = 60.0
+
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_CHART: "chart", PRIORITY_BACKGROUND: "background"}
+
+QUEUE_WAIT = metrics.histogram("llm_queue_wait_seconds", "Waktu tunggu di antrean LLM scheduler", ["priority"])
+
+class _TokenBucket:
+    """Token bucket sederhana; rate <= 0 berarti tanpa batas."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """Detik sampai satu token tersedia (0 jika tersedia sekarang)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def is_full(self) -> bool:
+        """Bucket penuh: setara bucket baru sehingga aman dibuang."""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        return self.tokens >= self.capacity
+
+class _Waiter:
+    __slots__ = ("future", "tenant", "priority", "finish_tag", "seq", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, tenant: Hashable, priority: int, finish_tag: float, seq: int):
+        self.future = future
+        self.tenant = tenant
+        self.priority = priority
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+
+class LLMScheduler:
+    """
+    Admission control untuk semua panggilan Gemini.
+
+    Menerapkan batas konkurensi dan rate global maupun per user_id, antrean
+    weighted fair queuing antar user (setiap user punya virtual finish tag sehingga
+    user yang mengirim banyak request tidak menyalip user lain), dan kelas prioritas
+    di mana generasi SQL interaktif selalu didahulukan dari analisis latar belakang.
+
+    Request tanpa user_id dihitung sebagai satu tenant ANONYMOUS dengan batas
+    konkurensi dan rate sendiri. State per tenant dibuang begitu tenant idle (tanpa
+    slot aktif maupun antrean dan bucket rate-nya penuh) agar tidak tumbuh tanpa batas.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        per_user_concurrency: int,
+        rate_per_second: float = 0,
+        per_user_rate_per_second: float = 0,
+        queue_timeout: Optional[float] = None,
+        anonymous_concurrency: Optional[int] = None,
+        anonymous_rate_per_second: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.per_user_rate_per_second = per_user_rate_per_second
+        self.anonymous_concurrency = anonymous_concurrency if anonymous_concurrency is not None else per_user_concurrency
+        self.anonymous_rate_per_second = (
+            anonymous_rate_per_second if anonymous_rate_per_second is not None else per_user_rate_per_second
+        )
+        self.queue_timeout = queue_timeout
+        self._rate = _TokenBucket(rate_per_second)
+        self._user_rates: Dict[Hashable, _TokenBucket] = {}
+        self._waiters: List[_Waiter] = []
+        self._active = 0
+        self._user_active: Dict[Hashable, int] = {}
+        self._user_finish: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._last_sweep = time.monotonic()
+        self.granted = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+
+    def _user_bucket(self, tenant: Hashable) -> _TokenBucket:
+        bucket = self._user_rates.get(tenant)
+        if bucket is None:
+            rate = self.anonymous_rate_per_second if tenant == ANONYMOUS else self.per_user_rate_per_second
+            bucket = self._user_rates[tenant] = _TokenBucket(rate)
+        return bucket
+
+    def _eligible(self, waiter: _Waiter) -> bool:
+        limit = self.anonymous_concurrency if waiter.tenant == ANONYMOUS else self.per_user_concurrency
+        return self._user_active.get(waiter.tenant, 0) < limit
+
+    def _evict_idle(self, tenants: Iterable[Hashable]):
+        """Buang finish tag dan bucket tenant tanpa slot aktif, antrean, maupun token terpakai."""
+        queued = {w.tenant for w in self._waiters if not w.future.done()}
+        for tenant in list(tenants):
+            if tenant in self._user_active or tenant in queued:
+                continue
+            bucket = self._user_rates.get(tenant)
+            if bucket is not None and not bucket.is_full():
+                continue
+            # Finish tag tenant idle tidak melebihi virtual time, jadi aman dihitung ulang dari nol
+            self._user_rates.pop(tenant, None)
+            self._user_finish.pop(tenant, None)
+
+    def _sweep_idle(self):
+        """Sesekali periksa semua tenant, termasuk yang bucket-nya belum penuh saat slot terakhir dilepas."""
+        now = time.monotonic()
+        if now - self._last_sweep < IDLE_SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        self._evict_idle(set(self._user_finish) | set(self._user_rates))
+
+    def _dispatch(self):
+        """Berikan slot ke waiter berikutnya selama kapasitas dan rate masih tersedia."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        retry_after = None
+        while self._active < self.max_concurrency and self._waiters:
+            global_delay = self._rate.delay()
+            if global_delay > 0:
+                retry_after = global_delay
+                break
+
+            candidates = sorted(
+                (w for w in self._waiters if self._eligible(w)),
+                key=lambda w: (w.priority, w.finish_tag, w.seq)
+            )
+            chosen = None
+            for waiter in candidates:
+                user_delay = self._user_bucket(waiter.tenant).delay()
+                if user_delay > 0:
+                    retry_after = user_delay if retry_after is None else min(retry_after, user_delay)
+                    continue
+                chosen = waiter
+                break
+            if chosen is None:
+                break
+
+            self._waiters.remove(chosen)
+            self._rate.take()
+            self._user_bucket(chosen.tenant).take()
+            self._active += 1
+            self._user_active[chosen.tenant] = self._user_active.get(chosen.tenant, 0) + 1
+            self._virtual_time = max(self._virtual_time, chosen.finish_tag)
+            self.granted += 1
+            self.total_wait_seconds += time.monotonic() - chosen.enqueued_at
+            chosen.future.set_result(True)
+
+        if retry_after is not None and self._waiters:
+            self._wakeup = asyncio.get_event_loop().call_later(retry_after, self._dispatch)
+
+    async def acquire(self, user_id: Optional[Hashable] = None, priority: int = PRIORITY_INTERACTIVE, weight: float = 1.0):
+        """
+        Tunggu giliran untuk memanggil LLM.
+
+        Raises:
+            HTTPException: 503 jika menunggu di antrean melebihi batas waktu.
+        """
+        tenant = user_id if user_id is not None else ANONYMOUS
+        self._sweep_idle()
+        finish_tag = max(self._virtual_time, self._user_finish.get(tenant, 0.0)) + 1.0 / max(weight, 1e-6)
+        self._user_finish[tenant] = finish_tag
+        waiter = _Waiter(asyncio.get_event_loop().create_future(), tenant, priority, finish_tag, next(self._seq))
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.timeouts += 1
+            raise HTTPException(status_code=503, detail="Layanan LLM sedang sibuk, silakan coba lagi.")
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        waited = time.monotonic() - waiter.enqueued_at
+        QUEUE_WAIT.observe(waited, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        record_stage("llm_queue", waited)
+        return tenant
+
+    def _abandon(self, waiter: _Waiter):
+        """Keluarkan waiter dari antrean; kembalikan slot jika sudah terlanjur diberikan."""
+        if waiter.future.done() and not waiter.future.cancelled():
+            self.release(waiter.tenant)
+        else:
+            waiter.future.cancel()
+            self._dispatch()
+            self._evict_idle([waiter.tenant])
+
+    def release(self, tenant: Hashable):
+        """Kembalikan slot dan layani waiter berikutnya."""
+        self._active -= 1
+        remaining = self._user_active.get(tenant, 1) - 1
+        if remaining > 0:
+            self._user_active[tenant] = remaining
+        else:
+            self._user_active.pop(tenant, None)
+        self._dispatch()
+        self._evict_idle([tenant])
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[Hashable] = None, priority: int = PRIORITY_INTERACTIVE, weight: float = 1.0):
+        """Context manager untuk memegang satu slot LLM selama panggilan berlangsung."""
+        tenant = await self.acquire(user_id, priority, weight)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrik antrean: kedalaman per prioritas, slot aktif, jumlah grant/timeout dan rata-rata tunggu."""
+        pending = [w for w in self._waiters if not w.future.done()]
+        depth_by_priority: Dict[int, int] = {}
+        for waiter in pending:
+            depth_by_priority[waiter.priority] = depth_by_priority.get(waiter.priority, 0) + 1
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(pending),
+            "queue_depth_by_priority": {
+                name: depth_by_priority.get(priority, 0) for priority, name in PRIORITY_NAMES.items()
+            },
+            "active_users": len(self._user_active),
+            "tracked_tenants": len(self._user_finish),
+            "granted": self.granted,
+            "timeouts": self.timeouts,
+            "avg_wait_seconds": self.total_wait_seconds / self.granted if self.granted else 0.0
+        }
+
+# Global instance
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    per_user_concurrency=settings.LLM_PER_USER_CONCURRENCY,
+    rate_per_second=settings.LLM_RATE_PER_SECOND,
+    per_user_rate_per_second=settings.LLM_PER_USER_RATE_PER_SECOND,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    anonymous_concurrency=settings.LLM_ANONYMOUS_CONCURRENCY,
+    anonymous_rate_per_second=settings.LLM_ANONYMOUS_RATE_PER_SECOND
+)
@@ -1,22 +1,81 @@
+from typing import AsyncIterator, Optional
 from langchain_google_genai import GoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from app.core.config import settings
+from app.services.query_result import QueryResult
+from app.services.profiling_service import build_analysis_input
+from app.utils.cache import create_cache
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_BACKGROUND
+from app.services.llm_metrics import analysis_usage_callback
 
-def analyze_data_with_llm(data: list[dict]) -> str:
+# Naikkan versi setiap kali ANALYSIS_PROMPT berubah agar cache lama tidak dipakai
+ANALYSIS_PROMPT_VERSION = "3"
+
+analysis_cache = create_cache(
+    "analysis",
+    max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS
+)
+
+ANALYSIS_PROMPT = PromptTemplate(
+    input_variables=["profile", "sample"],
+    template="Anda adalah analis data profesional. Berikut ringkasan statistik hasil query:\n{profile}\n\nSampel beberapa baris pertama dalam format list of dictionaries: {sample}\n\nBerikan analisis tekstual yang sangat singkat dan langsung ke intinya. Fokus pada nilai tertinggi, total, atau tren utama yang terlihat dalam data. Jika ringkasan menyebut hasil terpotong, sampaikan bahwa analisis hanya mencakup sebagian baris dan jangan menyebut total sebagai total keseluruhan. Jika data hanya satu entri, sampaikan nilai tersebut. Jika data kosong, beri pesan 'Tidak ada data untuk dianalisis.'"
+)
+
+def analysis_cache_key(data: QueryResult) -> str:
+    """Kunci cache analisis: hash konten hasil query ditambah versi template prompt."""
+    return f"{ANALYSIS_PROMPT_VERSION}:{data.fingerprint()}"
+
+async def analyze_data_with_llm(data: QueryResult, user_id: Optional[int] = None) -> str:
     """
     Menganalisis data menggunakan LLM dan mengembalikan teks analisis.
+    LLM menerima profil statistik hasil query dan sampel kecil, bukan seluruh baris.
+    Hasil disimpan di cache berdasarkan hash data, sehingga data identik tidak
+    memicu panggilan Gemini kedua selama TTL berlaku. Panggilan LLM melewati
+    llm_scheduler dengan prioritas background.
     
     Args:
-        data (list[dict]): Data yang akan dianalisis.
+        data (QueryResult): Data yang akan dianalisis.
+        user_id (Optional[int]): ID user untuk fair queuing LLM (opsional).
     
     Returns:
         str: Teks analisis dari LLM.
     """
-    llm = GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=settings.GOOGLE_API_KEY)
-    prompt_template = PromptTemplate(
-        input_variables=["data"],
-        template="Anda adalah analis data profesional. Berdasarkan data berikut dalam format list of dictionaries: {data}, berikan analisis tekstual yang sangat singkat dan langsung ke intinya. Fokus pada nilai tertinggi, total, atau tren utama yang terlihat dalam data. Jika data hanya satu entri, sampaikan nilai tersebut. Jika data kosong, beri pesan 'Tidak ada data untuk dianalisis.'"
-    )
-    chain = prompt_template | llm
-    result = chain.invoke({"data": str(data)})
-    return result.strip()
\ No newline at end of file
+    cache_key = analysis_cache_key(data)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    llm = GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=settings.GOOGLE_API_KEY, callbacks=[analysis_usage_callback])
+    chain = ANALYSIS_PROMPT | llm
+    async with llm_scheduler.slot(user_id, PRIORITY_BACKGROUND):
+        result = (await chain.ainvoke(build_analysis_input(data))).strip()
+    analysis_cache.set(cache_key, result)
+    return result
+
+async def stream_analysis_with_llm(data: QueryResult, user_id: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Menganalisis data menggunakan LLM dan mengalirkan teks analisis per potongan token.
+    
+    Args:
+        data (QueryResult): Data yang akan dianalisis.
+        user_id (Optional[int]): ID user untuk fair queuing LLM (opsional).
+    
+    Yields:
+        str: Potongan teks analisis segera setelah diterima dari LLM.
+    """
+    cache_key = analysis_cache_key(data)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    llm = GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=settings.GOOGLE_API_KEY, callbacks=[analysis_usage_callback])
+    chain = ANALYSIS_PROMPT | llm
+    chunks = []
+    async with llm_scheduler.slot(user_id, PRIORITY_BACKGROUND):
+        async for chunk in chain.astream(build_analysis_input(data)):
+            if chunk:
+                chunks.append(chunk)
+                yield chunk
+    analysis_cache.set(cache_key, "".join(chunks).strip())
@@ -1,34 +1,70 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Hashable, Set, Tuple
 from langchain_google_genai import GoogleGenerativeAI
 from langchain.prompts import PromptTemplate, ChatPromptTemplate, MessagesPlaceholder
 from langchain.chains import LLMChain
-from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from app.core.config import settings
-from app.db.utils import get_table_schema, get_table_sample_data
+from app.db.utils import get_table_schema, get_table_sample_data, get_schema_fingerprint
 from app.db.chat_database import get_chat_database
-from app.services.db_services import get_datasource_info
+from app.services.db_services import get_datasource_info, run_on_datasource, on_datasource_invalidated, sync_datasource_version
 from app.utils.session_utils import validate_or_generate_session_id
+from app.utils.singleflight import SingleFlight
+from app.utils.cache import create_cache
+from app.services.context_store import context_store
+from app.services.context_prefetcher import context_prefetcher
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+from app.services.llm_metrics import sql_usage_callback
+from app.utils.metrics import stage_timer
 import sqlparse
+import threading
+import hashlib
+import json
+import time
 import re
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Single-flight untuk introspeksi skema per datasource dan generasi SQL identik
+context_flight = SingleFlight("context")
+sql_flight = SingleFlight("generate_sql")
+
+# Konteks per (id_datasource, tabel); entri berlaku sampai perlu divalidasi ulang.
+# Konteks membawa sampel data mentah, jadi hanya boleh di backend disk jika snapshot
+# juga diizinkan menyimpan sampel
+context_cache = create_cache(
+    "context",
+    max_entries=settings.CONTEXT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CONTEXT_REVALIDATE_SECONDS,
+    allow_shared=settings.CONTEXT_SNAPSHOT_INCLUDE_SAMPLES
+)
+_revalidating: Set[Hashable] = set()
+_background_tasks: Set[asyncio.Task] = set()
+# Konteks hasil preload tanpa sampel data: key -> batas waktu segar (time.monotonic)
+_samples_pending: Dict[Tuple, float] = {}
+
+def _context_key(id_datasource: int, table_names: Optional[List[str]]) -> Tuple:
+    return (id_datasource, tuple(sorted(table_names)) if table_names else None)
+
+def _snapshot_key(key: Tuple) -> str:
+    return json.dumps([key[0], list(key[1]) if key[1] else None])
+
+def _context_version(schema_info: str, sample_data: str) -> str:
+    return hashlib.sha1((schema_info + sample_data).encode()).hexdigest()[:16]
+
 class NL2SQLService:
     def __init__(self):
         # Inisialisasi model Gemini
         self.llm = GoogleGenerativeAI(
             model="gemini-2.0-flash",
             google_api_key=settings.GOOGLE_API_KEY,
-            temperature=0.1  # Rendah untuk hasil yang lebih deterministik
+            temperature=0.1,  # Rendah untuk hasil yang lebih deterministik
+            callbacks=[sql_usage_callback]
         )
         
-        # Get chat database manager
-        self.chat_db = get_chat_database()
-        
         # Template prompt yang ditingkatkan untuk BI dengan chat history
         self.chat_prompt_template = ChatPromptTemplate.from_messages([
             ("system", """Anda adalah asisten Business Intelligence yang ahli dalam mengonversi pertanyaan bahasa alami dalam bahasa Indonesia menjadi query SQL yang valid dan efisien untuk PostgreSQL. Tujuan Anda adalah menghasilkan query SQL yang dapat digunakan untuk analisis data dan visualisasi Business Intelligence.
@@ -97,26 +133,6 @@ SQL Query:"""
         # Fallback chain untuk non-chat mode
         self.fallback_chain = LLMChain(llm=self.llm, prompt=self.prompt_template)
 
-    def _get_chat_history_runnable(self, session_id: str):
-        """Create a runnable with message history for a specific session"""
-        try:
-            def get_session_history(session_id: str):
-                return self.chat_db.get_chat_history(session_id)
-            
-            # Create runnable with message history
-            with_message_history = RunnableWithMessageHistory(
-                self.chain,
-                get_session_history,
-                input_messages_key="user_prompt",
-                history_messages_key="history",
-            )
-            
-            return with_message_history
-            
-        except Exception as e:
-            logger.error(f"Failed to create chat history runnable: {e}")
-            return None
-
     def _format_schema_info(self, schema: List[dict]) -> str:
         """Format informasi skema database menjadi string yang mudah dibaca."""
         schema_text = "STRUKTUR DATABASE:\n"
@@ -166,12 +182,206 @@ SQL Query:"""
             formatted_query = ' '.join(formatted_query.split())
         return formatted_query.strip()
 
+    def build_context(self, id_datasource: int, table_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Membangun konteks database (nama database, skema, sampel data) untuk sebuah datasource.
+        
+        Args:
+            id_datasource: ID unik datasource
+            table_names: List nama tabel yang relevan (opsional)
+            
+        Returns:
+            Dict[str, Any]: db_name, schema_info, sample_data, tables (nama tabel yang
+            disampel), has_table_filter dan version (hash konteks, dipakai sebagai versi skema)
+        """
+        # Ambil informasi datasource
+        datasource_info = get_datasource_info(id_datasource)
+        
+        # Dapatkan informasi skema database
+        schema = get_table_schema(id_datasource=id_datasource)
+        
+        # Filter tabel jika table_names disediakan
+        if table_names:
+            schema = [s for s in schema if s['table_name'] in table_names]
+
+        # Format informasi skema
+        schema_info = self._format_schema_info(schema)
+        
+        # Dapatkan sampel data untuk setiap tabel
+        tables = [table['table_name'] for table in schema]
+        sample_data = self._build_sample_data(id_datasource, tables)
+
+        return {
+            "db_name": datasource_info['db_name'],
+            "schema_info": schema_info,
+            "sample_data": sample_data,
+            "tables": tables,
+            "has_table_filter": bool(table_names),
+            "version": _context_version(schema_info, sample_data)
+        }
+
+    def _build_sample_data(self, id_datasource: int, tables: List[str]) -> str:
+        sample_data = ""
+        for table_name in tables:
+            table_data = get_table_sample_data(table_name, id_datasource=id_datasource, limit=3)
+            sample_data += self._format_sample_data(table_name, table_data)
+        return sample_data
+
+    def _snapshot_context(self, key: Tuple, id_datasource: int, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Konteks dari snapshot disk. Snapshot tanpa sampel data (default) dilengkapi dengan
+        sampel dari konteks di memori jika skemanya sama, atau diambil ulang dari datasource.
+        """
+        context = snapshot["context"]
+        if "sample_data" in context:
+            return context
+        cached = context_cache.get(key)
+        if (
+            cached is not None
+            and cached.get("schema_info") == context["schema_info"]
+            and "sample_data" in cached
+            and not cached.get("samples_pending")
+        ):
+            sample_data = cached["sample_data"]
+        else:
+            sample_data = self._build_sample_data(id_datasource, context["tables"])
+        return {**context, "sample_data": sample_data, "version": _context_version(context["schema_info"], sample_data)}
+
+    def _fill_pending_samples(self, key: Tuple, id_datasource: int, fresh_until: float):
+        """Lengkapi konteks hasil preload dengan sampel data, jika masih di cache dan masih segar."""
+        context = context_cache.get(key)
+        fresh_for = fresh_until - time.monotonic()
+        if context is None or not context.get("samples_pending") or fresh_for <= 0:
+            return
+        sample_data = self._build_sample_data(id_datasource, context["tables"])
+        context = {k: v for k, v in context.items() if k != "samples_pending"}
+        context.update(sample_data=sample_data, version=_context_version(context["schema_info"], sample_data))
+        context_cache.set(key, context, ttl_seconds=fresh_for)
+
+    def _build_and_store_context(self, key: Tuple, id_datasource: int, table_names: Optional[List[str]], fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """Bangun konteks dari datasource lalu simpan ke cache memori dan snapshot disk."""
+        if context_store is not None and fingerprint is None:
+            # Fingerprint diambil sebelum build agar perubahan skema di tengah build tetap terdeteksi
+            fingerprint = get_schema_fingerprint(id_datasource)
+        context = self.build_context(id_datasource, table_names)
+        context_cache.set(key, context)
+        if context_store is not None:
+            context_store.save(_snapshot_key(key), id_datasource, fingerprint, context)
+        return context
+
+    def _load_context(self, key: Tuple, id_datasource: int, table_names: Optional[List[str]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Ambil konteks dari snapshot disk, atau bangun baru jika belum ada.
+
+        Returns:
+            tuple[Dict, bool]: (konteks, perlu divalidasi ulang di latar belakang)
+        """
+        if context_store is not None:
+            snapshot = context_store.load(_snapshot_key(key))
+            if snapshot is not None:
+                context = self._snapshot_context(key, id_datasource, snapshot)
+                fresh_for = snapshot["validated_at"] + settings.CONTEXT_REVALIDATE_SECONDS - time.time()
+                if fresh_for > 0:
+                    context_cache.set(key, context, ttl_seconds=fresh_for)
+                    return context, False
+                # Snapshot lama tetap dipakai (stale-while-revalidate)
+                context_cache.set(key, context)
+                return context, True
+        return self._build_and_store_context(key, id_datasource, table_names), False
+
+    def _revalidate_context(self, key: Tuple, id_datasource: int, table_names: Optional[List[str]], skip_if_validated_within: float = 0):
+        """
+        Cocokkan fingerprint skema datasource dengan snapshot. Konteks dibangun ulang jika
+        skema berubah atau snapshot lebih tua dari CONTEXT_SNAPSHOT_MAX_AGE_SECONDS
+        (agar sampel data ikut diperbarui). Snapshot yang divalidasi dalam
+        skip_if_validated_within detik terakhir (misal oleh worker lain) dipakai tanpa
+        query ke datasource.
+        """
+        if context_store is None:
+            self._build_and_store_context(key, id_datasource, table_names)
+            return
+        snapshot_key = _snapshot_key(key)
+        snapshot = context_store.load(snapshot_key)
+        if snapshot is not None and time.time() - snapshot["validated_at"] < skip_if_validated_within:
+            context_cache.set(key, self._snapshot_context(key, id_datasource, snapshot))
+            return
+        fingerprint = get_schema_fingerprint(id_datasource)
+        if (
+            snapshot is not None
+            and snapshot["fingerprint"] == fingerprint
+            and time.time() - snapshot["built_at"] < settings.CONTEXT_SNAPSHOT_MAX_AGE_SECONDS
+        ):
+            context_store.mark_validated(snapshot_key)
+            context_cache.set(key, self._snapshot_context(key, id_datasource, snapshot))
+            return
+        logger.info("Rebuilding context snapshot for datasource %s", id_datasource)
+        self._build_and_store_context(key, id_datasource, table_names, fingerprint)
+
+    async def refresh_context(self, id_datasource: int, table_names: Optional[List[str]] = None, skip_if_validated_within: float = 0) -> bool:
+        """
+        Validasi ulang (atau bangun ulang) konteks di thread pool tanpa menunggu request.
+        
+        Returns:
+            bool: False jika refresh untuk konteks yang sama sedang berjalan.
+        """
+        key = _context_key(id_datasource, table_names)
+        if key in _revalidating:
+            return False
+        _revalidating.add(key)
+        try:
+            await run_on_datasource(
+                id_datasource, self._revalidate_context, key, id_datasource, table_names, skip_if_validated_within
+            )
+        finally:
+            _revalidating.discard(key)
+        return True
+
+    def _schedule_revalidation(self, id_datasource: int, table_names: Optional[List[str]]):
+        async def _run():
+            try:
+                await self.refresh_context(id_datasource, table_names)
+            except Exception as e:
+                logger.warning("Failed to revalidate context for datasource %s: %s", id_datasource, e)
+
+        task = asyncio.get_running_loop().create_task(_run())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def get_context(self, id_datasource: int, table_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Ambil konteks datasource: dari cache memori, lalu snapshot disk, lalu build baru di
+        thread pool. Permintaan konteks identik yang sedang berjalan untuk datasource yang
+        sama digabungkan (single-flight). Snapshot yang sudah lewat CONTEXT_REVALIDATE_SECONDS
+        langsung dipakai dan divalidasi ulang di latar belakang.
+        """
+        key = _context_key(id_datasource, table_names)
+        context_prefetcher.touch(id_datasource, table_names)
+        sync_datasource_version(id_datasource)
+        with stage_timer("context"):
+            context = context_cache.get(key)
+            if context is not None:
+                return context
+            context, stale = await context_flight.do(
+                key,
+                lambda: run_on_datasource(id_datasource, self._load_context, key, id_datasource, table_names)
+            )
+        if stale:
+            self._schedule_revalidation(id_datasource, table_names)
+        return context
+
+    def _apply_table_hint(self, prompt: str, context: Dict[str, Any]) -> str:
+        """Tambahkan instruksi pemilihan tabel jika table_names tidak disediakan."""
+        if context["has_table_filter"]:
+            return prompt
+        return f"{prompt} (pilih tabel yang paling relevan dari skema yang diberikan)"
+
     async def generate_sql(
         self,
         prompt: str,
         id_datasource: int,
         table_names: Optional[List[str]] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None
     ) -> tuple[str, float]:
         """
         Menghasilkan query SQL dari prompt bahasa natural.
@@ -181,92 +391,141 @@ SQL Query:"""
             id_datasource: ID unik datasource
             table_names: List nama tabel yang relevan (opsional)
             session_id: ID sesi chat untuk context history (opsional)
+            user_id: ID user untuk fair queuing LLM (opsional)
             
         Returns:
             tuple[str, float]: (SQL query yang dihasilkan, skor kepercayaan)
         """
         try:
-            # Ambil informasi datasource
-            datasource_info = get_datasource_info(id_datasource)
-            db_name = datasource_info['db_name']
-            
             # Validate or generate session_id as UUID
             valid_session_id = validate_or_generate_session_id(session_id)
-            logger.info(f"Using session_id: {valid_session_id} (original: {session_id})")
-            
-            # Dapatkan informasi skema database
-            schema = get_table_schema(id_datasource=id_datasource)
+            logger.debug("Using session_id %s (original: %s)", valid_session_id, session_id)
             
-            # Filter tabel jika table_names disediakan
-            if table_names:
-                schema = [s for s in schema if s['table_name'] in table_names]
-            # Jika table_names tidak disediakan, gunakan semua tabel dan tambahkan instruksi ke prompt
-            else:
-                original_prompt = prompt
-                prompt = f"{prompt} (pilih tabel yang paling relevan dari skema yang diberikan)"
-
-            # Format informasi skema
-            schema_info = self._format_schema_info(schema)
-            
-            # Dapatkan sampel data untuk setiap tabel
-            sample_data = ""
-            for table in schema:
-                table_data = get_table_sample_data(table['table_name'], id_datasource=id_datasource, limit=3)
-                sample_data += self._format_sample_data(table['table_name'], table_data)
-
-            # Use chat history if session_id provided
-            if valid_session_id:
-                sql_query, confidence_score = await self._generate_with_history(
-                    prompt, db_name, schema_info, sample_data, valid_session_id
-                )
-            else:
-                sql_query, confidence_score = await self._generate_without_history(
-                    prompt, db_name, schema_info, sample_data
+            context = await self.get_context(id_datasource, table_names)
+            db_name = context["db_name"]
+            schema_info = context["schema_info"]
+            sample_data = context["sample_data"]
+            prompt = self._apply_table_hint(prompt, context)
+
+            async def _generate():
+                # Use chat history if session_id provided
+                if valid_session_id:
+                    return await self._generate_with_history(
+                        prompt, db_name, schema_info, sample_data, valid_session_id, user_id
+                    )
+                return await self._generate_without_history(
+                    prompt, db_name, schema_info, sample_data, user_id
                 )
+
+            # Prompt identik pada datasource dan versi skema yang sama digabungkan;
+            # session_id dari klien ikut menjadi key karena riwayatnya memengaruhi hasil
+            flight_key = (prompt, id_datasource, context["version"], session_id)
+            sql_query, confidence_score = await sql_flight.do(flight_key, _generate)
                 
             return sql_query, confidence_score
                 
         except Exception as e:
-            logger.error(f"Error in generate_sql: {e}")
+            logger.error("Error in generate_sql: %s", e)
             raise
 
+    async def generate_sql_from_context(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        history: Optional[List[BaseMessage]] = None,
+        user_id: Optional[int] = None
+    ) -> tuple[str, float]:
+        """
+        Menghasilkan query SQL dari konteks yang sudah dibangun sebelumnya.
+        
+        Dipakai oleh batch konversi yang berbagi satu konteks untuk banyak prompt,
+        sehingga skema dan sampel data tidak dimuat ulang setiap prompt.
+        
+        Args:
+            prompt: Prompt dalam bahasa Indonesia
+            context: Konteks hasil build_context
+            history: Riwayat pesan terakhir (opsional)
+            user_id: ID user untuk fair queuing LLM (opsional)
+            
+        Returns:
+            tuple[str, float]: (SQL query yang dihasilkan, skor kepercayaan)
+        """
+        sql_query, confidence, _ = await self.generate_turn_from_context(prompt, context, history, user_id)
+        return sql_query, confidence
+
+    async def generate_turn_from_context(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        history: Optional[List[BaseMessage]] = None,
+        user_id: Optional[int] = None
+    ) -> tuple[str, float, List[BaseMessage]]:
+        """
+        Seperti generate_sql_from_context, ditambah pesan giliran untuk riwayat.
+        
+        Dipakai oleh sesi percakapan yang menyimpan konteks dan riwayat di memori.
+        Pesan giliran berformat sama dengan yang disimpan _generate_with_history
+        (prompt dengan petunjuk tabel dan respons mentah model), sehingga riwayat dari
+        WebSocket dan HTTP bisa dipakai bergantian dalam satu sesi.
+        
+        Returns:
+            tuple[str, float, List[BaseMessage]]: (SQL query, skor kepercayaan, pesan giliran)
+        """
+        prompt = self._apply_table_hint(prompt, context)
+        async with llm_scheduler.slot(user_id, PRIORITY_INTERACTIVE):
+            with stage_timer("llm_sql"):
+                raw_response = await self.chain.ainvoke({
+                    "user_prompt": prompt,
+                    "database_name": context["db_name"],
+                    "schema_info": context["schema_info"],
+                    "sample_data": context["sample_data"],
+                    "history": history or []
+                })
+        cleaned_sql = self._clean_sql_query(raw_response, single_line=False)
+        confidence = self._calculate_confidence(cleaned_sql, context["schema_info"])
+        return cleaned_sql, confidence, self._history_turn(prompt, raw_response)
+
+    def _history_turn(self, prompt: str, raw_response: str) -> List[BaseMessage]:
+        """Pesan satu giliran untuk chat_history, sama seperti yang disimpan RunnableWithMessageHistory."""
+        return [HumanMessage(content=prompt), AIMessage(content=raw_response)]
+
     async def _generate_with_history(
         self, 
         prompt: str, 
         db_name: str, 
         schema_info: str, 
         sample_data: str, 
-        session_id: str
+        session_id: str,
+        user_id: Optional[int] = None
     ) -> tuple[str, float]:
-        """Generate SQL with chat history context"""
+        """
+        Generate SQL with chat history context.
+        
+        History is loaded and saved in the thread pool (the chat history store only has a
+        sync connection), while the LLM call itself is awaited directly so it is cancelled
+        together with the request.
+        """
         try:
-            # Get runnable with message history - run sync operation in thread pool
-            with_history = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                self._get_chat_history_runnable, 
-                session_id
-            )
-            
-            if not with_history:
-                logger.warning("Failed to create chat history runnable, falling back to no-history mode")
-                return await self._generate_without_history(prompt, db_name, schema_info, sample_data)
+            loop = asyncio.get_event_loop()
+            with stage_timer("history_load"):
+                chat_history = await loop.run_in_executor(None, get_chat_database().get_chat_history, session_id)
+                history_messages = await loop.run_in_executor(None, lambda: chat_history.messages)
             
             # Prepare input for the chain
             input_data = {
                 "user_prompt": prompt,
                 "database_name": db_name,
                 "schema_info": schema_info,
-                "sample_data": sample_data
+                "sample_data": sample_data,
+                "history": history_messages
             }
             
-            # Invoke with session context - run sync operation in thread pool
-            raw_response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: with_history.invoke(
-                    input_data,
-                    config={"configurable": {"session_id": session_id}}
-                )
-            )
+            async with llm_scheduler.slot(user_id, PRIORITY_INTERACTIVE):
+                with stage_timer("llm_sql"):
+                    raw_response = await self.chain.ainvoke(input_data)
+            
+            with stage_timer("history_save"):
+                await loop.run_in_executor(None, chat_history.add_messages, self._history_turn(prompt, raw_response))
             
             # Clean and validate the SQL
             cleaned_sql = self._clean_sql_query(raw_response, single_line=False)
@@ -275,26 +534,29 @@ SQL Query:"""
             return cleaned_sql, confidence
             
         except Exception as e:
-            logger.error(f"Error generating SQL with history: {e}")
+            logger.error("Error generating SQL with history: %s", e)
             # Fallback to no-history mode
-            return await self._generate_without_history(prompt, db_name, schema_info, sample_data)
+            return await self._generate_without_history(prompt, db_name, schema_info, sample_data, user_id)
 
     async def _generate_without_history(
         self, 
         prompt: str, 
         db_name: str, 
         schema_info: str, 
-        sample_data: str
+        sample_data: str,
+        user_id: Optional[int] = None
     ) -> tuple[str, float]:
         """Generate SQL without chat history (fallback mode)"""
         try:
             # Generate SQL using fallback chain
-            result = await self.fallback_chain.ainvoke({
-                "database_name": db_name,
-                "schema_info": schema_info,
-                "sample_data": sample_data,
-                "user_prompt": prompt
-            })
+            async with llm_scheduler.slot(user_id, PRIORITY_INTERACTIVE):
+                with stage_timer("llm_sql"):
+                    result = await self.fallback_chain.ainvoke({
+                        "database_name": db_name,
+                        "schema_info": schema_info,
+                        "sample_data": sample_data,
+                        "user_prompt": prompt
+                    })
             
             # Extract SQL query dan bersihkan
             sql_query = self._clean_sql_query(result['text'], single_line=False)
@@ -305,7 +567,7 @@ SQL Query:"""
             return sql_query, confidence_score
             
         except Exception as e:
-            logger.error(f"Error generating SQL without history: {e}")
+            logger.error("Error generating SQL without history: %s", e)
             raise
 
     def _calculate_confidence(self, sql_query: str, schema_info: str) -> float:
@@ -316,4 +578,83 @@ SQL Query:"""
             if clause in sql_query.upper():
                 confidence_score += 0.1
         confidence_score = min(1.0, confidence_score)
-        return confidence_score
\ No newline at end of file
+        return confidence_score
+
+def invalidate_context(id_datasource: int):
+    """Buang konteks datasource dari cache memori dan snapshot disk."""
+    _drop_cached_context(id_datasource)
+    if context_store is not None:
+        context_store.delete_datasource(id_datasource)
+
+def _drop_cached_context(id_datasource: int):
+    context_cache.invalidate_matching(lambda key: key[0] == id_datasource)
+
+# Worker lain yang menginvalidasi datasource juga membuang konteks di memori worker ini
+on_datasource_invalidated(_drop_cached_context)
+
+def preload_context_snapshots() -> int:
+    """
+    Isi cache memori dari snapshot disk yang masih segar saat startup worker, tanpa query
+    ke datasource. Snapshot yang disimpan tanpa sampel data dimuat dengan sample_data
+    kosong dan dilengkapi di latar belakang oleh fill_preloaded_samples. Snapshot yang
+    sudah perlu divalidasi ulang dibiarkan di disk dan divalidasi saat pertama dipakai.
+
+    Returns:
+        int: Jumlah konteks yang dimuat.
+    """
+    if context_store is None:
+        return 0
+    loaded = 0
+    now = time.time()
+    for snapshot in context_store.load_recent(settings.CONTEXT_CACHE_MAX_ENTRIES):
+        fresh_for = snapshot["validated_at"] + settings.CONTEXT_REVALIDATE_SECONDS - now
+        if fresh_for <= 0:
+            continue
+        id_datasource, table_names = json.loads(snapshot["cache_key"])
+        key = _context_key(id_datasource, table_names)
+        context = snapshot["context"]
+        if "sample_data" not in context:
+            context = {**context, "sample_data": "", "samples_pending": True}
+            _samples_pending[key] = time.monotonic() + fresh_for
+        context_cache.set(key, context, ttl_seconds=fresh_for)
+        loaded += 1
+    return loaded
+
+async def fill_preloaded_samples() -> int:
+    """
+    Ambil sampel data untuk konteks hasil preload yang belum punya sampel, dengan
+    paralelisme PREFETCH_MAX_CONCURRENCY dan lewat executor datasource masing-masing.
+    Dijalankan di latar belakang setelah warm-up agar request pertama tidak menunggu.
+
+    Returns:
+        int: Jumlah konteks yang berhasil dilengkapi.
+    """
+    service = get_nl2sql_service()
+    semaphore = asyncio.Semaphore(settings.PREFETCH_MAX_CONCURRENCY)
+    filled = 0
+
+    async def fill(key: Tuple, fresh_until: float):
+        nonlocal filled
+        async with semaphore:
+            try:
+                await run_on_datasource(key[0], service._fill_pending_samples, key, key[0], fresh_until)
+                filled += 1
+            except Exception as e:
+                logger.warning("Failed to load sample data for datasource %s: %s", key[0], e)
+
+    pending = list(_samples_pending.items())
+    _samples_pending.clear()
+    await asyncio.gather(*(fill(key, fresh_until) for key, fresh_until in pending))
+    return filled
+
+_service: Optional[NL2SQLService] = None
+_service_lock = threading.Lock()
+
+def get_nl2sql_service() -> NL2SQLService:
+    """Instance NL2SQLService bersama, dibuat saat pertama dipakai (bukan saat import)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = NL2SQLService()
+    return _service
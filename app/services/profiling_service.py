@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time, timezone
+from app.core.config import settings
+from app.services.query_result import QueryResult, NUMERIC, TEMPORAL, CATEGORICAL
+import numpy as np
+
+def _format_number(value: float) -> str:
+    """Format angka ringkas untuk prompt LLM."""
+    if value is None or np.isnan(value):
+        return "-"
+    if float(value).is_integer():
+        return f"{int(value)}"
+    return f"{value:.2f}"
+
+def _profile_numeric(values: np.ndarray) -> Dict[str, Any]:
+    """Statistik kolom numerik (hanya nilai yang tidak null)."""
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(values.size),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "sum": float(values.sum()),
+        "mean": float(values.mean())
+    }
+
+def _profile_categorical(values: np.ndarray, top_k: int) -> Dict[str, Any]:
+    """Jumlah nilai unik dan top-k kategori berdasarkan frekuensi."""
+    if values.size == 0:
+        return {"count": 0, "distinct": 0, "top": []}
+    labels, counts = np.unique(values.astype(str), return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top_k]
+    return {
+        "count": int(values.size),
+        "distinct": int(labels.size),
+        "top": [(str(labels[i]), int(counts[i])) for i in order]
+    }
+
+def _temporal_keys(values: np.ndarray) -> np.ndarray:
+    """
+    Kunci pembanding untuk kolom temporal. Kolom bisa mencampur date, datetime naive dan
+    datetime dengan zona waktu yang tidak bisa dibandingkan langsung, jadi semuanya
+    dinormalisasi ke datetime64 (UTC, date dianggap tengah malam). Kolom yang berisi
+    time (jam saja) dibandingkan apa adanya.
+    """
+    if any(isinstance(value, time) for value in values):
+        return values
+    normalized = []
+    for value in values:
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        elif isinstance(value, date):
+            value = datetime.combine(value, time.min)
+        normalized.append(value)
+    return np.array(normalized, dtype="datetime64[us]")
+
+def _profile_temporal(values: np.ndarray) -> Dict[str, Any]:
+    """Rentang waktu kolom temporal; min/max dilaporkan dalam bentuk nilai aslinya."""
+    if values.size == 0:
+        return {"count": 0}
+    order = np.argsort(_temporal_keys(values), kind="stable")
+    return {"count": int(values.size), "min": values[order[0]], "max": values[order[-1]]}
+
+def _profile_trend(times: np.ndarray, series: np.ndarray) -> Optional[Dict[str, Any]]:
+    """
+    Tren deret numerik terhadap kolom waktu: arah (naik/turun/stabil) dari kemiringan
+    regresi linear, nilai awal, nilai akhir dan persentase perubahan.
+    """
+    finite = ~np.isnan(series)
+    times, series = times[finite], series[finite]
+    if series.size < 2:
+        return None
+    order = np.argsort(_temporal_keys(times), kind="stable")
+    ordered = series[order]
+    slope = float(np.polyfit(np.arange(ordered.size, dtype=np.float64), ordered, 1)[0])
+    mean = float(np.abs(ordered).mean())
+    if mean == 0 or abs(slope) * ordered.size < 0.01 * mean:
+        direction = "stabil"
+    else:
+        direction = "naik" if slope > 0 else "turun"
+    first, last = float(ordered[0]), float(ordered[-1])
+    return {
+        "direction": direction,
+        "first": first,
+        "last": last,
+        "change_pct": ((last - first) / abs(first) * 100) if first != 0 else None
+    }
+
+def profile_result(result: QueryResult, top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Hitung profil ringkas hasil query secara tervektorisasi.
+
+    Args:
+        result (QueryResult): Hasil query.
+        top_k (Optional[int]): Jumlah kategori teratas per kolom (default: PROFILE_TOP_K).
+
+    Returns:
+        Dict[str, Any]: row_count, truncated, statistik per kolom, dan tren deret waktu.
+        Statistik hanya mencakup baris di dalam result; jika truncated, hasil lengkap
+        query lebih besar dari row_count.
+    """
+    top_k = top_k or settings.PROFILE_TOP_K
+    columns: List[Dict[str, Any]] = []
+    temporal_position = None
+
+    for position, (name, kind) in enumerate(zip(result.columns, result.kinds)):
+        valid = result.valid(position)
+        values = result.arrays[position][valid]
+        if kind == NUMERIC:
+            stats = _profile_numeric(values.astype(np.float64))
+        elif kind == TEMPORAL:
+            stats = _profile_temporal(values)
+            if temporal_position is None:
+                temporal_position = position
+        else:
+            stats = _profile_categorical(values, top_k)
+        stats["null_count"] = int(result.row_count - values.size)
+        columns.append({"name": name, "kind": kind, **stats})
+
+    trends = []
+    if temporal_position is not None:
+        time_valid = result.valid(temporal_position)
+        for position, (name, kind) in enumerate(zip(result.columns, result.kinds)):
+            if kind != NUMERIC:
+                continue
+            valid = time_valid & result.valid(position)
+            trend = _profile_trend(
+                result.arrays[temporal_position][valid],
+                result.arrays[position][valid].astype(np.float64)
+            )
+            if trend:
+                trends.append({"column": name, "time_column": result.columns[temporal_position], **trend})
+
+    return {"row_count": result.row_count, "truncated": result.truncated, "columns": columns, "trends": trends}
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    """Format profil hasil query menjadi teks ringkas untuk prompt LLM."""
+    if profile.get("truncated"):
+        lines = [
+            f"Jumlah baris: lebih dari {profile['row_count']} (hasil terpotong; statistik di bawah "
+            f"hanya dihitung dari {profile['row_count']} baris pertama)"
+        ]
+    else:
+        lines = [f"Jumlah baris: {profile['row_count']}"]
+    for column in profile["columns"]:
+        if column["kind"] == NUMERIC and column["count"]:
+            lines.append(
+                f"- {column['name']} (numerik): min={_format_number(column['min'])}, "
+                f"max={_format_number(column['max'])}, total={_format_number(column['sum'])}, "
+                f"rata-rata={_format_number(column['mean'])}, null={column['null_count']}"
+            )
+        elif column["kind"] == TEMPORAL and column["count"]:
+            lines.append(
+                f"- {column['name']} (waktu): {column['min']} s.d. {column['max']}, null={column['null_count']}"
+            )
+        elif column["kind"] == CATEGORICAL and column["count"]:
+            top = ", ".join(f"{label} ({count})" for label, count in column["top"])
+            lines.append(
+                f"- {column['name']} (kategorikal): {column['distinct']} nilai unik, teratas: {top}, "
+                f"null={column['null_count']}"
+            )
+        else:
+            lines.append(f"- {column['name']}: semua nilai null")
+
+    for trend in profile["trends"]:
+        change = f", perubahan={trend['change_pct']:+.1f}%" if trend["change_pct"] is not None else ""
+        lines.append(
+            f"- Tren {trend['column']} terhadap {trend['time_column']}: {trend['direction']} "
+            f"(awal={_format_number(trend['first'])}, akhir={_format_number(trend['last'])}{change})"
+        )
+    return "\n".join(lines)
+
+def build_analysis_input(result: QueryResult) -> Dict[str, str]:
+    """
+    Siapkan input prompt analisis: profil baris yang tersedia di result ditambah sampel
+    kecil baris, sehingga ukuran prompt tidak bergantung pada jumlah baris. Untuk
+    preview yang terpotong, profil menyebutkannya agar LLM tidak menganggap total dan
+    rentang nilai sebagai angka untuk seluruh hasil query.
+    """
+    return {
+        "profile": format_profile(profile_result(result)),
+        "sample": str(result.head(settings.ANALYSIS_SAMPLE_ROWS).to_records())
+    }
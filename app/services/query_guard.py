@@ -0,0 +1,164 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlparse.sql import Statement
+from sqlparse.tokens import DML
+from fastapi import HTTPException
+from app.core.config import settings
+import sqlparse
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_FUNCTIONS = {"COUNT", "SUM", "AVG", "MIN", "MAX", "STRING_AGG", "ARRAY_AGG", "BOOL_AND", "BOOL_OR"}
+
+def get_query_limits(id_datasource: int) -> Dict[str, float]:
+    """
+    Ambang batas cost guard untuk datasource: default dari settings, ditimpa
+    QUERY_GUARD_DATASOURCE_LIMITS[id_datasource] jika ada.
+    """
+    limits = {
+        "max_cost": settings.QUERY_GUARD_MAX_COST,
+        "max_rows": settings.QUERY_GUARD_MAX_ROWS,
+        "row_limit": settings.QUERY_GUARD_ROW_LIMIT,
+        "export_max_rows": settings.QUERY_GUARD_EXPORT_MAX_ROWS
+    }
+    limits.update(settings.QUERY_GUARD_DATASOURCE_LIMITS.get(id_datasource, {}))
+    return limits
+
+def parse_select(query: str) -> Statement:
+    """
+    Parse query dengan sqlparse dan pastikan berupa satu statement SELECT.
+
+    Raises:
+        HTTPException: 400 jika query kosong, berisi banyak statement, atau bukan SELECT.
+    """
+    statements = [s for s in sqlparse.parse(query) if s.token_first(skip_cm=True) is not None]
+    if len(statements) != 1:
+        raise HTTPException(status_code=400, detail="Query harus berupa tepat satu statement SQL.")
+    statement = statements[0]
+    if statement.get_type() != "SELECT":
+        raise HTTPException(status_code=400, detail=f"Hanya query SELECT yang diizinkan, diterima: {statement.get_type()}")
+    return statement
+
+def has_limit(statement: Statement) -> bool:
+    """Apakah statement sudah memiliki LIMIT/FETCH di level teratas (bukan di subquery)."""
+    return any(token.is_keyword and token.normalized in ("LIMIT", "FETCH") for token in statement.tokens)
+
+def is_aggregated(statement: Statement) -> bool:
+    """
+    Apakah hasil statement teragregasi: ada GROUP BY di SELECT teratas, atau daftar SELECT
+    teratas memakai fungsi agregat (tanpa window function) sehingga hasilnya satu baris.
+    CTE setelah WITH dilewati karena agregasi di dalamnya tidak membatasi hasil akhir.
+    """
+    select_list = []
+    in_select_list = False
+    seen_select = False
+    for token in statement.tokens:
+        if token.ttype is DML and token.normalized == "SELECT" and not seen_select:
+            seen_select = in_select_list = True
+            continue
+        if not seen_select:
+            continue
+        # "GROUP\n  BY" tetap satu keyword; normalisasi spasi di antaranya
+        if token.is_keyword and " ".join(token.normalized.split()) == "GROUP BY":
+            return True
+        if token.is_keyword and token.normalized == "FROM":
+            in_select_list = False
+        if in_select_list:
+            select_list.append(token)
+
+    values = [t.normalized.upper() for token in select_list for t in token.flatten() if not t.is_whitespace]
+    if "OVER" in values:
+        return False
+    return any(value in AGGREGATE_FUNCTIONS for value in values)
+
+def add_limit(query: str, limit: int) -> str:
+    """
+    Batasi jumlah baris dengan membungkus query sebagai subquery. LIMIT tidak ditempel
+    di akhir query karena klausa penutup seperti FOR UPDATE/FOR SHARE harus berada
+    setelah LIMIT; newline sebelum kurung tutup menjaga komentar baris di akhir query.
+    """
+    return f"SELECT * FROM (\n{query.rstrip().rstrip(';').rstrip()}\n) AS _guard LIMIT {int(limit)}"
+
+def explain_query(conn: Connection, query: str) -> Dict[str, Any]:
+    """
+    Jalankan EXPLAIN (tanpa ANALYZE) dan kembalikan node plan teratas.
+
+    Raises:
+        HTTPException: 400 jika query tidak valid menurut planner.
+    """
+    try:
+        raw_plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+    except Exception as e:
+        # Transaksi gagal harus di-rollback agar koneksi bisa dipakai lagi
+        conn.rollback()
+        raise HTTPException(status_code=400, detail=f"Query tidak valid: {str(e)}")
+    plan = json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan
+    return plan[0]["Plan"]
+
+def guard_query(
+    conn: Connection,
+    query: str,
+    id_datasource: int,
+    inject_limit: bool = True,
+    row_limit: Optional[int] = None
+) -> str:
+    """
+    Periksa query sebelum dieksekusi: harus satu SELECT, lolos EXPLAIN, dan estimasi
+    cost/baris di bawah ambang datasource. Query non-agregat tanpa LIMIT diberi LIMIT
+    jika inject_limit aktif; query yang estimasi barisnya terlalu besar juga diberi
+    LIMIT bila memungkinkan, selain itu ditolak.
+
+    Tanpa inject_limit (ekspor streaming) estimasi baris dibandingkan dengan
+    export_max_rows, bukan max_rows: ekspor memang membaca hasil lengkap per batch
+    sehingga memori tidak bergantung pada jumlah baris, tetapi tetap perlu batas atas
+    agar ekspor tidak berjalan tanpa akhir. Batas cost berlaku untuk keduanya.
+
+    Args:
+        conn: Koneksi datasource yang akan dipakai untuk eksekusi.
+        query: Query SQL.
+        id_datasource: ID unik datasource (untuk ambang batas per datasource).
+        inject_limit: Boleh menambahkan LIMIT (False untuk ekspor hasil lengkap).
+        row_limit: LIMIT yang ditambahkan (default: row_limit datasource).
+
+    Returns:
+        str: Query yang aman dieksekusi (mungkin sudah ditambah LIMIT).
+
+    Raises:
+        HTTPException: 400 untuk query tidak valid, 422 jika estimasi melebihi ambang.
+    """
+    if not settings.QUERY_GUARD_ENABLED:
+        return query
+
+    statement = parse_select(query)
+    limits = get_query_limits(id_datasource)
+    row_limit = row_limit or limits["row_limit"]
+    limited = has_limit(statement)
+
+    if inject_limit and not limited and not is_aggregated(statement):
+        query = add_limit(query, row_limit)
+        limited = True
+
+    plan = explain_query(conn, query)
+    total_cost = plan.get("Total Cost", 0)
+    plan_rows = plan.get("Plan Rows", 0)
+
+    if total_cost > limits["max_cost"]:
+        logger.warning("Query rejected for datasource %s: estimated cost %s > %s", id_datasource, total_cost, limits['max_cost'])
+        raise HTTPException(
+            status_code=422,
+            detail=f"Estimasi cost query ({total_cost:.0f}) melebihi batas {limits['max_cost']:.0f}. Persempit query Anda."
+        )
+
+    max_rows = limits["max_rows"] if inject_limit else limits["export_max_rows"]
+    if plan_rows > max_rows:
+        if inject_limit and not limited:
+            return add_limit(query, row_limit)
+        raise HTTPException(
+            status_code=422,
+            detail=f"Estimasi jumlah baris ({plan_rows}) melebihi batas {max_rows:.0f}. Persempit query Anda."
+        )
+
+    return query
@@ -0,0 +1,178 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from datetime import date, datetime, time
+from decimal import Decimal
+import numpy as np
+import hashlib
+import json
+
+NUMERIC = "numeric"
+TEMPORAL = "temporal"
+CATEGORICAL = "categorical"
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    """Buat array object 1-D tanpa membiarkan NumPy membongkar nilai list/tuple."""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def _build_column(values: Sequence[Any]) -> tuple[np.ndarray, Optional[np.ndarray], str]:
+    """
+    Ubah nilai satu kolom menjadi array bertipe.
+
+    Returns:
+        tuple: (array nilai, mask null atau None jika tidak ada null, jenis kolom)
+    """
+    non_null = [v for v in values if v is not None]
+    mask = None
+    if len(non_null) != len(values):
+        mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+
+    if non_null and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in non_null):
+        filled = values if mask is None else [0 if v is None else v for v in values]
+        try:
+            return np.array(filled, dtype=np.int64), mask, NUMERIC
+        except OverflowError:
+            pass
+
+    if non_null and all(isinstance(v, (int, float, Decimal, np.number)) and not isinstance(v, bool) for v in non_null):
+        # Decimal dikonversi ke float64; presisi penuh tidak diperlukan untuk analisis dan visualisasi
+        filled = [np.nan if v is None else float(v) for v in values]
+        return np.array(filled, dtype=np.float64), mask, NUMERIC
+
+    if non_null and all(isinstance(v, (date, datetime, time)) for v in non_null):
+        return _object_array(values), mask, TEMPORAL
+
+    return _object_array(values), mask, CATEGORICAL
+
+class QueryResult:
+    """
+    Representasi kolumnar dari hasil query.
+
+    Setiap kolom disimpan sebagai satu array (NumPy int64/float64 untuk kolom numerik,
+    array object untuk kolom lain) ditambah mask null opsional, sehingga nama kolom tidak
+    diulang per baris dan pemrosesan hilir (analisis, rekomendasi diagram) bisa divektorisasi.
+    Kolom diakses berdasarkan posisi agar nama kolom duplikat tetap aman.
+    truncated menandai hasil yang dipotong (misal preview) sehingga bukan seluruh hasil query.
+    """
+
+    __slots__ = ("columns", "arrays", "masks", "kinds", "row_count", "truncated")
+
+    def __init__(
+        self,
+        columns: List[str],
+        arrays: List[np.ndarray],
+        masks: Optional[List[Optional[np.ndarray]]] = None,
+        kinds: Optional[List[str]] = None,
+        row_count: Optional[int] = None,
+        truncated: bool = False
+    ):
+        self.columns = list(columns)
+        self.arrays = arrays
+        self.masks = masks if masks is not None else [None] * len(arrays)
+        self.kinds = kinds if kinds is not None else [CATEGORICAL] * len(arrays)
+        self.row_count = row_count if row_count is not None else (len(arrays[0]) if arrays else 0)
+        self.truncated = truncated
+
+    @classmethod
+    def from_rows(cls, columns: Iterable[str], rows: Sequence[Sequence[Any]], truncated: bool = False) -> "QueryResult":
+        """Bangun QueryResult dari nama kolom dan baris (tuple/Row) hasil cursor."""
+        columns = list(columns)
+        if not rows:
+            return cls.empty(columns)
+
+        arrays, masks, kinds = [], [], []
+        for values in zip(*rows):
+            array, mask, kind = _build_column(values)
+            arrays.append(array)
+            masks.append(mask)
+            kinds.append(kind)
+        return cls(columns, arrays, masks, kinds, row_count=len(rows), truncated=truncated)
+
+    @classmethod
+    def empty(cls, columns: Iterable[str] = ()) -> "QueryResult":
+        """QueryResult tanpa baris."""
+        columns = list(columns)
+        return cls(columns, [_object_array([]) for _ in columns], row_count=0)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __bool__(self) -> bool:
+        return self.row_count > 0
+
+    def index(self, name: str) -> int:
+        """Posisi kolom pertama dengan nama tersebut."""
+        return self.columns.index(name)
+
+    def column(self, name: str) -> np.ndarray:
+        """Array nilai untuk kolom tertentu."""
+        return self.arrays[self.index(name)]
+
+    def kind(self, name: str) -> str:
+        """Jenis kolom: numeric, temporal atau categorical."""
+        return self.kinds[self.index(name)]
+
+    def valid(self, position: int) -> np.ndarray:
+        """Mask boolean baris yang tidak null untuk kolom pada posisi tertentu."""
+        mask = self.masks[position]
+        if mask is None:
+            return np.ones(self.row_count, dtype=bool)
+        return ~mask
+
+    def head(self, n: int) -> "QueryResult":
+        """QueryResult baru berisi maksimal n baris pertama."""
+        if n >= self.row_count:
+            return self
+        return QueryResult(
+            self.columns,
+            [array[:n] for array in self.arrays],
+            [mask[:n] if mask is not None else None for mask in self.masks],
+            self.kinds,
+            row_count=n,
+            truncated=True
+        )
+
+    def _column_values(self, position: int) -> List[Any]:
+        """Nilai kolom sebagai objek Python dengan null dikembalikan menjadi None."""
+        values = self.arrays[position].tolist()
+        mask = self.masks[position]
+        if mask is not None:
+            for i in np.flatnonzero(mask):
+                values[i] = None
+        return values
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Konversi ke list of dictionaries (format baris)."""
+        column_values = [self._column_values(i) for i in range(len(self.columns))]
+        return [dict(zip(self.columns, row)) for row in zip(*column_values)]
+
+    def to_columnar(self) -> Dict[str, Any]:
+        """Serialisasi kolumnar untuk respons API."""
+        return {
+            "columns": self.columns,
+            "kinds": self.kinds,
+            "data": [self._column_values(i) for i in range(len(self.columns))],
+            "row_count": self.row_count,
+            "truncated": self.truncated
+        }
+
+    def fingerprint(self) -> str:
+        """
+        Hash stabil atas nama kolom dan seluruh nilai, dipakai sebagai kunci cache
+        berbasis konten. Hasil dengan data identik selalu menghasilkan hash yang sama.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(self.columns).encode())
+        digest.update(f"{self.row_count}:{self.truncated}".encode())
+        for array, mask, kind in zip(self.arrays, self.masks, self.kinds):
+            digest.update(b"\x00" + kind.encode() + b"\x00")
+            if array.dtype == object:
+                digest.update(repr(array.tolist()).encode())
+            else:
+                digest.update(array.dtype.str.encode())
+                digest.update(array.tobytes())
+            digest.update(mask.tobytes() if mask is not None else b"-")
+        return digest.hexdigest()
+
+    def __repr__(self) -> str:
+        return f"QueryResult(columns={self.columns}, row_count={self.row_count})"
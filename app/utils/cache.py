@@ -0,0 +1,318 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from app.core.config import settings
+import threading
+import logging
+import sqlite3
+import pickle
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+def create_private_file(path: str):
+    """Buat file (jika belum ada) dengan mode 0600 sebelum SQLite membukanya dengan umask proses."""
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+    os.close(fd)
+    os.chmod(path, 0o600)
+
+class CacheBackend(ABC):
+    """
+    Antarmuka cache yang dipakai service: get/set dengan TTL, invalidasi dan statistik.
+    Implementasi: TTLCache (in-process) dan SQLiteCache (dibagi antar worker satu host).
+    Buat instance lewat create_cache agar backend bisa dipilih dari konfigurasi.
+    """
+
+    name: str
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def invalidate(self, key: Hashable):
+        ...
+
+    @abstractmethod
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+class TTLCache(CacheBackend):
+    """
+    Cache LRU in-process dengan TTL, batas jumlah entri dan metrik hit/miss.
+    Aman dipakai dari event loop maupun thread pool.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Ambil nilai dari cache; entri yang kedaluwarsa dianggap miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Simpan nilai ke cache dan buang entri paling lama jika melebihi batas."""
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Hapus satu entri dari cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Hapus semua entri yang kuncinya memenuhi predicate; mengembalikan jumlah yang dihapus."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """Kosongkan cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrik cache: ukuran, hit, miss, eviction dan hit rate."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+def _decode_key(value: Any) -> Any:
+    """Kembalikan list hasil JSON menjadi tuple agar predicate melihat bentuk kunci aslinya."""
+    if isinstance(value, list):
+        return tuple(_decode_key(item) for item in value)
+    return value
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache dengan TTL di file SQLite lokal yang dibagi oleh semua worker di satu host,
+    sehingga entri yang dihangatkan satu worker langsung dipakai worker lain.
+
+    Kunci harus bisa di-JSON-kan (int, str, tuple) dan nilai harus bisa di-pickle.
+    Batas jumlah entri ditegakkan dengan membuang entri yang paling cepat kedaluwarsa.
+    Statistik hit/miss dihitung per proses. Kegagalan SQLite dianggap miss dan tidak
+    pernah menggagalkan request. File dibuat dengan mode 0600 (file WAL mengikuti).
+    """
+
+    _PRUNE_EVERY = 64
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, path: str):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Satu koneksi per thread per proses; koneksi warisan fork tidak dipakai ulang
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        create_private_file(self.path)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_name TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (cache_name, cache_key)
+            )
+        """)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _error(self, operation: str, e: Exception):
+        with self._lock:
+            self.errors += 1
+        logger.warning("Shared cache '%s' %s failed: %s", self.name, operation, e)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Ambil nilai dari cache; entri yang kedaluwarsa dianggap miss."""
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM cache_entries WHERE cache_name = ? AND cache_key = ? AND expires_at > ?",
+                (self.name, json.dumps(key), time.time())
+            ).fetchone()
+            value = pickle.loads(row[0]) if row is not None else None
+        except Exception as e:
+            # Pickle usang (modul/kelas sudah berubah) bisa melempar error apa saja; anggap miss
+            self._error("get", e)
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Simpan nilai ke cache; entri kedaluwarsa dan kelebihan entri dibuang berkala."""
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache_name, cache_key, expires_at, value) VALUES (?, ?, ?, ?)",
+                (self.name, json.dumps(key), expires_at, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            )
+            with self._lock:
+                self._sets += 1
+                prune = self._sets % self._PRUNE_EVERY == 0
+            if prune:
+                self._prune(conn)
+        except (sqlite3.Error, pickle.PicklingError, TypeError) as e:
+            self._error("set", e)
+
+    def _prune(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM cache_entries WHERE cache_name = ? AND expires_at <= ?", (self.name, time.time()))
+        overflow = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE cache_name = ?", (self.name,)
+        ).fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries WHERE cache_name = ? ORDER BY expires_at LIMIT ?)",
+                (self.name, overflow)
+            )
+            with self._lock:
+                self.evictions += overflow
+
+    def invalidate(self, key: Hashable):
+        """Hapus satu entri dari cache (untuk semua worker)."""
+        try:
+            self._connect().execute(
+                "DELETE FROM cache_entries WHERE cache_name = ? AND cache_key = ?", (self.name, json.dumps(key))
+            )
+        except sqlite3.Error as e:
+            self._error("invalidate", e)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Hapus semua entri yang kuncinya memenuhi predicate; mengembalikan jumlah yang dihapus."""
+        try:
+            conn = self._connect()
+            keys = [
+                row[0] for row in conn.execute("SELECT cache_key FROM cache_entries WHERE cache_name = ?", (self.name,))
+                if predicate(_decode_key(json.loads(row[0])))
+            ]
+            conn.executemany(
+                "DELETE FROM cache_entries WHERE cache_name = ? AND cache_key = ?", [(self.name, key) for key in keys]
+            )
+            return len(keys)
+        except sqlite3.Error as e:
+            self._error("invalidate", e)
+            return 0
+
+    def clear(self):
+        """Kosongkan cache (untuk semua worker)."""
+        try:
+            self._connect().execute("DELETE FROM cache_entries WHERE cache_name = ?", (self.name,))
+        except sqlite3.Error as e:
+            self._error("clear", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrik cache: ukuran bersama, serta hit, miss dan eviction proses ini."""
+        try:
+            size = self._connect().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE cache_name = ? AND expires_at > ?", (self.name, time.time())
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            self._error("stats", e)
+            size = 0
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "backend": "sqlite",
+                "size": size,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+def create_cache(name: str, max_entries: int, ttl_seconds: float, allow_shared: bool = True) -> CacheBackend:
+    """
+    Buat cache dengan backend dari CACHE_BACKENDS[name] atau CACHE_BACKEND:
+    "memory" (TTLCache per proses) atau "sqlite" (SQLiteCache di CACHE_SQLITE_PATH,
+    dibagi semua worker di host yang sama). allow_shared=False untuk cache yang nilainya
+    tidak boleh ditulis ke disk; backend "sqlite" untuk cache itu diganti "memory".
+    """
+    backend = settings.CACHE_BACKENDS.get(name, settings.CACHE_BACKEND)
+    if backend == "sqlite" and not allow_shared:
+        logger.warning("Cache '%s' holds data that must not be written to disk; using memory backend", name)
+        backend = "memory"
+    if backend == "memory":
+        return TTLCache(name, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return create_shared_cache(name, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Cache backend tidak dikenal untuk '{name}': {backend}")
+
+def create_shared_cache(name: str, max_entries: int, ttl_seconds: float) -> SQLiteCache:
+    """
+    SQLiteCache di CACHE_SQLITE_PATH tanpa melihat CACHE_BACKEND, untuk state yang
+    memang harus sama di semua worker satu host (misal versi datasource).
+    """
+    directory = os.path.dirname(settings.CACHE_SQLITE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return SQLiteCache(name, max_entries=max_entries, ttl_seconds=ttl_seconds, path=settings.CACHE_SQLITE_PATH)
@@ -0,0 +1,77 @@
+from typing import AsyncIterator, Awaitable, TypeVar
+from fastapi import HTTPException, Request
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status non-standar (konvensi nginx) untuk request yang ditutup klien
+CLIENT_CLOSED_REQUEST = 499
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.25) -> T:
+    """
+    Jalankan pekerjaan request dan batalkan seluruhnya jika klien memutus koneksi.
+
+    Pembatalan merambat ke panggilan LLM yang sedang menunggu (ainvoke) dan ke query
+    datasource yang sedang berjalan (dibatalkan lewat driver), sehingga request yang
+    ditinggalkan tidak terus menghabiskan kuota Gemini maupun database pelanggan.
+
+    Raises:
+        HTTPException: 499 jika klien terputus sebelum pekerjaan selesai.
+    """
+    task = asyncio.ensure_future(awaitable)
+    disconnected = False
+
+    async def _watch():
+        nonlocal disconnected
+        while not task.done():
+            if await request.is_disconnected():
+                disconnected = True
+                logger.info("Client disconnected, cancelling %s %s", request.method, request.url.path)
+                task.cancel()
+                return
+            await asyncio.sleep(poll_interval)
+
+    watcher = asyncio.ensure_future(_watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if disconnected:
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+_END = object()
+
+async def stream_until_disconnect(request: Request, events: AsyncIterator[T], poll_interval: float = 0.25) -> AsyncIterator[T]:
+    """
+    Varian cancel_on_disconnect untuk respons streaming (SSE).
+
+    Item diproduksi di task terpisah yang dijaga cancel_on_disconnect, sehingga
+    pekerjaan yang sedang menunggu (LLM, query datasource) dibatalkan begitu klien
+    terputus, tidak hanya ketika item berikutnya gagal dikirim.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _produce():
+        try:
+            async for item in events:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(_END)
+
+    producer = asyncio.ensure_future(cancel_on_disconnect(request, _produce(), poll_interval))
+    # Pengecualian producer (499 setelah klien terputus) tidak bisa lagi dikirim sebagai respons
+    producer.add_done_callback(lambda task: task.cancelled() or task.exception())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            yield item
+    finally:
+        producer.cancel()
@@ -0,0 +1,112 @@
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, TypeVar
+from fastapi import HTTPException
+from app.core.config import settings
+from app.utils.metrics import record_stage
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+class Deadline:
+    """
+    Batas waktu satu request yang dibagi menjadi budget per tahap pipeline.
+
+    Setiap tahap mendapat min(budget tahap, sisa waktu request). Tahap opsional yang
+    kehabisan waktu dilewati dengan nilai fallback dan dicatat di skipped_stages;
+    tahap wajib yang kehabisan waktu menggagalkan request dengan 504.
+    """
+
+    def __init__(self, total_seconds: float, stage_budgets: Optional[Dict[str, float]] = None):
+        self.total_seconds = total_seconds
+        self.stage_budgets = stage_budgets if stage_budgets is not None else settings.REQUEST_STAGE_BUDGETS
+        self.expires_at = time.monotonic() + total_seconds
+        self.skipped_stages: List[str] = []
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> "Deadline":
+        """
+        Buat deadline dari header X-Request-Deadline (detik), dibatasi
+        REQUEST_DEADLINE_MAX_SECONDS; header kosong/tidak valid memakai default.
+        """
+        total = settings.REQUEST_DEADLINE_SECONDS
+        if value:
+            try:
+                total = min(float(value), settings.REQUEST_DEADLINE_MAX_SECONDS)
+            except ValueError:
+                logger.warning("Ignoring invalid request deadline header: %r", value)
+        return cls(max(total, 0.0))
+
+    def remaining(self) -> float:
+        """Sisa waktu request dalam detik (tidak pernah negatif)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        """Waktu yang boleh dipakai sebuah tahap saat ini."""
+        stage_budget = self.stage_budgets.get(stage)
+        if stage_budget is None:
+            return self.remaining()
+        return min(stage_budget, self.remaining())
+
+    async def run(self, stage: str, awaitable: Awaitable[T], fallback: Any = _MISSING) -> T:
+        """
+        Jalankan satu tahap dalam budget-nya.
+
+        Args:
+            stage: Nama tahap (kunci REQUEST_STAGE_BUDGETS).
+            awaitable: Pekerjaan tahap tersebut.
+            fallback: Nilai pengganti jika tahap kehabisan waktu. Tanpa fallback,
+                tahap dianggap wajib.
+
+        Raises:
+            HTTPException: 504 jika tahap wajib melewati budget-nya.
+        """
+        timeout = self.budget(stage)
+        if timeout <= 0:
+            # Tidak ada sisa waktu: jangan mulai pekerjaannya sama sekali
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            return self._expire(stage, fallback)
+
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stage '%s' exceeded its budget of %.2fs (elapsed %.2fs)", stage, timeout, time.monotonic() - started)
+            return self._expire(stage, fallback)
+        finally:
+            record_stage(stage, time.monotonic() - started)
+
+    async def iterate(self, stage: str, iterator: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Alirkan item dari tahap opsional berbentuk async iterator (misal token LLM)
+        dalam budget-nya. Jika budget habis, iterator dibatalkan, tahap dicatat di
+        skipped_stages dan aliran berhenti tanpa error; item yang sudah terkirim tetap berlaku.
+        """
+        started = time.monotonic()
+        expires_at = started + self.budget(stage)
+        try:
+            while True:
+                timeout = expires_at - time.monotonic()
+                if timeout <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    return
+                yield item
+        except asyncio.TimeoutError:
+            logger.warning("Stage '%s' exceeded its budget while streaming (elapsed %.2fs)", stage, time.monotonic() - started)
+            self.skipped_stages.append(stage)
+        finally:
+            record_stage(stage, time.monotonic() - started)
+
+    def _expire(self, stage: str, fallback: Any):
+        if fallback is _MISSING:
+            raise HTTPException(status_code=504, detail=f"Batas waktu request habis pada tahap '{stage}'.")
+        self.skipped_stages.append(stage)
+        return fallback
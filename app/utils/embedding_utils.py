@@ -0,0 +1,16 @@
+from typing import Sequence, Union
+import numpy as np
+
+def to_pgvector_literal(embedding: Union[np.ndarray, Sequence[float]]) -> str:
+    """
+    Format embedding sebagai literal pgvector '[0.1,0.2,...]'.
+    
+    Args:
+        embedding: Vektor embedding (list float atau numpy array).
+        
+    Returns:
+        str: Literal yang bisa dibandingkan dengan kolom vector di query.
+    """
+    if isinstance(embedding, np.ndarray):
+        embedding = embedding.tolist()
+    return '[' + ','.join(map(str, embedding)) + ']'
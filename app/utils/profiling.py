@@ -0,0 +1,115 @@
+from typing import Dict, Optional
+from collections import Counter
+from types import FrameType
+import threading
+import cProfile
+import pstats
+import time
+import sys
+import io
+import os
+
+# Fungsi daun yang menandakan thread sedang menunggu (tidak memakai CPU)
+IDLE_FUNCTIONS = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+
+class SamplingProfiler:
+    """
+    Profiler sampling untuk worker yang sedang berjalan.
+
+    Thread terpisah membaca stack semua thread (event loop dan thread pool executor)
+    lewat sys._current_frames() setiap interval, tanpa instrumentasi pada kode yang
+    diprofil, sehingga overhead-nya kecil dan aman dipakai di produksi. Hasilnya
+    berupa collapsed stack ("thread;frame;frame N") yang bisa langsung dibaca
+    flamegraph.pl atau speedscope.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+
+    def _sample(self, stacks: Counter, thread_names: Dict[int, str], own_ident: int):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not self.include_idle and _is_idle(frame):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+
+    def run(self, seconds: float) -> Counter:
+        """
+        Ambil sampel selama seconds detik (blocking; jalankan di thread pool).
+
+        Raises:
+            RuntimeError: Jika profiling lain sedang berjalan di worker ini.
+        """
+        if not SamplingProfiler._lock.acquire(blocking=False):
+            raise RuntimeError("Profiling lain sedang berjalan di worker ini")
+        try:
+            stacks: Counter = Counter()
+            own_ident = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample(stacks, thread_names, own_ident)
+                self.samples += 1
+                time.sleep(self.interval)
+            return stacks
+        finally:
+            SamplingProfiler._lock.release()
+
+def format_collapsed(stacks: Counter) -> str:
+    """Format collapsed stack, satu baris per stack unik diurutkan dari yang terbanyak."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+# cProfile per request: hanya satu dalam satu waktu karena profiler aktif di event loop
+_request_profile_lock = threading.Lock()
+
+def start_request_profile() -> Optional[cProfile.Profile]:
+    """Mulai cProfile untuk satu request; None jika sedang ada request lain yang diprofil."""
+    if not _request_profile_lock.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Profiler lain (misal debugger) sudah aktif di thread ini
+        _request_profile_lock.release()
+        return None
+    return profile
+
+def stop_request_profile(profile: cProfile.Profile, limit: int = 50) -> str:
+    """
+    Hentikan cProfile request dan kembalikan ringkasan teks pstats, diurutkan
+    berdasarkan waktu kumulatif dan dibatasi limit fungsi teratas.
+    """
+    try:
+        profile.disable()
+    finally:
+        _request_profile_lock.release()
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
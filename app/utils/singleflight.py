@@ -0,0 +1,67 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Menggabungkan pekerjaan identik yang sedang berjalan (request coalescing).
+
+    Pemanggil pertama untuk sebuah key menjadi leader dan menjalankan pekerjaan;
+    pemanggil berikutnya dengan key yang sama selama pekerjaan masih berjalan
+    (follower) menunggu hasil yang sama. Pekerjaan berjalan sebagai task terpisah
+    sehingga pembatalan satu pemanggil tidak membatalkan pemanggil lain; pekerjaan
+    baru dibatalkan ketika tidak ada lagi pemanggil yang menunggu.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Jalankan fn() untuk key, atau tunggu hasil pekerjaan identik yang sedang berjalan.
+        Pekerjaan bersama baru dibatalkan jika semua pemanggilnya sudah dibatalkan.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.leaders += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+        else:
+            self.followers += 1
+            logger.debug("Single-flight '%s' coalesced request for key %r", self.name, key)
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters.get(key, 0) <= 1 and not future.done():
+                future.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(key, 1) - 1
+            if remaining > 0:
+                self._waiters[key] = remaining
+            else:
+                self._waiters.pop(key, None)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Jumlah leader, follower dan pekerjaan yang sedang berjalan."""
+        return {
+            "name": self.name,
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
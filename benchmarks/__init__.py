@@ -0,0 +1,7 @@
+"""
+Micro-benchmark untuk helper CPU-bound di jalur panas NL2SQL.
+
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --save reference
+    python -m benchmarks.run --compare reference --threshold 0.25
+"""
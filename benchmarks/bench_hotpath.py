@@ -0,0 +1,84 @@
+"""Benchmark helper CPU-bound per request: format konteks, pembersihan SQL, hasil query dan embedding."""
+from benchmarks.harness import benchmark
+from benchmarks.synthetic import SQL_SIZES, synthetic_result, synthetic_sample_rows, synthetic_schema, synthetic_sql
+from app.services.nl2sql_service import NL2SQLService
+from app.services.query_result import QueryResult
+from app.services.profiling_service import build_analysis_input
+from app.utils.embedding_utils import to_pgvector_literal
+import numpy as np
+
+TABLES = [{"tables": n} for n in (10, 100, 500, 2000)]
+TABLES_QUICK = [{"tables": n} for n in (10, 100)]
+ROWS = [{"rows": n} for n in (10, 1_000, 100_000, 1_000_000)]
+ROWS_QUICK = [{"rows": n} for n in (10, 1_000)]
+
+def _service() -> NL2SQLService:
+    # Helper format tidak memakai state instance; lewati __init__ agar tidak membuat client LLM/DB
+    return NL2SQLService.__new__(NL2SQLService)
+
+@benchmark("context.format_schema_info", TABLES, TABLES_QUICK)
+def bench_format_schema_info(tables: int):
+    service, schema = _service(), synthetic_schema(tables)
+    return lambda: service._format_schema_info(schema)
+
+@benchmark("context.format_sample_data", [{"rows": n} for n in (3, 100, 1_000)], [{"rows": 3}])
+def bench_format_sample_data(rows: int):
+    service, data = _service(), synthetic_sample_rows(rows)
+    return lambda: service._format_sample_data("sales", data)
+
+@benchmark("context.sample_data_all_tables", TABLES, TABLES_QUICK)
+def bench_sample_data_all_tables(tables: int):
+    """Perakitan sample_data di build_context: 3 baris untuk setiap tabel."""
+    service, data = _service(), synthetic_sample_rows(3)
+    names = [f"table_{t:04d}" for t in range(tables)]
+
+    def run():
+        sample_data = ""
+        for name in names:
+            sample_data += service._format_sample_data(name, data)
+        return sample_data
+    return run
+
+@benchmark("sql.clean_sql_query", [{"size": s} for s in ("simple", "join", "wide")], [{"size": "simple"}])
+def bench_clean_sql_query(size: str):
+    service = _service()
+    raw = synthetic_sql(60) if size == "wide" else SQL_SIZES[size]
+    return lambda: service._clean_sql_query(raw)
+
+@benchmark("sql.calculate_confidence", [{"tables": n} for n in (10, 2000)], [{"tables": 10}])
+def bench_calculate_confidence(tables: int):
+    service = _service()
+    schema_info = service._format_schema_info(synthetic_schema(tables))
+    sql = service._clean_sql_query(SQL_SIZES["join"])
+    return lambda: service._calculate_confidence(sql, schema_info)
+
+@benchmark("result.from_rows", ROWS, ROWS_QUICK)
+def bench_result_from_rows(rows: int):
+    """Konstruksi hasil fetch_preview dari baris DBAPI."""
+    columns, data = synthetic_result(rows)
+    return lambda: QueryResult.from_rows(columns, data)
+
+@benchmark("result.to_records", ROWS, ROWS_QUICK)
+def bench_result_to_records(rows: int):
+    columns, data = synthetic_result(rows)
+    result = QueryResult.from_rows(columns, data)
+    return result.to_records
+
+@benchmark("result.analysis_input", ROWS, ROWS_QUICK)
+def bench_analysis_input(rows: int):
+    """Profil statistik + sampel untuk prompt analisis."""
+    columns, data = synthetic_result(rows)
+    result = QueryResult.from_rows(columns, data)
+    return lambda: build_analysis_input(result)
+
+@benchmark("result.fingerprint", ROWS, ROWS_QUICK)
+def bench_fingerprint(rows: int):
+    """Hash hasil untuk kunci cache analisis."""
+    columns, data = synthetic_result(rows)
+    result = QueryResult.from_rows(columns, data)
+    return result.fingerprint
+
+@benchmark("knowledge.pgvector_literal", [{"dim": 768}])
+def bench_pgvector_literal(dim: int):
+    embedding = np.random.default_rng(0).standard_normal(dim).astype(np.float32)
+    return lambda: to_pgvector_literal(embedding)
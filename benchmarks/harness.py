@@ -0,0 +1,70 @@
+"""Registri dan pengukur micro-benchmark: waktu per panggilan (timeit) dan alokasi puncak (tracemalloc)."""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+import statistics
+import tracemalloc
+import timeit
+import gc
+
+@dataclass
+class Benchmark:
+    """
+    Satu benchmark berparameter. setup(**params) menyiapkan data dan mengembalikan
+    callable tanpa argumen yang diukur; params_quick dipakai untuk mode --quick.
+    """
+    name: str
+    setup: Callable[..., Callable[[], Any]]
+    params: List[Dict[str, Any]] = field(default_factory=lambda: [{}])
+    params_quick: Optional[List[Dict[str, Any]]] = None
+
+    def cases(self, quick: bool) -> Iterable[Dict[str, Any]]:
+        return self.params_quick if quick and self.params_quick is not None else self.params
+
+REGISTRY: List[Benchmark] = []
+
+def benchmark(name: str, params: Optional[List[Dict[str, Any]]] = None, quick: Optional[List[Dict[str, Any]]] = None):
+    """Decorator untuk mendaftarkan fungsi setup sebagai benchmark."""
+    def decorator(setup: Callable[..., Callable[[], Any]]):
+        REGISTRY.append(Benchmark(name, setup, params or [{}], quick))
+        return setup
+    return decorator
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    """ID stabil sebuah kasus, misal 'schema.format_schema_info[tables=500]'."""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in sorted(params.items()))}]"
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Ukur fn: jumlah loop ditentukan otomatis agar satu repeat >= min_time detik,
+    lalu ambil waktu per panggilan terbaik dan median dari beberapa repeat, serta
+    puncak alokasi memori satu panggilan.
+    """
+    fn()  # warm-up
+    timer = timeit.Timer(fn)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    if elapsed / loops > 1.0:
+        # Kasus besar (misal 1 juta baris): cukup beberapa repeat
+        repeat = min(repeat, 3)
+    per_call = [timer.timeit(loops) / loops for _ in range(repeat)]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_ms": min(per_call) * 1000,
+        "median_ms": statistics.median(per_call) * 1000,
+        "loops": loops,
+        "peak_kib": peak / 1024
+    }
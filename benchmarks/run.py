@@ -0,0 +1,99 @@
+"""
+Jalankan micro-benchmark dan simpan/bandingkan baseline.
+
+    python -m benchmarks.run                       # semua kasus
+    python -m benchmarks.run --quick --filter result.
+    python -m benchmarks.run --save reference      # tulis benchmarks/baselines/reference.json
+    python -m benchmarks.run --compare reference   # keluar kode 1 jika ada regresi
+
+Baseline menyimpan commit git, versi Python dan platform agar angka antar mesin tidak
+dibandingkan tanpa sadar; simpan baseline dari mesin yang sama dengan pembanding (misal CI).
+"""
+from typing import Any, Dict, List
+from pathlib import Path
+from benchmarks.harness import REGISTRY, case_id, measure
+import benchmarks.bench_hotpath  # noqa: F401  (mendaftarkan benchmark)
+import subprocess
+import platform
+import argparse
+import datetime
+import json
+import sys
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+def run_benchmarks(quick: bool, name_filter: str, repeat: int, min_time: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for bench in REGISTRY:
+        if name_filter and name_filter not in bench.name:
+            continue
+        for params in bench.cases(quick):
+            key = case_id(bench.name, params)
+            fn = bench.setup(**params)
+            results[key] = measure(fn, repeat=repeat, min_time=min_time)
+            r = results[key]
+            print(f"{key:<50} {r['best_ms']:>12.4f} ms {r['median_ms']:>12.4f} ms {r['peak_kib']:>12.1f} KiB", flush=True)
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Kasus yang waktu median atau puncak alokasinya naik melebihi threshold relatif."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        time_ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        memory_ratio = current["peak_kib"] / previous["peak_kib"] if previous["peak_kib"] else 1.0
+        line = f"{key:<50} waktu x{time_ratio:.2f}  memori x{memory_ratio:.2f}"
+        print(line)
+        if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            regressions.append(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark jalur panas NL2SQL")
+    parser.add_argument("--quick", action="store_true", help="Hanya ukuran kecil (untuk smoke test)")
+    parser.add_argument("--filter", default="", help="Jalankan benchmark yang namanya mengandung teks ini")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Durasi minimum satu repeat (detik)")
+    parser.add_argument("--save", metavar="NAME", help="Simpan hasil sebagai baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="Bandingkan dengan baseline NAME")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Toleransi regresi relatif (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    print(f"{'case':<50} {'best':>15} {'median':>15} {'peak alloc':>16}")
+    results = run_benchmarks(args.quick, args.filter, args.repeat, args.min_time)
+
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save}.json"
+        with open(path, "w") as f:
+            json.dump({
+                "commit": _git_commit(),
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline disimpan ke {path}")
+
+    if args.compare:
+        with open(BASELINES_DIR / f"{args.compare}.json") as f:
+            baseline = json.load(f)
+        print(f"\nDibandingkan dengan baseline '{args.compare}' (commit {baseline.get('commit')}, {baseline.get('platform')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegresi terdeteksi:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nTidak ada regresi.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Generator data sintetis deterministik untuk benchmark (skema, sampel, hasil query, SQL)."""
+from typing import Any, Dict, List, Tuple
+import datetime
+import random
+
+COLUMN_TYPES = ["integer", "bigint", "numeric", "character varying", "text", "date", "timestamp without time zone", "boolean"]
+
+def synthetic_schema(tables: int, columns_per_table: int = 12, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Skema berbentuk keluaran get_table_schema: setiap tabel punya kolom id, beberapa
+    kolom acak dan sampai dua foreign key ke tabel sebelumnya.
+    """
+    rng = random.Random(seed)
+    schema = []
+    for t in range(tables):
+        name = f"table_{t:04d}"
+        columns = [{"name": "id", "type": "integer", "nullable": False, "default": None}]
+        for c in range(columns_per_table - 1):
+            columns.append({
+                "name": f"col_{c:02d}",
+                "type": rng.choice(COLUMN_TYPES),
+                "nullable": rng.random() < 0.5,
+                "default": None
+            })
+        relationships = [
+            {"column": f"col_{r:02d}", "foreign_table": f"table_{rng.randrange(t):04d}", "foreign_column": "id"}
+            for r in range(min(2, t))
+        ]
+        schema.append({"table_name": name, "columns": columns, "relationships": relationships})
+    return schema
+
+def synthetic_sample_rows(rows: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Sampel baris seperti keluaran get_table_sample_data."""
+    rng = random.Random(seed)
+    base = datetime.date(2023, 1, 1)
+    return [
+        {
+            "id": i,
+            "customer_name": f"Pelanggan {rng.randrange(10_000)}",
+            "city": rng.choice(["Jakarta", "Bandung", "Surabaya", "Medan"]),
+            "amount": round(rng.uniform(10_000, 5_000_000), 2),
+            "sale_date": base + datetime.timedelta(days=rng.randrange(730))
+        }
+        for i in range(rows)
+    ]
+
+def synthetic_result(rows: int, seed: int = 0) -> Tuple[List[str], List[tuple]]:
+    """Hasil query (kolom, baris tuple) campuran kategori, waktu, angka dan null."""
+    rng = random.Random(seed)
+    base = datetime.date(2022, 1, 1)
+    categories = [f"Kategori {i}" for i in range(40)]
+    columns = ["category", "sale_date", "quantity", "amount", "note"]
+    result = [
+        (
+            categories[i % 40],
+            base + datetime.timedelta(days=i % 730),
+            1 + i % 7,
+            float((i * 7919) % 5_000_000) / 100,
+            None if i % 11 == 0 else f"catatan {i % 97}"
+        )
+        for i in range(rows)
+    ]
+    rng.shuffle(result)
+    return columns, result
+
+SQL_SIZES = {
+    "simple": "SELECT category, SUM(amount) AS total FROM sales GROUP BY category ORDER BY total DESC LIMIT 10;",
+    "join": (
+        "```sql\nSELECT c.category_name, date_trunc('month', s.sale_date) AS month, SUM(s.amount) AS total_sales, "
+        "COUNT(DISTINCT s.customer_id) AS customers FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "JOIN categories c ON p.category_id = c.category_id WHERE s.sale_date >= '2023-01-01' AND s.amount > 0 "
+        "GROUP BY c.category_name, month HAVING SUM(s.amount) > 1000 ORDER BY month, total_sales DESC;\n```"
+    ),
+}
+
+def synthetic_sql(columns: int) -> str:
+    """Query lebar dengan banyak kolom, CASE dan subquery, dibungkus blok Markdown seperti keluaran LLM."""
+    select_list = ", ".join(
+        f"CASE WHEN t.col_{i % 12:02d} > {i} THEN t.col_{i % 12:02d} ELSE 0 END AS metric_{i}" for i in range(columns)
+    )
+    return (
+        f"```sql\nSELECT t.id, {select_list} FROM table_0001 t "
+        "WHERE t.id IN (SELECT r.id FROM table_0002 r WHERE r.col_01 IS NOT NULL) ORDER BY t.id;\n```"
+    )
@@ -0,0 +1,27 @@
+"""
+Konfigurasi gunicorn untuk produksi dengan preload model.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Aplikasi dan bobot model embedding dimuat sekali di proses master, lalu worker
+di-fork sehingga bobot model dibagi copy-on-write (RSS per worker lebih kecil dan
+worker baru siap lebih cepat). Koneksi database dan client LLM tetap dibuat di
+masing-masing worker setelah fork.
+"""
+import gc
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+def on_starting(server):
+    from app.core.startup import preload_models
+
+    preload_models()
+    # Pindahkan objek hasil preload ke generasi permanen GC agar siklus GC di worker
+    # tidak menyentuh (dan menyalin) halaman memori milik master
+    gc.freeze()
@@ -0,0 +1,65 @@
+-- Datasource fixture untuk load test: toko retail sederhana dengan data sintetis
+-- yang deterministik (tanpa random()), sehingga hasil query stabil antar run.
+
+DROP TABLE IF EXISTS sales;
+DROP TABLE IF EXISTS customers;
+DROP TABLE IF EXISTS products;
+DROP TABLE IF EXISTS categories;
+
+CREATE TABLE categories (
+    category_id   INTEGER PRIMARY KEY,
+    category_name VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE products (
+    product_id   INTEGER PRIMARY KEY,
+    product_name VARCHAR(100) NOT NULL,
+    category_id  INTEGER NOT NULL REFERENCES categories (category_id),
+    price        NUMERIC(12, 2) NOT NULL
+);
+
+CREATE TABLE customers (
+    customer_id   INTEGER PRIMARY KEY,
+    customer_name VARCHAR(100) NOT NULL,
+    city          VARCHAR(100) NOT NULL,
+    joined_at     DATE NOT NULL
+);
+
+CREATE TABLE sales (
+    sale_id        INTEGER PRIMARY KEY,
+    sale_date      DATE NOT NULL,
+    customer_id    INTEGER NOT NULL REFERENCES customers (customer_id),
+    product_id     INTEGER NOT NULL REFERENCES products (product_id),
+    quantity       INTEGER NOT NULL,
+    amount         NUMERIC(14, 2) NOT NULL,
+    payment_method VARCHAR(20) NOT NULL
+);
+
+INSERT INTO categories (category_id, category_name)
+SELECT i, (ARRAY['Elektronik', 'Pakaian', 'Makanan', 'Minuman', 'Rumah Tangga', 'Olahraga', 'Buku', 'Mainan'])[i]
+FROM generate_series(1, 8) AS i;
+
+INSERT INTO products (product_id, product_name, category_id, price)
+SELECT i, 'Produk ' || i, 1 + (i % 8), 10000 + (i * 7919) % 490000
+FROM generate_series(1, 200) AS i;
+
+INSERT INTO customers (customer_id, customer_name, city, joined_at)
+SELECT i,
+       'Pelanggan ' || i,
+       (ARRAY['Jakarta', 'Bandung', 'Surabaya', 'Medan', 'Makassar', 'Yogyakarta', 'Semarang', 'Denpasar'])[1 + (i % 8)],
+       DATE '2021-01-01' + (i % 1000)
+FROM generate_series(1, 5000) AS i;
+
+INSERT INTO sales (sale_id, sale_date, customer_id, product_id, quantity, amount, payment_method)
+SELECT i,
+       DATE '2022-01-01' + (i % 730),
+       1 + (i * 31) % 5000,
+       1 + (i * 17) % 200,
+       1 + i % 5,
+       (1 + i % 5) * (10000 + ((1 + (i * 17) % 200) * 7919) % 490000),
+       (ARRAY['transfer', 'kartu kredit', 'e-wallet'])[1 + (i % 3)]
+FROM generate_series(1, 200000) AS i;
+
+CREATE INDEX sales_sale_date_idx ON sales (sale_date);
+CREATE INDEX sales_product_id_idx ON sales (product_id);
+ANALYZE;
@@ -0,0 +1,17 @@
+-- Tabel minimal database toolsBI yang dibaca service: registri datasource dan knowledge base.
+-- Parameter :host, :port, :database_name, :username, :password dan :id_datasource
+-- diisi oleh loadtest.setup_fixtures.
+
+CREATE TABLE IF NOT EXISTS datasources (
+    id_datasource INTEGER PRIMARY KEY,
+    host          VARCHAR(255) NOT NULL,
+    port          INTEGER NOT NULL,
+    database_name VARCHAR(255) NOT NULL,
+    username      VARCHAR(255) NOT NULL,
+    password      VARCHAR(255) NOT NULL
+);
+
+DELETE FROM datasources WHERE id_datasource = :id_datasource;
+
+INSERT INTO datasources (id_datasource, host, port, database_name, username, password)
+VALUES (:id_datasource, :host, :port, :database_name, :username, :password);
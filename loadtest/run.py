@@ -0,0 +1,237 @@
+"""
+Driver load test: kirim beban konkuren ke service dan laporkan latensi per endpoint.
+
+    python -m loadtest.run --boot --mix convert=6,analyze=3,embed=1 --concurrency 32 --duration 60
+    python -m loadtest.run --base-url http://127.0.0.1:8100 --requests 2000 --output hasil.json
+    python -m loadtest.run --boot --duration 60 --baseline baseline.json --max-regression 0.15
+
+Dengan --baseline, proses keluar dengan kode 1 jika p95 atau error rate endpoint mana pun
+memburuk melebihi --max-regression dibanding laporan baseline (keluaran --output sebelumnya).
+"""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from loadtest.workloads import Workload, parse_mix
+import numpy as np
+import subprocess
+import argparse
+import asyncio
+import random
+import httpx
+import json
+import time
+import sys
+import os
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, latency: float, status: str, ok: bool):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        count = len(self.latencies)
+        latencies_ms = np.asarray(self.latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if count else (0.0, 0.0, 0.0)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_rps": count / elapsed if elapsed else 0.0,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies_ms.max()) if count else 0.0,
+            "statuses": self.statuses
+        }
+
+async def _worker(
+    client: httpx.AsyncClient,
+    mix: List[Workload],
+    rng: random.Random,
+    options: Dict[str, Any],
+    stats: Dict[str, EndpointStats],
+    stop_at: float,
+    budget: Optional[List[int]],
+    record: bool
+):
+    weights = [w.weight for w in mix]
+    while time.monotonic() < stop_at:
+        if budget is not None:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        workload = rng.choices(mix, weights=weights)[0]
+        body = workload.build_body(rng, options)
+        headers = {"X-Request-Deadline": str(options["deadline"])} if options.get("deadline") else None
+        started = time.perf_counter()
+        try:
+            response = await client.request(workload.method, workload.path, json=body, headers=headers)
+            status, ok = str(response.status_code), response.status_code < 400
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        if record:
+            stats.setdefault(workload.name, EndpointStats()).record(time.perf_counter() - started, status, ok)
+
+async def run_load(
+    base_url: str,
+    mix: List[Workload],
+    concurrency: int,
+    duration: Optional[float],
+    requests: Optional[int],
+    warmup: float,
+    options: Dict[str, Any],
+    seed: int
+) -> Dict[str, Any]:
+    """Jalankan beban konkuren dan kembalikan laporan per endpoint."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=options["timeout"], limits=limits) as client:
+        if warmup > 0:
+            await asyncio.gather(*(
+                _worker(client, mix, random.Random(seed + 10_000 + i), options, {}, time.monotonic() + warmup, None, False)
+                for i in range(concurrency)
+            ))
+
+        stats: Dict[str, EndpointStats] = {}
+        budget = [requests] if requests else None
+        stop_at = time.monotonic() + duration if duration else float("inf")
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, mix, random.Random(seed + i), options, stats, stop_at, budget, True)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.latencies.extend(endpoint_stats.latencies)
+        total.errors += endpoint_stats.errors
+        for status, count in endpoint_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+    return {
+        "config": {
+            "base_url": base_url,
+            "mix": {w.name: w.weight for w in mix},
+            "concurrency": concurrency,
+            "duration": duration,
+            "requests": requests,
+            "seed": seed,
+            "llm_latency_ms": os.getenv("LOADTEST_LLM_LATENCY_MS")
+        },
+        "elapsed_seconds": elapsed,
+        "endpoints": {name: s.summary(elapsed) for name, s in sorted(stats.items())},
+        "total": total.summary(elapsed)
+    }
+
+def print_report(report: Dict[str, Any]):
+    header = f"{'endpoint':<10} {'req':>7} {'rps':>8} {'err%':>7} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'maxms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        print(
+            f"{name:<10} {s['requests']:>7} {s['throughput_rps']:>8.1f} {s['error_rate'] * 100:>6.2f}% "
+            f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}"
+        )
+    for name, s in report["endpoints"].items():
+        if s["errors"]:
+            print(f"  {name} status: {s['statuses']}")
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Daftar regresi p95/error rate yang melebihi toleransi dibanding baseline."""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] > 0 and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["error_rate"] > previous["error_rate"] + max_regression * 0.1:
+            regressions.append(f"{name}: error rate {previous['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return regressions
+
+def _boot_server(port: int, extra_args: List[str]) -> subprocess.Popen:
+    """Jalankan loadtest.server sebagai subprocess dan tunggu sampai siap menerima request."""
+    process = subprocess.Popen([sys.executable, "-m", "loadtest.server", "--port", str(port), *extra_args])
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server load test berhenti dengan kode {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server load test tidak siap dalam 120 detik")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test end-to-end NL2SQL service")
+    parser.add_argument("--base-url", default=None, help="URL service yang sudah berjalan (abaikan jika --boot)")
+    parser.add_argument("--boot", action="store_true", help="Jalankan loadtest.server sebagai subprocess")
+    parser.add_argument("--port", type=int, default=8100, help="Port server jika --boot")
+    parser.add_argument("--server-args", default="", help="Argumen tambahan untuk loadtest.server, misal '--llm-latency-ms 400'")
+    parser.add_argument("--mix", default="convert=6,analyze=3,embed=1", help="Campuran beban, misal convert=6,batch=1")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=None, help="Durasi pengukuran dalam detik")
+    parser.add_argument("--requests", type=int, default=None, help="Jumlah request (alternatif --duration)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Detik pemanasan yang tidak diukur")
+    parser.add_argument("--id-datasource", type=int, default=int(os.getenv("LOADTEST_ID_DATASOURCE", "9001")))
+    parser.add_argument("--users", type=int, default=8, help="Jumlah user_id berbeda yang disimulasikan")
+    parser.add_argument("--batch-size", type=int, default=4, help="Jumlah prompt per request batch")
+    parser.add_argument("--deadline", type=float, default=None, help="Nilai header X-Request-Deadline (detik)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout HTTP klien (detik)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Simpan laporan JSON ke file ini")
+    parser.add_argument("--baseline", default=None, help="Laporan JSON sebelumnya untuk deteksi regresi")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Toleransi kenaikan p95 relatif (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        args.duration = 30.0
+    mix = parse_mix(args.mix)
+    options = {
+        "id_datasource": args.id_datasource,
+        "users": args.users,
+        "batch_size": args.batch_size,
+        "deadline": args.deadline,
+        "timeout": args.timeout
+    }
+
+    server = None
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    if args.boot:
+        server = _boot_server(args.port, args.server_args.split())
+    try:
+        report = asyncio.run(run_load(
+            base_url, mix, args.concurrency, args.duration, args.requests, args.warmup, options, args.seed
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegresi terdeteksi:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nTidak ada regresi dibanding baseline.")
+
+if __name__ == "__main__":
+    main()
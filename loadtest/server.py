@@ -0,0 +1,62 @@
+"""
+Jalankan aplikasi FastAPI dengan stub LLM dan embedder untuk load test.
+
+Konfigurasi database diambil dari environment (DB_HOST, DB_NAME, ...), lihat
+keluaran loadtest.setup_fixtures.
+
+    python -m loadtest.server --port 8100 --llm-latency-ms 800 --embedder stub
+"""
+from loadtest.stubs import install_stubs
+import argparse
+import logging
+import os
+
+def main():
+    parser = argparse.ArgumentParser(description="Server NL2SQL dengan stub untuk load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--llm-latency-ms", type=float, default=None, help="Latensi stub LLM (default 800)")
+    parser.add_argument("--llm-jitter-ms", type=float, default=None, help="Jitter deterministik stub LLM")
+    parser.add_argument("--embed-latency-ms", type=float, default=None, help="Latensi stub embedder per kalimat")
+    parser.add_argument("--embedder", choices=["stub", "sentence-transformers"], default="stub")
+    parser.add_argument("--trace-endpoint", default=None, help="Kirim trace ke endpoint ini (misal loadtest.trace_sink)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    for env, value in (
+        ("LOADTEST_LLM_LATENCY_MS", args.llm_latency_ms),
+        ("LOADTEST_LLM_JITTER_MS", args.llm_jitter_ms),
+        ("LOADTEST_EMBED_LATENCY_MS", args.embed_latency_ms),
+    ):
+        if value is not None:
+            os.environ[env] = str(value)
+    os.environ["LOADTEST_EMBEDDER"] = args.embedder
+    # Jangan kirim trace load test ke LangSmith asli dan jangan pernah memanggil Gemini asli
+    if args.trace_endpoint:
+        os.environ["LANGCHAIN_API_KEY"] = "loadtest"
+        os.environ["LANGSMITH_ENDPOINT"] = args.trace_endpoint
+    else:
+        os.environ["LANGCHAIN_API_KEY"] = ""
+    os.environ.setdefault("GOOGLE_API_KEY", "loadtest-stub")
+    os.environ.setdefault("DEBUG", "false")
+
+    import uvicorn
+    logging.basicConfig(level=args.log_level.upper())
+    uvicorn.run(
+        "loadtest.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level
+    )
+
+def create_app():
+    """Factory uvicorn: stub dipasang di setiap proses worker sebelum aplikasi di-import."""
+    install_stubs(os.getenv("LOADTEST_EMBEDDER", "stub"))
+    from app.main import app
+    return app
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import Field
+from loadtest.workloads import sql_for_prompt
+import numpy as np
+import hashlib
+import asyncio
+import random
+import types
+import time
+import sys
+import os
+
+CHART_MARKER = "Rekomendasikan tipe diagram"
+ANALYSIS_MARKER = "Anda adalah analis data profesional"
+
+STUB_ANALYSIS = (
+    "Kategori dengan nilai tertinggi mendominasi total, sementara sisanya tersebar merata. "
+    "Tren utama menunjukkan kenaikan bertahap sepanjang periode data."
+)
+STUB_CHART = '{"recommended_type": "bar", "reason": "Perbandingan nilai antar kategori"}'
+
+def _latency_seconds(base_ms: float, jitter_ms: float, text: str) -> float:
+    """Latensi deterministik: jitter diturunkan dari hash prompt, bukan acak per panggilan."""
+    if jitter_ms <= 0:
+        return base_ms / 1000
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+    return max(0.0, base_ms + random.Random(seed).uniform(-jitter_ms, jitter_ms)) / 1000
+
+class StubGemini(LLM):
+    """
+    Pengganti GoogleGenerativeAI untuk load test.
+
+    Jawaban ditentukan dari isi prompt: SQL fixture untuk generasi SQL, teks tetap
+    untuk analisis dan JSON tetap untuk rekomendasi diagram. Latensi diatur lewat
+    LOADTEST_LLM_LATENCY_MS dan LOADTEST_LLM_JITTER_MS.
+    """
+
+    model: str = "stub-gemini"
+    google_api_key: Optional[str] = None
+    temperature: float = 0.0
+    latency_ms: float = Field(default_factory=lambda: float(os.getenv("LOADTEST_LLM_LATENCY_MS", "800")))
+    jitter_ms: float = Field(default_factory=lambda: float(os.getenv("LOADTEST_LLM_JITTER_MS", "0")))
+
+    model_config = {"extra": "ignore"}
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-gemini"
+
+    def _respond(self, prompt: str) -> str:
+        if CHART_MARKER in prompt:
+            return STUB_CHART
+        if ANALYSIS_MARKER in prompt:
+            return STUB_ANALYSIS
+        return sql_for_prompt(prompt)
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        time.sleep(_latency_seconds(self.latency_ms, self.jitter_ms, prompt))
+        return self._respond(prompt)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        await asyncio.sleep(_latency_seconds(self.latency_ms, self.jitter_ms, prompt))
+        return self._respond(prompt)
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[GenerationChunk]:
+        yield GenerationChunk(text=self._call(prompt, stop, run_manager, **kwargs))
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[GenerationChunk]:
+        # Token pertama setelah setengah latensi, sisanya tersebar rata per kata
+        total = _latency_seconds(self.latency_ms, self.jitter_ms, prompt)
+        words = self._respond(prompt).split(" ")
+        await asyncio.sleep(total / 2)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(total / 2 / len(words))
+            yield GenerationChunk(text=word if i == 0 else f" {word}")
+
+class StubEmbedder:
+    """
+    Pengganti SentenceTransformer: vektor ternormalisasi 768 dimensi yang deterministik
+    per teks, dengan latensi LOADTEST_EMBED_LATENCY_MS per kalimat.
+    """
+
+    dimension = 768
+
+    def __init__(self, model_name_or_path: str = "stub", *args, **kwargs):
+        self.model_name = model_name_or_path
+        self.latency_ms = float(os.getenv("LOADTEST_EMBED_LATENCY_MS", "5"))
+
+    def _embed(self, sentence: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(sentence.encode("utf-8"), digest_size=8).digest(), "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, sentences: Union[str, List[str]], *args, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        batch = [sentences] if single else list(sentences)
+        time.sleep(self.latency_ms * len(batch) / 1000)
+        vectors = np.stack([self._embed(s) for s in batch]) if batch else np.empty((0, self.dimension), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+def install_stubs(embedder: str = "stub"):
+    """
+    Pasang stub sebelum modul aplikasi di-import.
+
+    Args:
+        embedder: "stub" untuk StubEmbedder, "sentence-transformers" untuk model asli.
+    """
+    import langchain_google_genai
+    langchain_google_genai.GoogleGenerativeAI = StubGemini
+
+    if embedder == "stub":
+        module = types.ModuleType("sentence_transformers")
+        module.SentenceTransformer = StubEmbedder
+        sys.modules["sentence_transformers"] = module
+    elif embedder != "sentence-transformers":
+        raise ValueError(f"Embedder tidak dikenal: {embedder}")
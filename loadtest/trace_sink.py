@@ -0,0 +1,58 @@
+"""
+Stub endpoint LangSmith lokal untuk menguji exporter trace tanpa akun LangSmith.
+
+Menerima POST /runs/batch dan menghitung run yang masuk; latensi respons bisa
+dinaikkan untuk memastikan tracing tidak menambah latensi request pengguna.
+
+    python -m loadtest.trace_sink --port 8200 --latency-ms 500
+    python -m loadtest.server --trace-endpoint http://127.0.0.1:8200
+    curl http://127.0.0.1:8200/stats
+"""
+from fastapi import FastAPI, Request
+import argparse
+import asyncio
+import json
+import zlib
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="LangSmith trace sink")
+    stats = {"batches": 0, "runs": 0, "errors": 0, "names": {}}
+
+    @app.get("/info")
+    async def info():
+        return {}
+
+    @app.post("/runs/batch")
+    async def runs_batch(request: Request):
+        await asyncio.sleep(latency_ms / 1000)
+        body = await request.body()
+        if request.headers.get("content-encoding") in ("deflate", "zlib"):
+            body = zlib.decompress(body)
+        payload = json.loads(body or b"{}")
+        runs = payload.get("post", []) + payload.get("patch", [])
+        stats["batches"] += 1
+        stats["runs"] += len(runs)
+        for run in runs:
+            stats["names"][run.get("name")] = stats["names"].get(run.get("name"), 0) + 1
+            if run.get("error"):
+                stats["errors"] += 1
+        return {}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub endpoint LangSmith untuk pengujian tracing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latensi tambahan setiap batch")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass
+import random
+
+API_PREFIX = "/api/v1"
+
+# Prompt fixture beserta SQL yang dikembalikan LLM stub untuk prompt tersebut.
+# SQL ditulis untuk skema datasource fixture (loadtest/fixtures/datasource.sql).
+PROMPT_SQL = {
+    "total penjualan per kategori": (
+        "SELECT c.category_name, SUM(s.amount) AS total_sales "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "JOIN categories c ON p.category_id = c.category_id "
+        "GROUP BY c.category_name ORDER BY total_sales DESC;"
+    ),
+    "tren penjualan bulanan": (
+        "SELECT date_trunc('month', s.sale_date) AS month, SUM(s.amount) AS total_sales "
+        "FROM sales s GROUP BY month ORDER BY month;"
+    ),
+    "top 10 produk terlaris": (
+        "SELECT p.product_name, SUM(s.quantity) AS total_sold "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "GROUP BY p.product_name ORDER BY total_sold DESC LIMIT 10;"
+    ),
+    "jumlah pelanggan per kota": (
+        "SELECT city, COUNT(*) AS total_customers FROM customers GROUP BY city ORDER BY total_customers DESC;"
+    ),
+    "daftar transaksi terbaru": (
+        "SELECT s.sale_id, s.sale_date, cu.customer_name, p.product_name, s.quantity, s.amount "
+        "FROM sales s JOIN customers cu ON s.customer_id = cu.customer_id "
+        "JOIN products p ON s.product_id = p.product_id ORDER BY s.sale_date DESC;"
+    ),
+    "rata-rata nilai transaksi per metode pembayaran": (
+        "SELECT payment_method, AVG(amount) AS avg_amount, COUNT(*) AS transactions "
+        "FROM sales GROUP BY payment_method;"
+    ),
+}
+
+DEFAULT_SQL = PROMPT_SQL["total penjualan per kategori"]
+
+KNOWLEDGE_TEXTS = [
+    "Penjualan bersih adalah total amount dikurangi retur.",
+    "Pelanggan aktif adalah pelanggan dengan transaksi dalam 90 hari terakhir.",
+    "Kategori elektronik mencakup laptop, ponsel dan aksesoris.",
+    "Metode pembayaran terdiri dari transfer, kartu kredit dan e-wallet.",
+]
+
+def sql_for_prompt(text: str) -> str:
+    """SQL fixture untuk prompt yang muncul di teks prompt LLM (prompt terakhir yang cocok)."""
+    lowered = text.lower()
+    best, best_position = DEFAULT_SQL, -1
+    for prompt, sql in PROMPT_SQL.items():
+        position = lowered.rfind(prompt)
+        if position > best_position:
+            best, best_position = sql, position
+    return best
+
+@dataclass
+class Workload:
+    """Satu jenis request dalam campuran beban."""
+    name: str
+    method: str
+    path: str
+    weight: float
+    build_body: Callable[[random.Random, Dict[str, Any]], Optional[Dict[str, Any]]]
+
+def _convert_body(rng: random.Random, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "prompt": rng.choice(list(PROMPT_SQL)),
+        "id_datasource": options["id_datasource"],
+        "user_id": rng.randint(1, options["users"])
+    }
+
+def _batch_body(rng: random.Random, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "prompts": rng.sample(list(PROMPT_SQL), k=min(options["batch_size"], len(PROMPT_SQL))),
+        "id_datasource": options["id_datasource"],
+        "user_id": rng.randint(1, options["users"])
+    }
+
+def _analyze_body(rng: random.Random, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {"query": rng.choice(list(PROMPT_SQL.values())), "database_name": str(options["id_datasource"])}
+
+def _embed_body(rng: random.Random, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {"content": rng.choice(KNOWLEDGE_TEXTS)}
+
+WORKLOADS: Dict[str, Workload] = {
+    "convert": Workload("convert", "POST", f"{API_PREFIX}/nl2sql/convert", 1.0, _convert_body),
+    "batch": Workload("batch", "POST", f"{API_PREFIX}/nl2sql/convert/batch", 1.0, _batch_body),
+    "analyze": Workload("analyze", "POST", f"{API_PREFIX}/analyze/analyze", 1.0, _analyze_body),
+    "embed": Workload("embed", "POST", f"{API_PREFIX}/knowledge/embed", 1.0, _embed_body),
+}
+
+def parse_mix(spec: str) -> List[Workload]:
+    """
+    Parse campuran beban, misal "convert=6,analyze=3,embed=1".
+    Nama tanpa bobot mendapat bobot 1.
+    """
+    mix = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        if name not in WORKLOADS:
+            raise ValueError(f"Workload tidak dikenal: {name} (pilihan: {', '.join(WORKLOADS)})")
+        base = WORKLOADS[name]
+        mix.append(Workload(base.name, base.method, base.path, float(weight or 1), base.build_body))
+    if not mix:
+        raise ValueError("Campuran beban kosong")
+    return mix
@@ -0,0 +1,12 @@
+import os
+
+# Settings wajib diisi saat import app.core.config; test tidak membuka koneksi sungguhan
+for name, value in {
+    "GOOGLE_API_KEY": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)
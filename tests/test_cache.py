@@ -0,0 +1,157 @@
+import os
+import stat
+
+import pytest
+
+from app.core.config import settings
+from app.utils import cache as cache_module
+from app.utils.cache import CacheBackend, SQLiteCache, TTLCache, create_cache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key, default=None):
+            return default
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache("t", max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=60)
+
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = TTLCache("t", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_invalidate_matching_and_stats(clock):
+    cache = TTLCache("t", max_entries=10, ttl_seconds=60)
+    cache.set((1, "x"), "a")
+    cache.set((1, "y"), "b")
+    cache.set((2, "x"), "c")
+
+    assert cache.invalidate_matching(lambda key: key[0] == 1) == 2
+    assert cache.get((1, "x")) is None
+    assert cache.get((2, "x")) == "c"
+
+    stats = cache.stats()
+    assert stats["backend"] == "memory"
+    assert stats["size"] == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteCache("shared", max_entries=10, ttl_seconds=60, path=path)
+    reader = SQLiteCache("shared", max_entries=10, ttl_seconds=60, path=path)
+    other = SQLiteCache("other", max_entries=10, ttl_seconds=60, path=path)
+
+    writer.set((1, "x"), {"rows": [1, 2]})
+
+    assert reader.get((1, "x")) == {"rows": [1, 2]}
+    assert other.get((1, "x")) is None
+    reader.invalidate((1, "x"))
+    assert writer.get((1, "x")) is None
+
+
+def test_sqlite_cache_expires_entries(tmp_path, clock):
+    cache = SQLiteCache("t", max_entries=10, ttl_seconds=5, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=60)
+
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["size"] == 1
+
+
+def test_sqlite_cache_invalidate_matching_sees_tuple_keys(tmp_path):
+    cache = SQLiteCache("t", max_entries=10, ttl_seconds=60, path=str(tmp_path / "cache.sqlite3"))
+    cache.set((1, ("a", "b")), "x")
+    cache.set((2, None), "y")
+    seen = []
+
+    def predicate(key):
+        seen.append(key)
+        return key[0] == 1
+
+    assert cache.invalidate_matching(predicate) == 1
+    assert (1, ("a", "b")) in seen
+    assert cache.get((1, ("a", "b"))) is None
+    assert cache.get((2, None)) == "y"
+
+
+def test_create_cache_selects_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "CACHE_BACKENDS", {"local": "memory"})
+    monkeypatch.setattr(settings, "CACHE_SQLITE_PATH", str(tmp_path / "sub" / "cache.sqlite3"))
+
+    assert isinstance(create_cache("local", max_entries=1, ttl_seconds=1), TTLCache)
+    shared = create_cache("analysis", max_entries=1, ttl_seconds=1)
+    assert isinstance(shared, SQLiteCache)
+    assert shared.path == str(tmp_path / "sub" / "cache.sqlite3")
+
+    monkeypatch.setattr(settings, "CACHE_BACKENDS", {"local": "redis"})
+    with pytest.raises(ValueError):
+        create_cache("local", max_entries=1, ttl_seconds=1)
+
+
+def test_sqlite_cache_file_is_private(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SQLiteCache("t", max_entries=10, ttl_seconds=60, path=str(path)).set("a", 1)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_sqlite_cache_stale_pickle_is_a_miss(tmp_path):
+    cache = SQLiteCache("t", max_entries=10, ttl_seconds=60, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("a", 1)
+    # Pickle yang merujuk modul yang sudah tidak ada
+    cache._connect().execute("UPDATE cache_entries SET value = ?", (b"cmodul_hilang\nKelas\n.",))
+
+    assert cache.get("a", "default") == "default"
+    stats = cache.stats()
+    assert (stats["misses"], stats["errors"]) == (1, 1)
+
+
+def test_create_cache_keeps_private_caches_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "CACHE_SQLITE_PATH", str(tmp_path / "cache.sqlite3"))
+
+    assert isinstance(create_cache("context", max_entries=1, ttl_seconds=1, allow_shared=False), TTLCache)
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.utils.cancellation import CLIENT_CLOSED_REQUEST, cancel_on_disconnect, stream_until_disconnect
+
+class FakeRequest:
+    """Request palsu yang dianggap terputus setelah disconnect() dipanggil."""
+
+    method = "POST"
+
+    class url:
+        path = "/test"
+
+    def __init__(self):
+        self.disconnected = False
+
+    def disconnect(self):
+        self.disconnected = True
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+def test_cancel_on_disconnect_returns_result():
+    async def work():
+        await asyncio.sleep(0.01)
+        return 42
+
+    assert asyncio.run(cancel_on_disconnect(FakeRequest(), work(), poll_interval=0.005)) == 42
+
+def test_cancel_on_disconnect_cancels_work():
+    cancelled = []
+
+    async def scenario():
+        request = FakeRequest()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        asyncio.get_event_loop().call_later(0.02, request.disconnect)
+        await cancel_on_disconnect(request, work(), poll_interval=0.005)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(scenario())
+    assert exc.value.status_code == CLIENT_CLOSED_REQUEST
+    assert cancelled == [True]
+
+def test_stream_until_disconnect_yields_all_items():
+    async def events():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield i
+
+    async def scenario():
+        return [item async for item in stream_until_disconnect(FakeRequest(), events(), poll_interval=0.005)]
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+def test_stream_until_disconnect_cancels_pending_stage():
+    cancelled = []
+
+    async def events():
+        yield "sql"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        yield "never"
+
+    async def scenario():
+        request = FakeRequest()
+        received = []
+        stream = stream_until_disconnect(request, events(), poll_interval=0.005)
+        received.append(await stream.__anext__())
+        request.disconnect()
+        async for item in stream:
+            received.append(item)
+        return received
+
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=2)) == ["sql"]
+    assert cancelled == [True]
@@ -0,0 +1,33 @@
+from datetime import date
+import pytest
+from app.services.chart_service import classify_chart, infer_column_roles
+from app.services.query_result import QueryResult
+
+def test_infer_column_roles():
+    data = QueryResult.from_rows(
+        ["tahun", "avg_monthly_sales", "region", "total"],
+        [(2023, 1.5, "a", 10), (2024, 2.5, "b", 20)]
+    )
+    roles = {r["name"]: r["role"] for r in infer_column_roles(data)}
+    assert roles == {"tahun": "temporal", "avg_monthly_sales": "measure", "region": "dimension", "total": "measure"}
+
+@pytest.mark.parametrize("columns, rows, expected", [
+    (["a"], [], "table"),
+    (["total"], [(42,)], "table"),
+    (["day", "amount"], [(date(2024, 1, 1), 1), (date(2024, 1, 2), 2)], "line"),
+    (["category", "amount"], [("a", 1), ("b", 2), ("c", 3)], "pie"),
+    (["category", "amount"], [("a", -1), ("b", 2), ("c", 3)], "bar"),
+    (["category", "amount"], [(str(i), i) for i in range(20)], "bar"),
+    (["category", "amount"], [(str(i), i) for i in range(40)], "table"),
+    (["a", "b", "c", "d", "e"], [(1, 2, 3, 4, 5)], "table"),
+    (["name", "city"], [("x", "y")], "table"),
+])
+def test_classify_chart(columns, rows, expected):
+    recommendation, confidence = classify_chart(QueryResult.from_rows(columns, rows))
+    assert recommendation["recommended_type"] == expected
+    assert 0 < confidence <= 1
+
+def test_single_dimension_is_low_confidence():
+    recommendation, confidence = classify_chart(QueryResult.from_rows(["category"], [("a",), ("b",)]))
+    assert recommendation["recommended_type"] == "pie"
+    assert confidence < 0.8
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import stat
+
+from app.services import nl2sql_service
+from app.services.context_store import ContextSnapshotStore
+from app.services.nl2sql_service import NL2SQLService
+from app.utils.cache import TTLCache
+
+CONTEXT = {
+    "db_name": "toko",
+    "schema_info": "TABEL orders",
+    "sample_data": "| id |\n| 1 |",
+    "tables": ["orders"],
+    "has_table_filter": False,
+    "version": "v1",
+}
+
+
+def test_snapshot_excludes_samples_by_default(tmp_path):
+    store = ContextSnapshotStore(str(tmp_path / "snap.sqlite3"))
+    store.save("k", 1, "fp", CONTEXT)
+
+    snapshot = store.load("k")
+    assert snapshot["fingerprint"] == "fp"
+    assert "sample_data" not in snapshot["context"]
+    assert snapshot["context"]["schema_info"] == "TABEL orders"
+
+
+def test_snapshot_includes_samples_when_enabled(tmp_path):
+    store = ContextSnapshotStore(str(tmp_path / "snap.sqlite3"), include_samples=True)
+    store.save("k", 1, "fp", CONTEXT)
+
+    assert store.load("k")["context"]["sample_data"] == CONTEXT["sample_data"]
+
+
+def test_snapshot_file_is_private(tmp_path):
+    path = tmp_path / "snap.sqlite3"
+    store = ContextSnapshotStore(str(path))
+    store.save("k", 1, "fp", CONTEXT)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_snapshot_without_samples_is_completed_on_load(monkeypatch):
+    service = NL2SQLService.__new__(NL2SQLService)
+    fetched = []
+
+    def fake_samples(id_datasource, tables):
+        fetched.append((id_datasource, tables))
+        return "| id |\n| 2 |"
+
+    monkeypatch.setattr(service, "_build_sample_data", fake_samples)
+    monkeypatch.setattr(nl2sql_service.context_cache, "get", lambda key, default=None: None)
+    stored = {k: v for k, v in CONTEXT.items() if k != "sample_data"}
+
+    context = service._snapshot_context((1, None), 1, {"context": stored})
+
+    assert fetched == [(1, ["orders"])]
+    assert context["sample_data"] == "| id |\n| 2 |"
+    assert context["version"] == nl2sql_service._context_version("TABEL orders", "| id |\n| 2 |")
+
+
+def test_snapshot_without_samples_reuses_cached_samples(monkeypatch):
+    service = NL2SQLService.__new__(NL2SQLService)
+    monkeypatch.setattr(service, "_build_sample_data", lambda *a: _fail())
+    monkeypatch.setattr(nl2sql_service.context_cache, "get", lambda key, default=None: CONTEXT)
+    stored = {k: v for k, v in CONTEXT.items() if k != "sample_data"}
+
+    context = service._snapshot_context((1, None), 1, {"context": stored})
+
+    assert context["sample_data"] == CONTEXT["sample_data"]
+
+
+def _fail():
+    raise AssertionError("sampel tidak boleh diambil ulang")
+
+
+def test_preload_fills_cache_from_schema_only_snapshots(tmp_path, monkeypatch):
+    store = ContextSnapshotStore(str(tmp_path / "snap.sqlite3"))
+    store.save(nl2sql_service._snapshot_key((1, None)), 1, "fp", CONTEXT)
+    cache = TTLCache("context", max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(nl2sql_service, "context_store", store)
+    monkeypatch.setattr(nl2sql_service, "context_cache", cache)
+
+    assert nl2sql_service.preload_context_snapshots() == 1
+    preloaded = cache.get((1, None))
+    assert preloaded["schema_info"] == "TABEL orders"
+    assert preloaded["sample_data"] == ""
+
+    service = NL2SQLService.__new__(NL2SQLService)
+    monkeypatch.setattr(service, "_build_sample_data", lambda id_datasource, tables: "| id |\n| 3 |")
+    monkeypatch.setattr(nl2sql_service, "get_nl2sql_service", lambda: service)
+
+    async def run_inline(id_datasource, fn, *args):
+        return fn(*args)
+
+    monkeypatch.setattr(nl2sql_service, "run_on_datasource", run_inline)
+
+    assert asyncio.run(nl2sql_service.fill_preloaded_samples()) == 1
+    filled = cache.get((1, None))
+    assert filled["sample_data"] == "| id |\n| 3 |"
+    assert "samples_pending" not in filled
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import nl2sql
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, *args, **kwargs):
+        self.session_id = "s1"
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        FakeSession.closed = True
+
+    async def generate_sql(self, prompt):
+        return "SELECT 1", 0.5
+
+
+def _client(monkeypatch):
+    async def knowledge(**kwargs):
+        return []
+
+    async def execute_and_analyze(*args):
+        return "analisis", {"recommended_type": "bar", "reason": "r"}
+
+    monkeypatch.setattr(nl2sql, "ConversationSession", FakeSession)
+    monkeypatch.setattr(nl2sql, "get_nl2sql_service", lambda: None)
+    monkeypatch.setattr(nl2sql, "retrieve_knowledge", knowledge)
+    monkeypatch.setattr(nl2sql, "execute_and_analyze", execute_and_analyze)
+    app = FastAPI()
+    app.include_router(nl2sql.router)
+    return TestClient(app)
+
+
+def test_malformed_frames_keep_session_open(monkeypatch):
+    FakeSession.closed = False
+    with _client(monkeypatch).websocket_connect("/ws?id_datasource=1") as ws:
+        assert ws.receive_json()["status"] == "ready"
+
+        ws.send_text("bukan json")
+        assert ws.receive_json()["status"] == "error"
+        ws.send_bytes(b"\x00")
+        assert ws.receive_json()["status"] == "error"
+        ws.send_text('{"prompt": 5}')
+        assert ws.receive_json()["status"] == "error"
+        assert not FakeSession.closed
+
+        ws.send_text('{"prompt": "total penjualan"}')
+        reply = ws.receive_json()
+        assert reply["status"] == "success"
+        assert reply["sql_query"] == "SELECT 1"
+    assert FakeSession.closed
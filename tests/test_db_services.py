@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services import db_services
+from app.utils.cache import SQLiteCache
+
+@pytest.fixture(autouse=True)
+def _reset_executors():
+    yield
+    db_services.shutdown_datasource_executors()
+
+def test_run_on_datasource_uses_datasource_threads():
+    async def scenario():
+        return await db_services.run_on_datasource(1001, lambda: threading.current_thread().name)
+
+    assert asyncio.run(scenario()).startswith("datasource-1001")
+
+def test_busy_datasource_does_not_block_default_executor(monkeypatch):
+    monkeypatch.setattr(settings, "DATASOURCE_MAX_CONCURRENT_QUERIES", 1)
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(db_services.run_on_datasource(1002, release.wait, 5))
+        await asyncio.sleep(0.01)
+        # Executor default dan datasource lain tetap tersedia selama datasource 1002 sibuk
+        other = await asyncio.wait_for(db_services.run_on_datasource(1003, lambda: "other"), timeout=1)
+        default = await asyncio.wait_for(asyncio.get_event_loop().run_in_executor(None, lambda: "default"), timeout=1)
+        release.set()
+        await slow
+        return other, default
+
+    assert asyncio.run(scenario()) == ("other", "default")
+
+def test_job_queued_past_timeout_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "DATASOURCE_MAX_CONCURRENT_QUERIES", 1)
+    monkeypatch.setattr(settings, "DATASOURCE_QUEUE_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        slow = asyncio.ensure_future(db_services.run_on_datasource(1004, time.sleep, 0.1))
+        await asyncio.sleep(0)
+        try:
+            await db_services.run_on_datasource(1004, lambda: "late")
+        finally:
+            await slow
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(scenario())
+    assert exc.value.status_code == 503
+
+@pytest.fixture
+def shared_versions(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(db_services, "datasource_versions", SQLiteCache("datasource_version", 100, 60, path))
+    monkeypatch.setattr(db_services, "_seen_versions", {})
+    # Cache milik "worker lain" di host yang sama
+    return SQLiteCache("datasource_version", 100, 60, path)
+
+def test_invalidation_from_another_worker_drops_local_state(shared_versions, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(db_services, "_invalidation_listeners", [invalidated.append])
+    db_services.datasource_cache.set(2001, {"host": "old"})
+    db_services.sync_datasource_version(2001)
+    assert invalidated == []
+
+    shared_versions.set(2001, "v2")
+    db_services.sync_datasource_version(2001)
+    assert invalidated == [2001]
+    assert db_services.datasource_cache.get(2001) is None
+
+    db_services.sync_datasource_version(2001)
+    assert invalidated == [2001]
+
+def test_local_invalidation_publishes_new_version(shared_versions, monkeypatch):
+    monkeypatch.setattr(db_services, "_invalidation_listeners", [])
+    db_services.invalidate_datasource(2002)
+    first = shared_versions.get(2002)
+    db_services.invalidate_datasource(2002)
+    assert first is not None and shared_versions.get(2002) not in (None, first)
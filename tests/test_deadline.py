@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.utils.deadline import Deadline
+
+def test_from_header_caps_and_defaults():
+    assert Deadline.from_header(None).total_seconds == settings.REQUEST_DEADLINE_SECONDS
+    assert Deadline.from_header("abc").total_seconds == settings.REQUEST_DEADLINE_SECONDS
+    assert Deadline.from_header("5").total_seconds == 5.0
+    assert Deadline.from_header("100000").total_seconds == settings.REQUEST_DEADLINE_MAX_SECONDS
+    assert Deadline.from_header("-3").total_seconds == 0.0
+
+def test_budget_is_min_of_stage_and_remaining():
+    deadline = Deadline(10, {"chart": 2})
+    assert deadline.budget("chart") == pytest.approx(2)
+    assert deadline.budget("generate") == pytest.approx(10, abs=0.1)
+    assert Deadline(1, {"chart": 2}).budget("chart") <= 1
+
+def test_optional_stage_falls_back_when_over_budget():
+    async def scenario():
+        deadline = Deadline(10, {"analysis": 0.01})
+        result = await deadline.run("analysis", asyncio.sleep(1, result="late"), fallback=None)
+        return result, deadline.skipped_stages
+
+    assert asyncio.run(scenario()) == (None, ["analysis"])
+
+def test_required_stage_raises_504():
+    async def scenario():
+        await Deadline(10, {"generate": 0.01}).run("generate", asyncio.sleep(1))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(scenario())
+    assert exc.value.status_code == 504
+
+def test_expired_deadline_does_not_start_work():
+    started = []
+
+    async def work():
+        started.append(True)
+
+    async def scenario():
+        deadline = Deadline(0)
+        return await deadline.run("knowledge", work(), fallback=[]), deadline.skipped_stages
+
+    assert asyncio.run(scenario()) == ([], ["knowledge"])
+    assert started == []
+
+def test_iterate_stops_stream_at_budget():
+    async def tokens():
+        for token in ["a", "b", "c"]:
+            await asyncio.sleep(0.05 if token == "c" else 0)
+            yield token
+
+    async def scenario(budget):
+        deadline = Deadline(10, {"analysis": budget})
+        received = [token async for token in deadline.iterate("analysis", tokens())]
+        return received, deadline.skipped_stages
+
+    assert asyncio.run(scenario(1)) == (["a", "b", "c"], [])
+    assert asyncio.run(scenario(0.02)) == (["a", "b"], ["analysis"])
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LLMScheduler
+
+async def _hold(scheduler: LLMScheduler, user_id, order: list, label, priority=PRIORITY_INTERACTIVE, seconds=0.01):
+    async with scheduler.slot(user_id, priority):
+        order.append(label)
+        await asyncio.sleep(seconds)
+
+def test_priority_served_before_background():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, per_user_concurrency=10)
+        order = []
+        blocker = asyncio.ensure_future(_hold(scheduler, 1, order, "blocker"))
+        await asyncio.sleep(0)
+        background = asyncio.ensure_future(_hold(scheduler, 2, order, "background", PRIORITY_BACKGROUND))
+        interactive = asyncio.ensure_future(_hold(scheduler, 3, order, "interactive"))
+        await asyncio.gather(blocker, background, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["blocker", "interactive", "background"]
+
+def test_fair_queuing_interleaves_users():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, per_user_concurrency=10)
+        order = []
+        blocker = asyncio.ensure_future(_hold(scheduler, 0, order, 0))
+        await asyncio.sleep(0)
+        heavy = [asyncio.ensure_future(_hold(scheduler, 1, order, 1, seconds=0)) for _ in range(3)]
+        light = asyncio.ensure_future(_hold(scheduler, 2, order, 2, seconds=0))
+        await asyncio.gather(blocker, light, *heavy)
+        return order
+
+    # User 2 tidak menunggu semua request user 1 selesai
+    assert asyncio.run(scenario())[:3] == [0, 1, 2]
+
+@pytest.mark.parametrize("user_id, kwargs", [
+    (7, {"per_user_concurrency": 1}),
+    (None, {"per_user_concurrency": 10, "anonymous_concurrency": 1}),
+])
+def test_per_tenant_concurrency_limit(user_id, kwargs):
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=10, **kwargs)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with scheduler.slot(user_id):
+                peak = max(peak, scheduler.stats()["active"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(3)))
+        return peak
+
+    assert asyncio.run(scenario()) == 1
+
+def test_anonymous_rate_limited():
+    async def scenario():
+        scheduler = LLMScheduler(
+            max_concurrency=10, per_user_concurrency=10, queue_timeout=0.05, anonymous_rate_per_second=1
+        )
+        scheduler.release(await scheduler.acquire(None))
+        await scheduler.acquire(7)
+        with pytest.raises(HTTPException) as exc:
+            await scheduler.acquire(None)
+        return exc.value.status_code
+
+    assert asyncio.run(scenario()) == 503
+
+def test_queue_timeout_returns_503():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, per_user_concurrency=1, queue_timeout=0.02)
+        tenant = await scheduler.acquire(1)
+        with pytest.raises(HTTPException) as exc:
+            await scheduler.acquire(2)
+        scheduler.release(tenant)
+        return exc.value.status_code, scheduler.stats()
+
+    status, stats = asyncio.run(scenario())
+    assert status == 503
+    assert (stats["active"], stats["queue_depth"], stats["timeouts"]) == (0, 0, 1)
+
+def test_idle_tenants_are_evicted():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=4, per_user_concurrency=4)
+        await asyncio.gather(*(_hold(scheduler, user_id, [], user_id, seconds=0) for user_id in range(50)))
+        return scheduler.stats()["tracked_tenants"], len(scheduler._user_rates)
+
+    assert asyncio.run(scenario()) == (0, 0)
@@ -0,0 +1,61 @@
+import logging
+
+from app.core import logging_config
+from app.core.logging_config import SampledLogger, _log_sampled
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger():
+    logger = SampledLogger("tests.sampled")
+    handler = _Collect()
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    return logger, handler
+
+
+def test_unsampled_request_drops_info_before_record_is_created():
+    logger, handler = _logger()
+    calls = []
+
+    class Expensive:
+        def __str__(self):
+            calls.append(1)
+            return "x"
+
+    token = _log_sampled.set(False)
+    try:
+        logger.info("nilai %s", Expensive())
+        logger.warning("peringatan %s", "ditulis")
+    finally:
+        _log_sampled.reset(token)
+
+    assert [r.getMessage() for r in handler.records] == ["peringatan ditulis"]
+    assert calls == []
+
+
+def test_sampled_request_keeps_info():
+    logger, handler = _logger()
+    token = _log_sampled.set(True)
+    try:
+        logger.info("nilai %s", 1)
+    finally:
+        _log_sampled.reset(token)
+    assert [r.getMessage() for r in handler.records] == ["nilai 1"]
+
+
+def test_request_context_filter_only_adds_request_id():
+    record = logging.LogRecord("x", logging.DEBUG, __file__, 1, "m", None, None)
+    token = _log_sampled.set(False)
+    try:
+        assert logging_config.RequestContextFilter().filter(record) is True
+    finally:
+        _log_sampled.reset(token)
+    assert hasattr(record, "request_id")
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import nl2sql
+from app.services.query_result import QueryResult
+
+
+def _events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _stream(monkeypatch, analysis):
+    async def knowledge(**kwargs):
+        return []
+
+    class Service:
+        async def generate_sql(self, **kwargs):
+            return "SELECT a FROM t", 0.9
+
+    async def preview(sql_query, id_datasource):
+        return QueryResult.from_rows(["a"], [(1,), (2,)])
+
+    async def chart(*args):
+        return {"recommended_type": "bar", "reason": "r"}
+
+    monkeypatch.setattr(nl2sql, "retrieve_knowledge", knowledge)
+    monkeypatch.setattr(nl2sql, "get_nl2sql_service", lambda: Service())
+    monkeypatch.setattr(nl2sql, "fetch_preview_coalesced", preview)
+    monkeypatch.setattr(nl2sql, "stream_analysis_with_llm", analysis)
+    monkeypatch.setattr(nl2sql, "recommend_chart_type", chart)
+    app = FastAPI()
+    app.include_router(nl2sql.router)
+    response = TestClient(app).post("/convert/stream", json={"prompt": "p", "id_datasource": 1})
+    return _events(response.text)
+
+
+def test_stream_sends_all_stages(monkeypatch):
+    async def analysis(data, user_id):
+        for chunk in ["ha", "lo"]:
+            await asyncio.sleep(0)
+            yield chunk
+
+    names = [name for name, _ in _stream(monkeypatch, analysis)]
+    assert names == ["sql", "data", "analysis", "analysis", "chart", "done"]
+
+
+def test_stream_reports_analysis_failure_as_analysis_stage(monkeypatch):
+    async def analysis(data, user_id):
+        yield "ha"
+        raise RuntimeError("llm down")
+
+    events = _stream(monkeypatch, analysis)
+    names = [name for name, _ in events]
+    assert names == ["sql", "data", "analysis", "error", "chart", "done"]
+    error = dict(events)["error"]
+    assert error["stage"] == "analysis"
+    assert "Query gagal" not in error["detail"]
@@ -0,0 +1,79 @@
+from datetime import date, datetime, time, timedelta, timezone
+from app.core.config import settings
+from app.services import db_services
+from app.services.profiling_service import build_analysis_input, format_profile, profile_result
+from app.services.query_result import QueryResult
+
+def _sales(rows: int, truncated: bool = False) -> QueryResult:
+    return QueryResult.from_rows(
+        ["day", "category", "amount"],
+        [(date(2024, 1, i + 1), "a" if i % 3 else "b", float(i + 1)) for i in range(rows)],
+        truncated=truncated
+    )
+
+def test_profile_numeric_categorical_and_trend():
+    profile = profile_result(_sales(6))
+    assert profile["row_count"] == 6
+    assert profile["truncated"] is False
+    day, category, amount = profile["columns"]
+    assert (day["min"], day["max"]) == (date(2024, 1, 1), date(2024, 1, 6))
+    assert category["distinct"] == 2
+    assert category["top"][0] == ("a", 4)
+    assert (amount["min"], amount["max"], amount["sum"]) == (1.0, 6.0, 21.0)
+    assert profile["trends"][0]["direction"] == "naik"
+
+def test_profile_mixed_temporal_column():
+    rows = [
+        (datetime(2024, 1, 3, 12, 0), 3.0),
+        (date(2024, 1, 1), 1.0),
+        (datetime(2024, 1, 2, 8, 0, tzinfo=timezone(timedelta(hours=7))), 2.0),
+        (date(2024, 1, 4), 4.0),
+    ]
+    profile = profile_result(QueryResult.from_rows(["waktu", "nilai"], rows))
+    waktu = profile["columns"][0]
+    assert (waktu["min"], waktu["max"]) == (date(2024, 1, 1), date(2024, 1, 4))
+    assert profile["trends"][0]["direction"] == "naik"
+    assert profile["trends"][0]["first"] == 1.0
+
+def test_profile_time_of_day_column():
+    result = QueryResult.from_rows(["jam"], [(time(9, 30),), (time(7, 0),)])
+    jam = profile_result(result)["columns"][0]
+    assert (jam["min"], jam["max"]) == (time(7, 0), time(9, 30))
+
+def test_profile_counts_nulls():
+    result = QueryResult.from_rows(["x", "y"], [(None, None), (2, None)])
+    x, y = profile_result(result)["columns"]
+    assert x["null_count"] == 1
+    assert y["null_count"] == 2
+    assert "semua nilai null" in format_profile(profile_result(result))
+
+def test_format_profile_mentions_truncation():
+    assert format_profile(profile_result(_sales(3))).startswith("Jumlah baris: 3\n")
+    text = format_profile(profile_result(_sales(3, truncated=True)))
+    assert text.startswith("Jumlah baris: lebih dari 3 (hasil terpotong")
+
+def test_build_analysis_input_caps_sample(monkeypatch):
+    monkeypatch.setattr(settings, "ANALYSIS_SAMPLE_ROWS", 2)
+    analysis_input = build_analysis_input(_sales(10))
+    assert analysis_input["sample"].count("'category'") == 2
+    assert "Jumlah baris: 10" in analysis_input["profile"]
+
+def _fake_stream(total_rows: int, calls: list):
+    def stream_query(query, id_datasource, batch_size=None, inject_limit=False, handle=None, row_limit=None):
+        calls.append(row_limit)
+        rows = [(i,) for i in range(min(total_rows, row_limit))]
+        for start in range(0, max(len(rows), 1), batch_size):
+            yield ["n"], rows[start:start + batch_size]
+    return stream_query
+
+def test_fetch_preview_detects_truncation_at_exact_limit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    monkeypatch.setattr(db_services, "stream_query", _fake_stream(5, calls))
+    exact = db_services.fetch_preview("SELECT n FROM t", 1, limit=5)
+    assert (exact.row_count, exact.truncated) == (5, False)
+    assert calls == [6]
+
+    monkeypatch.setattr(db_services, "stream_query", _fake_stream(6, calls))
+    over = db_services.fetch_preview("SELECT n FROM t", 1, limit=5)
+    assert (over.row_count, over.truncated) == (5, True)
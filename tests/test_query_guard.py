@@ -0,0 +1,108 @@
+import json
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services import query_guard
+from app.services.query_guard import add_limit, guard_query, has_limit, is_aggregated, parse_select
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+class FakeConnection:
+    """Koneksi palsu yang mengembalikan plan EXPLAIN tetap dan mencatat query."""
+
+    def __init__(self, total_cost=10.0, plan_rows=100):
+        self.plan = [{"Plan": {"Total Cost": total_cost, "Plan Rows": plan_rows}}]
+        self.queries = []
+
+    def execute(self, statement):
+        self.queries.append(str(statement))
+        return FakeResult(json.dumps(self.plan))
+
+    def rollback(self):
+        pass
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT category FROM t GROUP BY category", True),
+    ("SELECT category, COUNT(*) FROM t GROUP BY category", True),
+    ("SELECT COUNT(*) FROM t", True),
+    ("SELECT SUM(amount) FROM t WHERE x = 1", True),
+    ("SELECT a, b FROM t", False),
+    ("SELECT a, SUM(b) OVER (PARTITION BY a) FROM t", False),
+    ("SELECT * FROM (SELECT a FROM t GROUP BY a) s", False),
+    ("SELECT a, b FROM t GROUP\n  BY a, b", True),
+    ("WITH c AS (SELECT a, SUM(b) FROM t GROUP BY a) SELECT * FROM big JOIN c USING (a)", False),
+    ("WITH c AS (SELECT a FROM t), d AS (SELECT 1) SELECT COUNT(*) FROM c", True),
+    ("WITH c AS (SELECT a FROM t) SELECT a FROM c GROUP BY a", True),
+])
+def test_is_aggregated(query, expected):
+    assert is_aggregated(parse_select(query)) is expected
+
+def test_has_limit_ignores_subquery():
+    assert has_limit(parse_select("SELECT a FROM t LIMIT 5"))
+    assert has_limit(parse_select("SELECT a FROM t OFFSET 5 ROWS FETCH FIRST 3 ROWS ONLY"))
+    assert not has_limit(parse_select("SELECT * FROM (SELECT a FROM t LIMIT 5) s"))
+
+@pytest.mark.parametrize("query", [
+    "SELECT a FROM t WHERE x = 1 FOR UPDATE",
+    "SELECT a FROM t ORDER BY a FOR SHARE;",
+    "SELECT a FROM t -- komentar penutup",
+])
+def test_add_limit_wraps_query(query):
+    limited = add_limit(query, 10)
+    assert limited.startswith("SELECT * FROM (\n")
+    assert limited.endswith("\n) AS _guard LIMIT 10")
+    assert ";" not in limited
+    parse_select(limited)
+
+def test_parse_select_rejects_non_select():
+    with pytest.raises(HTTPException) as exc:
+        parse_select("DELETE FROM t")
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        parse_select("SELECT 1; SELECT 2")
+
+def test_guard_injects_limit_for_plain_select(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    conn = FakeConnection()
+    query = guard_query(conn, "SELECT a FROM t", 1)
+    assert query.endswith(f"LIMIT {settings.QUERY_GUARD_ROW_LIMIT}")
+    assert conn.queries == [f"EXPLAIN (FORMAT JSON) {query}"]
+
+def test_guard_injects_limit_when_only_cte_is_grouped(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    query = "WITH c AS (SELECT a, SUM(b) FROM t GROUP BY a) SELECT * FROM big JOIN c USING (a)"
+    assert guard_query(FakeConnection(), query, 1).endswith(f"LIMIT {settings.QUERY_GUARD_ROW_LIMIT}")
+
+def test_guard_keeps_grouped_query(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    query = "SELECT category FROM t GROUP BY category"
+    assert guard_query(FakeConnection(), query, 1) == query
+
+def test_guard_rejects_expensive_query(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    conn = FakeConnection(total_cost=settings.QUERY_GUARD_MAX_COST + 1)
+    with pytest.raises(HTTPException) as exc:
+        guard_query(conn, "SELECT COUNT(*) FROM t", 1)
+    assert exc.value.status_code == 422
+
+def test_guard_uses_datasource_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    monkeypatch.setattr(settings, "QUERY_GUARD_DATASOURCE_LIMITS", {7: {"row_limit": 25}})
+    assert query_guard.get_query_limits(7)["row_limit"] == 25
+    assert guard_query(FakeConnection(), "SELECT a FROM t", 7).endswith("LIMIT 25")
+
+def test_guard_export_uses_export_row_limit(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_ENABLED", True)
+    plan_rows = settings.QUERY_GUARD_MAX_ROWS + 1
+    query = "SELECT a FROM t"
+    assert guard_query(FakeConnection(plan_rows=plan_rows), query, 1, inject_limit=False) == query
+
+    monkeypatch.setattr(settings, "QUERY_GUARD_EXPORT_MAX_ROWS", plan_rows - 1)
+    with pytest.raises(HTTPException) as exc:
+        guard_query(FakeConnection(plan_rows=plan_rows), query, 1, inject_limit=False)
+    assert exc.value.status_code == 422
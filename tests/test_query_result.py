@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from app.services.query_result import CATEGORICAL, NUMERIC, TEMPORAL, QueryResult
+
+def test_from_rows_builds_typed_columns():
+    result = QueryResult.from_rows(
+        ["id", "amount", "day", "name"],
+        [(1, Decimal("1.5"), date(2024, 1, 1), "a"), (2, None, date(2024, 1, 2), None)]
+    )
+    assert len(result) == 2
+    assert result.kinds == [NUMERIC, NUMERIC, TEMPORAL, CATEGORICAL]
+    assert result.column("id").dtype == np.int64
+    assert result.column("amount").dtype == np.float64
+    assert result.valid(1).tolist() == [True, False]
+
+def test_to_records_restores_nulls():
+    rows = [(1, None, "x"), (None, 2.5, None)]
+    result = QueryResult.from_rows(["a", "b", "c"], rows)
+    assert result.to_records() == [
+        {"a": 1, "b": None, "c": "x"},
+        {"a": None, "b": 2.5, "c": None}
+    ]
+    assert result.to_columnar()["data"] == [[1, None], [None, 2.5], ["x", None]]
+
+def test_empty_and_head():
+    empty = QueryResult.from_rows(["a"], [])
+    assert not empty
+    assert empty.to_records() == []
+
+    result = QueryResult.from_rows(["a"], [(i,) for i in range(5)])
+    head = result.head(2)
+    assert head.row_count == 2
+    assert head.to_records() == [{"a": 0}, {"a": 1}]
+    assert result.head(10) is result
+
+def test_fingerprint_depends_on_content():
+    first = QueryResult.from_rows(["a", "b"], [(1, "x"), (2, "y")])
+    same = QueryResult.from_rows(["a", "b"], [(1, "x"), (2, "y")])
+    other = QueryResult.from_rows(["a", "b"], [(1, "x"), (2, "z")])
+    assert first.fingerprint() == same.fingerprint()
+    assert first.fingerprint() != other.fingerprint()
+
+def test_large_integers_fall_back_to_float():
+    result = QueryResult.from_rows(["n"], [(2 ** 70,), (1,)])
+    assert result.kinds == [NUMERIC]
+    assert result.column("n").dtype == np.float64